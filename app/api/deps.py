@@ -1,8 +1,11 @@
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.jwt import decode_token
-from app.core.database import SessionLocal
+from app.core.jwt import decode_token, decode_token_async
+from app.core.database import SessionLocal, AsyncSessionLocal, get_async_engine
+from app.core.log_context import RequestLogContext, get_log_context, set_request_user
+from app.core.principal import load_principal, load_principal_async
 from app.models.user import User
 from typing import Optional
 
@@ -15,12 +18,35 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_request_log_context() -> Optional[RequestLogContext]:
+    """Log buffer and request id of the current request"""
+    return get_log_context()
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     try:
         payload = decode_token(token)
-        user = db.query(User).filter(User.id == int(payload.get("sub"))).first()
+        user = load_principal(db, payload, token)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        set_request_user(user.id)
+        return user
+    except:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """get_current_user for async routes: a cache miss queries through the
+    request's AsyncSession instead of blocking the event loop"""
+    try:
+        payload = await decode_token_async(token)
+        user = await load_principal_async(db, payload, token)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
+        set_request_user(user.id)
         return user
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -34,7 +60,9 @@ def get_current_user_optional(request: Request, db: Session = Depends(get_db)) -
         if scheme.lower() != "bearer":
             return None
         payload = decode_token(token)
-        user = db.query(User).filter(User.id == int(payload.get("sub"))).first()
+        user = load_principal(db, payload, token)
+        if user:
+            set_request_user(user.id)
         return user
     except Exception:
         return None
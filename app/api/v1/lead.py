@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.schemas.lead import (
-    LeadCreate, LeadOut, LeadUpdate, 
+    LeadCreate, LeadOut, LeadUpdate, LeadPage,
     LeadNoteOut, LeadNoteCreate, LeadNoteUpdate,
     LeadStatusChangeOut, LeadStatusChangeCreate, LeadStatusChangeUpdate
 )
 from app.crud import lead as crud_lead
+from app.crud import lead_async as crud_lead_async
 from app.api import deps
 from app.models.user import User
 from app.core.logging import LoggingService
+from app.core.pagination import InvalidCursor
 from app.models.log import LogLevel, LogCategory
 
 router = APIRouter()
@@ -113,6 +116,8 @@ def get_leads(
     skip: int = Query(0, description="Number of leads to skip"),
     limit: int = Query(100, description="Maximum number of leads to return"),
     search: Optional[str] = Query(None, description="Search term for name, email or phone"),
+    search_mode: str = Query("contains", pattern="^(contains|prefix)$", description="Match anywhere or only at the start"),
+    sort: str = Query("created_at", pattern="^(created_at|relevance)$", description="Order by creation time or search relevance"),
     status: Optional[str] = Query(None, description="Filter by lead status"),
     db: Session = Depends(deps.get_db),
     user: User = Depends(deps.get_current_user),
@@ -133,6 +138,8 @@ def get_leads(
                 "all_leads": all_leads,
                 "target_user_id": user_id,
                 "search": search,
+                "search_mode": search_mode,
+                "sort": sort,
                 "status": status,
                 "skip": skip,
                 "limit": limit
@@ -156,7 +163,8 @@ def get_leads(
                 )
                 raise HTTPException(status_code=403, detail="Only admins can view all leads")
             
-            leads = crud_lead.get_all_leads(db, skip=skip, limit=limit, search=search, status=status)
+            leads = crud_lead.get_all_leads(db, skip=skip, limit=limit, search=search, status=status,
+                search_mode=search_mode, sort=sort)
             
             # Log admin access to all leads
             LoggingService.log_system_event(
@@ -191,11 +199,11 @@ def get_leads(
                 )
                 raise HTTPException(status_code=403, detail="Not authorized to view other users' leads")
             
-            leads = crud_lead.get_user_leads(db, user_id, skip=skip, limit=limit, search=search, status=status)
+            leads = crud_lead.get_user_leads(db, user_id, skip=skip, limit=limit, search=search, status=status, search_mode=search_mode, sort=sort)
             return leads
         
         # Case 3: Default - user viewing their own leads
-        leads = crud_lead.get_user_leads(db, user.id, skip=skip, limit=limit, search=search, status=status)
+        leads = crud_lead.get_user_leads(db, user.id, skip=skip, limit=limit, search=search, status=status, search_mode=search_mode, sort=sort)
         return leads
         
     except HTTPException:
@@ -445,6 +453,7 @@ def get_leads_count(
     all_leads: bool = Query(False, description="Count all leads (admin only)"),
     user_id: Optional[int] = Query(None, description="Count leads for specific user (admin only)"),
     search: Optional[str] = Query(None, description="Search term for name, email or phone"),
+    search_mode: str = Query("contains", pattern="^(contains|prefix)$", description="Match anywhere or only at the start"),
     status: Optional[str] = Query(None, description="Filter by lead status"),
     db: Session = Depends(deps.get_db),
     user: User = Depends(deps.get_current_user)
@@ -454,7 +463,7 @@ def get_leads_count(
     if all_leads:
         if user.role_id != 1:  # Admin check
             raise HTTPException(status_code=403, detail="Only admins can count all leads")
-        count = crud_lead.get_leads_count(db, search=search, status=status)
+        count = crud_lead.get_leads_count(db, search=search, status=status, search_mode=search_mode)
         return {"total": count}
     
     # Case 2: Admin/user requesting specific user's leads count
@@ -462,21 +471,61 @@ def get_leads_count(
         # Ensure only admins can view other users' leads
         if user.role_id != 1 and user.id != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to count other users' leads")
-        count = crud_lead.get_user_leads_count(db, user_id, search=search, status=status)
+        count = crud_lead.get_user_leads_count(db, user_id, search=search, status=status, search_mode=search_mode)
         return {"total": count}
     
     # Case 3: Default - user counting their own leads
-    count = crud_lead.get_user_leads_count(db, user.id, search=search, status=status)
+    count = crud_lead.get_user_leads_count(db, user.id, search=search, status=status, search_mode=search_mode)
     return {"total": count}
 
+@router.get("/leads/page", response_model=LeadPage)
+async def get_leads_page(
+    all_leads: bool = Query(False, description="Page through all leads (admin only)"),
+    user_id: Optional[int] = Query(None, description="Page through leads of a specific user (admin only)"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of leads to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    skip: int = Query(0, ge=0, description="Number of leads to skip when not using a cursor"),
+    include_total: Optional[bool] = Query(None, description="Count matching leads (default: first page only)"),
+    search: Optional[str] = Query(None, description="Search term for name, email or phone"),
+    search_mode: str = Query("contains", pattern="^(contains|prefix)$", description="Match anywhere or only at the start"),
+    sort: str = Query("created_at", pattern="^(created_at|relevance)$", description="Order by creation time or search relevance"),
+    status: Optional[str] = Query(None, description="Filter by lead status"),
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user_async)
+):
+    """Leads, their total and the next page cursor in a single response.
+
+    Takes the same filters as ``GET /leads`` and ``GET /leads/count``.
+    """
+    if all_leads:
+        if user.role_id != 1:  # Admin check
+            raise HTTPException(status_code=403, detail="Only admins can view all leads")
+        owner_id = None
+    elif user_id is not None:
+        if user.role_id != 1 and user.id != user_id:
+            raise HTTPException(status_code=403, detail="Not authorized to view other users' leads")
+        owner_id = user_id
+    else:
+        owner_id = user.id
+
+    try:
+        leads, total, next_cursor = await crud_lead_async.get_leads_page(
+            db, user_id=owner_id, limit=limit, search=search, status=status,
+            search_mode=search_mode, sort=sort, cursor=cursor, skip=skip,
+            include_total=include_total
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return LeadPage(items=leads, total=total, next_cursor=next_cursor)
+
 @router.get("/leads/{lead_id}", response_model=LeadOut)
-def get_lead_by_id(
+async def get_lead_by_id(
     lead_id: int, 
-    db: Session = Depends(deps.get_db), 
-    user: User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db), 
+    user: User = Depends(deps.get_current_user_async)
 ):
     """Get a specific lead by ID"""
-    lead = crud_lead.get_lead_by_id(db, lead_id)
+    lead = await crud_lead_async.get_lead_by_id(db, lead_id)
     
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
@@ -488,13 +537,13 @@ def get_lead_by_id(
     return lead
 
 @router.get("/leads/platform/{platform_id}", response_model=LeadOut)
-def get_lead_by_platform_id(
+async def get_lead_by_platform_id(
     platform_id: str,
-    db: Session = Depends(deps.get_db),
-    user: User = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_async_db),
+    user: User = Depends(deps.get_current_user_async)
 ):
     """Get a lead by its platform-specific ID"""
-    lead = crud_lead.get_lead_by_platform_id(db, platform_id)
+    lead = await crud_lead_async.get_lead_by_platform_id(db, platform_id)
     
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.schemas.line import LineMessageCreate, LineMessageOut, LineUserCreate, LineUserOut
+from typing import List, Optional
+from app.schemas.line import (
+    LineMessageCreate, LineMessageOut, LineUserCreate, LineUserOut, LineWebhookDelivery, LineMessagePage,
+    LineConversationPage, LineMarkReadOut
+)
 from app.crud import line as crud_line
+from app.crud import line_async as crud_line_async
 from app.api import deps
 from app.core.line_logging import LineLoggingService
+from app.core.config import settings
+from app.core.pagination import InvalidCursor
+from app.core.line_feed import LINE_MESSAGES_CHANNEL, publish_line_messages, publish_line_read
+from app.core.line_webhook import enqueue_delivery, process_delivery
+from app.core.pubsub import broker
 
 router = APIRouter()
 
@@ -24,6 +36,7 @@ def create_line_message(
         line_message=created_message,
         request=request
     )
+    publish_line_messages([created_message])
     
     return created_message
 
@@ -49,25 +62,117 @@ def create_line_user(
     return created_user
 
 @router.get("/line/messages/{message_id}", response_model=LineMessageOut)
-def get_line_message(
+async def get_line_message(
     message_id: int, 
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
-    message = crud_line.get_line_message(db, message_id)
+    message = await crud_line_async.get_line_message(db, message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     return message
 
 @router.get("/line/users/{user_id}", response_model=LineUserOut)
-def get_line_user(
+async def get_line_user(
     user_id: str, 
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
-    user = crud_line.get_line_user(db, user_id)
+    user = await crud_line_async.get_line_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+@router.get("/line/users/{user_id}/messages", response_model=LineMessagePage)
+async def get_line_user_messages(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of messages to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("none", pattern="^(exact|estimate|none)$", description="How to compute the total"),
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """Chat history with one LINE user, newest first, with the conversation summary.
+
+    Pages walk back in time through the (user_id, timestamp, id) index; pass
+    ``next_cursor`` to get the next older page.
+    """
+    try:
+        page = await crud_line_async.get_user_messages(db, user_id, limit=limit, cursor=cursor, count=count)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    conversation = await crud_line_async.get_conversation(db, user_id) if not cursor else None
+    return LineMessagePage(
+        conversation=conversation,
+        messages=page.items,
+        total=page.total,
+        next_cursor=page.next_cursor
+    )
+
+@router.get("/line/conversations", response_model=LineConversationPage)
+async def get_line_inbox(
+    unread_only: bool = Query(False, description="Only conversations with unread messages"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of conversations to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("none", pattern="^(exact|estimate|none)$", description="How to compute the total"),
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """Inbox of LINE conversations, most recent message first, with unread counts"""
+    try:
+        page = await crud_line_async.get_inbox(db, limit=limit, cursor=cursor, unread_only=unread_only, count=count)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return LineConversationPage(items=page.items, total=page.total, next_cursor=page.next_cursor)
+
+@router.post("/line/users/{user_id}/read", response_model=LineMarkReadOut)
+async def mark_line_conversation_read(
+    user_id: str,
+    up_to_message_id: Optional[int] = Query(None, description="Leave messages after this id unread"),
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """Mark every unread message of a LINE user as read"""
+    marked = await crud_line_async.mark_conversation_read(db, user_id, up_to_message_id)
+    conversation = await crud_line_async.get_conversation(db, user_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if marked:
+        await publish_line_read(user_id, conversation.unread_count)
+    return LineMarkReadOut(user_id=user_id, marked_read=marked, unread_count=conversation.unread_count)
+
+@router.get("/line/stream")
+async def line_message_stream(
+    request: Request,
+    user_id: Optional[List[str]] = Query(None, description="Only events about these LINE users")
+):
+    """Server-sent events feed of new LINE messages and read conversations.
+
+    Replaces polling ``/line/messages``: every stored message is pushed as a
+    ``message`` event. A comment line is sent as heartbeat when idle, and a
+    ``resync`` event when the client fell too far behind and missed events.
+    """
+    async def events():
+        # Subscribed only once the response streams, so a request cancelled
+        # before then leaves nothing behind to unsubscribe
+        subscription = broker.subscribe(LINE_MESSAGES_CHANNEL, user_ids=user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                message = await subscription.get(settings.LINE_STREAM_HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield "event: resync\ndata: {}\n\n"
+                if message is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.put("/line/messages/{message_id}", response_model=LineMessageOut)
 def update_line_message(
     message_id: int, 
@@ -159,77 +264,55 @@ def delete_line_user(
     return user
 
 @router.get("/line/messages", response_model=List[LineMessageOut])
-def get_all_line_messages(
+async def get_all_line_messages(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
-    return crud_line.get_all_line_messages(db, skip=skip, limit=limit)
+    return await crud_line_async.get_all_line_messages(db, skip=skip, limit=limit)
 
 @router.get("/line/users", response_model=List[LineUserOut])
-def get_all_line_users(
+async def get_all_line_users(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
-    return crud_line.get_all_line_users(db, skip=skip, limit=limit)
+    return await crud_line_async.get_all_line_users(db, skip=skip, limit=limit)
 
 # New LINE-specific logging endpoints
 @router.post("/line/webhook")
 def line_webhook(
-    webhook_data: dict,
+    delivery: LineWebhookDelivery,
     db: Session = Depends(deps.get_db),
     request: Request = None
 ):
-    """Handle LINE webhook and log events"""
+    """Acknowledge a LINE webhook delivery and store its events as background jobs.
+
+    LINE retries deliveries that are slow to answer, so the delivery is only
+    validated and written to the job table here; the job workers store the
+    messages. With background jobs disabled it is processed inline.
+    """
     try:
-        # Process webhook data (implement your webhook logic here)
-        events = webhook_data.get("events", [])
-        
-        for event in events:
-            event_type = event.get("type")
-            source = event.get("source", {})
-            user_id = source.get("userId")
-            
-            if event_type == "message":
-                # Handle message event
-                message = event.get("message", {})
-                message_data = LineMessageCreate(
-                    user_id=user_id,
-                    message_text=message.get("text", ""),
-                    message_type=message.get("type", "text"),
-                    reply_token=event.get("replyToken")
-                )
-                
-                # Save message to database
-                created_message = crud_line.create_line_message(db, message_data)
-                
-                # Log the received message
-                LineLoggingService.log_line_message_received(
-                    db=db,
-                    line_message=created_message,
-                    request=request
-                )
-                
-            elif event_type in ["follow", "unfollow", "join", "leave"]:
-                # Log user interaction events
-                LineLoggingService.log_line_webhook_event(
-                    db=db,
-                    event_type=event_type,
-                    line_user_id=user_id,
-                    event_data=event,
-                    request=request
-                )
+        if settings.JOBS_ENABLED:
+            jobs = enqueue_delivery(db, delivery)
+            return {"status": "accepted", "queued_events": len(delivery.events), "jobs": jobs}
         
-        return {"status": "success", "processed_events": len(events)}
+        result = process_delivery(db, delivery)
+        return {
+            "status": "success",
+            "processed_events": result["events"],
+            "messages_stored": result["messages_stored"],
+            "duplicates": result["duplicates"]
+        }
         
     except Exception as e:
+        db.rollback()
         # Log webhook processing error
         LineLoggingService.log_line_webhook_event(
             db=db,
             event_type="webhook_error",
             line_user_id="unknown",
-            event_data=webhook_data,
+            event_data={"events": len(delivery.events)},
             processing_success=False,
             error_message=str(e),
             request=request
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Path, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import math
 
@@ -12,11 +14,30 @@ from app.schemas.log import (
     LogListResponse, APILogListResponse, AuditLogListResponse
 )
 from app.crud import log as crud_log
+from app.crud import log_async as crud_log_async
 from app.api import deps
+from app.core import log_export, log_ingest, log_retention
+from app.core.config import settings
+from app.core.pagination import Page, InvalidCursor
 from app.models.log import LogLevel, LogCategory
 
 router = APIRouter()
 
+def _count_mode(count: Optional[str], cursor: Optional[str]) -> str:
+    """Count on the first page by default; later cursor pages skip it"""
+    return count or ("none" if cursor else "exact")
+
+def _log_list_response(response_model, result: Page, page: int, size: int, cursor: Optional[str]):
+    return response_model(
+        logs=result.items,
+        total=result.total,
+        total_is_estimate=result.total_is_estimate,
+        page=None if cursor else page,
+        size=size,
+        total_pages=math.ceil(result.total / size) if result.total is not None else None,
+        next_cursor=result.next_cursor
+    )
+
 # System Logs Endpoints
 @router.post("/logs/system", response_model=SystemLogOut)
 def create_system_log(
@@ -27,18 +48,18 @@ def create_system_log(
     return crud_log.create_system_log(db, log)
 
 @router.get("/logs/system/{log_id}", response_model=SystemLogOut)
-def get_system_log(
+async def get_system_log(
     log_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get a specific system log by ID"""
-    log = crud_log.get_system_log(db, log_id)
+    log = await crud_log_async.get_system_log(db, log_id)
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
     return log
 
 @router.get("/logs/system", response_model=LogListResponse)
-def get_system_logs(
+async def get_system_logs(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
     level: Optional[LogLevel] = Query(None, description="Filter by log level"),
@@ -49,7 +70,10 @@ def get_system_logs(
     module: Optional[str] = Query(None, description="Filter by module name"),
     endpoint: Optional[str] = Query(None, description="Filter by endpoint"),
     search_text: Optional[str] = Query(None, description="Search in message, module, and function"),
-    db: Session = Depends(deps.get_db)
+    sort_by_relevance: bool = Query(False, description="Order search results by relevance instead of time (page-based, no cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$", description="How to compute the total"),
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get system logs with advanced filtering and pagination"""
     skip = (page - 1) * size
@@ -62,19 +86,19 @@ def get_system_logs(
         end_date=end_date,
         module=module,
         endpoint=endpoint,
-        search_text=search_text
+        search_text=search_text,
+        sort_by_relevance=sort_by_relevance
     )
     
-    logs, total = crud_log.get_system_logs(db, skip=skip, limit=size, filters=filters)
-    total_pages = math.ceil(total / size)
+    try:
+        result = await crud_log_async.get_system_logs(
+            db, skip=skip, limit=size, filters=filters,
+            cursor=cursor, count=_count_mode(count, cursor)
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return LogListResponse(
-        logs=logs,
-        total=total,
-        page=page,
-        size=size,
-        total_pages=total_pages
-    )
+    return _log_list_response(LogListResponse, result, page, size, cursor)
 
 @router.put("/logs/system/{log_id}", response_model=SystemLogOut)
 def update_system_log(
@@ -109,18 +133,18 @@ def create_audit_log(
     return crud_log.create_audit_log(db, log)
 
 @router.get("/logs/audit/{log_id}", response_model=AuditLogOut)
-def get_audit_log(
+async def get_audit_log(
     log_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get a specific audit log by ID"""
-    log = crud_log.get_audit_log(db, log_id)
+    log = await crud_log_async.get_audit_log(db, log_id)
     if not log:
         raise HTTPException(status_code=404, detail="Audit log not found")
     return log
 
 @router.get("/logs/audit", response_model=AuditLogListResponse)
-def get_audit_logs(
+async def get_audit_logs(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
@@ -128,30 +152,30 @@ def get_audit_logs(
     resource_type: Optional[str] = Query(None, description="Filter by resource type"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter"),
-    db: Session = Depends(deps.get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$", description="How to compute the total"),
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get audit logs with filtering and pagination"""
     skip = (page - 1) * size
     
-    logs, total = crud_log.get_audit_logs(
-        db, 
-        skip=skip, 
-        limit=size,
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        start_date=start_date,
-        end_date=end_date
-    )
-    total_pages = math.ceil(total / size)
+    try:
+        result = await crud_log_async.get_audit_logs(
+            db, 
+            skip=skip, 
+            limit=size,
+            user_id=user_id,
+            action=action,
+            resource_type=resource_type,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            count=_count_mode(count, cursor)
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return AuditLogListResponse(
-        logs=logs,
-        total=total,
-        page=page,
-        size=size,
-        total_pages=total_pages
-    )
+    return _log_list_response(AuditLogListResponse, result, page, size, cursor)
 
 # API Logs Endpoints
 @router.post("/logs/api", response_model=APILogOut)
@@ -163,18 +187,18 @@ def create_api_log(
     return crud_log.create_api_log(db, log)
 
 @router.get("/logs/api/{log_id}", response_model=APILogOut)
-def get_api_log(
+async def get_api_log(
     log_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get a specific API log by ID"""
-    log = crud_log.get_api_log(db, log_id)
+    log = await crud_log_async.get_api_log(db, log_id)
     if not log:
         raise HTTPException(status_code=404, detail="API log not found")
     return log
 
 @router.get("/logs/api", response_model=APILogListResponse)
-def get_api_logs(
+async def get_api_logs(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(50, ge=1, le=100, description="Page size"),
     endpoint: Optional[str] = Query(None, description="Filter by endpoint"),
@@ -183,42 +207,43 @@ def get_api_logs(
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter"),
-    db: Session = Depends(deps.get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$", description="How to compute the total"),
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """Get API logs with filtering and pagination"""
     skip = (page - 1) * size
     
-    logs, total = crud_log.get_api_logs(
-        db,
-        skip=skip,
-        limit=size,
-        endpoint=endpoint,
-        method=method,
-        status_code=status_code,
-        user_id=user_id,
-        start_date=start_date,
-        end_date=end_date
-    )
-    total_pages = math.ceil(total / size)
+    try:
+        result = await crud_log_async.get_api_logs(
+            db,
+            skip=skip,
+            limit=size,
+            endpoint=endpoint,
+            method=method,
+            status_code=status_code,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            cursor=cursor,
+            count=_count_mode(count, cursor)
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return APILogListResponse(
-        logs=logs,
-        total=total,
-        page=page,
-        size=size,
-        total_pages=total_pages
-    )
+    return _log_list_response(APILogListResponse, result, page, size, cursor)
 
 # Analytics and Statistics Endpoints
 @router.get("/logs/statistics", response_model=LogStats)
 def get_log_statistics(
     start_date: Optional[datetime] = Query(None, description="Start date for statistics"),
     end_date: Optional[datetime] = Query(None, description="End date for statistics"),
+    include_percentiles: bool = Query(False, description="Include p50/p95/p99 response times (PostgreSQL only)"),
     db: Session = Depends(deps.get_db)
 ):
     """Get comprehensive log statistics"""
     filters = LogStatsFilter(start_date=start_date, end_date=end_date)
-    return crud_log.get_log_statistics(db, filters)
+    return crud_log.get_log_statistics(db, filters, include_percentiles=include_percentiles)
 
 @router.get("/logs/analytics", response_model=List[LogAnalytics])
 def get_log_analytics(
@@ -236,25 +261,46 @@ def get_log_analytics(
     return crud_log.get_log_analytics(db, filters)
 
 # Log Management Endpoints
-@router.delete("/logs/cleanup")
+@router.delete("/logs/cleanup", status_code=202)
 def cleanup_old_logs(
-    days_to_keep: int = Query(30, ge=1, le=365, description="Number of days to keep logs"),
-    db: Session = Depends(deps.get_db)
+    days_to_keep: Optional[int] = Query(None, ge=1, le=365, description="Days to keep for every log table (defaults to each table's retention policy)"),
+    resume_job_id: Optional[str] = Query(None, description="Continue an interrupted cleanup job from where it stopped")
 ):
-    """Delete logs older than specified days"""
-    result = crud_log.delete_old_logs(db, days_to_keep)
+    """Start deleting old logs in the background; 409 while another cleanup runs"""
+    try:
+        job = log_retention.retention_engine.start_job(days_to_keep, resume_job_id=resume_job_id)
+    except log_retention.RetentionJobRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
     return {
-        "message": f"Successfully deleted old logs",
-        "details": result
+        "message": "Log cleanup started",
+        "details": job.to_dict()
     }
 
+@router.get("/logs/cleanup/{job_id}")
+def get_cleanup_job(job_id: str):
+    """Get the progress of a log cleanup job"""
+    job = log_retention.retention_engine.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
+    return job.to_dict()
+
+@router.post("/logs/cleanup/{job_id}/cancel")
+def cancel_cleanup_job(job_id: str):
+    """Stop a running log cleanup job after its current batch"""
+    job = log_retention.retention_engine.cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
+    return job.to_dict()
+
 # Health Check Endpoints
 @router.get("/logs/health")
 def logs_health_check(db: Session = Depends(deps.get_db)):
     """Health check for logging system"""
     try:
         # Test database connectivity with a simple query
-        recent_logs_count = crud_log.get_system_logs(db, skip=0, limit=1)[1]
+        recent_logs_count = crud_log.get_system_logs(db, skip=0, limit=1).total
         
         return {
             "status": "healthy",
@@ -273,38 +319,70 @@ def logs_health_check(db: Session = Depends(deps.get_db)):
         )
 
 # Bulk Operations
+def _check_bulk_size(logs: list):
+    if len(logs) > settings.LOG_BULK_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {settings.LOG_BULK_MAX_ENTRIES} logs allowed per bulk operation; "
+                   f"use the NDJSON endpoint for larger batches"
+        )
+
 @router.post("/logs/system/bulk", response_model=List[SystemLogOut])
 def create_bulk_system_logs(
     logs: List[SystemLogCreate],
     db: Session = Depends(deps.get_db)
 ):
     """Create multiple system logs in bulk"""
-    if len(logs) > 100:
-        raise HTTPException(status_code=400, detail="Maximum 100 logs allowed per bulk operation")
-    
-    created_logs = []
-    for log in logs:
-        created_log = crud_log.create_system_log(db, log)
-        created_logs.append(created_log)
-    
-    return created_logs
+    _check_bulk_size(logs)
+    return crud_log.create_logs_bulk(db, "system", logs)
+
+@router.post("/logs/audit/bulk", response_model=List[AuditLogOut])
+def create_bulk_audit_logs(
+    logs: List[AuditLogCreate],
+    db: Session = Depends(deps.get_db)
+):
+    """Create multiple audit logs in bulk"""
+    _check_bulk_size(logs)
+    return crud_log.create_logs_bulk(db, "audit", logs)
+
+@router.post("/logs/api/bulk", response_model=List[APILogOut])
+def create_bulk_api_logs(
+    logs: List[APILogCreate],
+    db: Session = Depends(deps.get_db)
+):
+    """Create multiple API logs in bulk"""
+    _check_bulk_size(logs)
+    return crud_log.create_logs_bulk(db, "api", logs)
+
+@router.post("/logs/{log_type}/bulk/ndjson")
+async def ingest_ndjson_logs(
+    request: Request,
+    log_type: str = Path(..., pattern="^(system|audit|api)$")
+) -> Dict[str, Any]:
+    """Stream newline-delimited JSON log entries of any size into the log table"""
+    return await log_ingest.ingest_ndjson(log_type, request.stream())
 
 @router.get("/logs/export")
 def export_logs(
     log_type: str = Query(..., pattern="^(system|audit|api)$", description="Type of logs to export"),
-    format: str = Query("json", pattern="^(json|csv)$", description="Export format"),
+    format: str = Query("json", pattern="^(json|ndjson|csv|parquet)$", description="Export format"),
     start_date: Optional[datetime] = Query(None, description="Start date for export"),
     end_date: Optional[datetime] = Query(None, description="End date for export"),
-    db: Session = Depends(deps.get_db)
+    compress: bool = Query(False, description="Gzip the exported file")
 ):
-    """Export logs in specified format"""
-    # This is a placeholder for log export functionality
-    # In a real implementation, you would generate and return the file
-    return {
-        "message": f"Export functionality for {log_type} logs in {format} format",
-        "note": "This endpoint would generate and return the exported file in a real implementation",
-        "filters": {
-            "start_date": start_date,
-            "end_date": end_date
-        }
-    } 
\ No newline at end of file
+    """Stream logs in the specified format"""
+    if format == "parquet" and not log_export.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
+    body = log_export.stream_log_export(log_type, format, start_date, end_date, compress=compress)
+    filename = f"{log_type}_logs_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    media_type = log_export.MEDIA_TYPES[format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+
+from app.api import deps
+from app.core.cache import cache_stats
+from app.core.database import database_pool_stats
+from app.core.jobs import job_pool
+from app.core.pubsub import broker
+from app.crud import job as crud_job
+from app.schemas.job import DeadLetterJobOut
+from app.core.security import password_pool
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/system/cache-stats")
+def get_cache_stats(
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Dict[str, Any]]:
+    """Size and hit/miss counters of the in-process caches (admin only)"""
+    return cache_stats()
+
+
+@router.get("/system/password-pool")
+def get_password_pool_stats(
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """Queue depth and hashing latency of the password worker pool (admin only)"""
+    return password_pool.stats()
+
+
+@router.get("/system/pubsub")
+def get_pubsub_stats(
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """Published/delivered counts and live feed subscribers of this process (admin only)"""
+    return broker.stats()
+
+
+@router.get("/system/db-pool")
+def get_db_pool_stats(
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """Connection pool occupancy, checkout wait histogram and hold times (admin only)"""
+    return database_pool_stats()
+
+
+
+@router.get("/system/jobs")
+def get_job_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """Jobs per queue and status, dead letters and worker pool counters (admin only)"""
+    return {
+        "queues": crud_job.get_job_counts(db),
+        "workers": job_pool.stats() if job_pool is not None else {"running": False},
+    }
+
+
+@router.get("/system/jobs/dead-letters", response_model=List[DeadLetterJobOut])
+def get_dead_letter_jobs(
+    queue: Optional[str] = Query(None, description="Only dead letters of this queue"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user)
+):
+    """Jobs that exhausted their retries, newest first (admin only)"""
+    return crud_job.get_dead_letter_jobs(db, queue=queue, skip=skip, limit=limit)
+
+
+@router.post("/system/jobs/dead-letters/{dead_letter_id}/retry")
+def retry_dead_letter_job(
+    dead_letter_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user)
+) -> Dict[str, Any]:
+    """Put a dead-lettered job back on its queue (admin only)"""
+    job = crud_job.retry_dead_letter_job(db, dead_letter_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Dead letter not found")
+    if job_pool is not None:
+        job_pool.notify()
+    return {"job_id": job.id, "queue": job.queue}
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, List
 from app.schemas.user import UserCreate, UserOut, UserUpdate
 from app.crud import user as crud_user
-from app.core.security import verify_password
-from app.core.jwt import create_access_token
+from app.core.security import PasswordPoolBusy, hash_password_async, verify_and_update_password_async
+from app.core.jwt import create_access_token, revoke_token
+from app.core.principal import token_claims
 from app.api import deps
 from app.models.user import User
 from app.core.logging import LoggingService
@@ -14,7 +17,7 @@ from app.models.log import LogLevel, LogCategory
 router = APIRouter()
 
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_in: UserCreate, 
     db: Session = Depends(deps.get_db),
     request: Request = None
@@ -22,7 +25,7 @@ def register_user(
     """Register a new user with logging"""
     try:
         # Check if email already exists
-        if crud_user.get_user_by_email(db, user_in.email):
+        if await run_in_threadpool(crud_user.get_user_by_email, db, user_in.email):
             # Log failed registration attempt
             LoggingService.log_system_event(
                 db=db,
@@ -36,8 +39,9 @@ def register_user(
             )
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        # Create user
-        new_user = crud_user.create_user(db, user_in)
+        # Create user, hashing the password on the password pool
+        hashed_password = await hash_password_async(user_in.password)
+        new_user = await run_in_threadpool(crud_user.create_user, db, user_in, hashed_password)
         
         # Log successful registration
         LoggingService.log_system_event(
@@ -75,6 +79,8 @@ def register_user(
         
     except HTTPException:
         raise
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Log registration error
         LoggingService.log_system_event(
@@ -90,17 +96,20 @@ def register_user(
         raise HTTPException(status_code=500, detail="Registration failed")
 
 @router.post("/login", response_model=Dict[str, str])
-def login_user(
+async def login_user(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: Session = Depends(deps.get_db),
     request: Request = None
 ):
     """User login with comprehensive logging"""
     try:
-        user = crud_user.get_user_by_email(db, form_data.username)
+        user = await run_in_threadpool(crud_user.get_user_by_email, db, form_data.username)
         
         # Check if user exists and password is correct
-        if not user or not verify_password(form_data.password, user.password):
+        verified, new_hash = False, None
+        if user:
+            verified, new_hash = await verify_and_update_password_async(form_data.password, user.password)
+        if not verified:
             # Log failed login attempt
             LoggingService.log_system_event(
                 db=db,
@@ -118,23 +127,28 @@ def login_user(
             )
             raise HTTPException(status_code=400, detail="Invalid credentials")
         
+        # Read everything needed from the user now: the rehash below commits,
+        # which expires it, and reloading it here would block the event loop
+        claims = token_claims(user)
+        login_details = {"user_id": user.id, "email": user.email, "role_id": user.role_id}
+        
+        # Stored hash uses an outdated cost; replace it while we have the password
+        if new_hash:
+            await run_in_threadpool(crud_user.update_password_hash, db, login_details["user_id"], new_hash)
+        
         # Create access token
-        token = create_access_token({"sub": str(user.id), "role": str(user.role_id)})
+        token = create_access_token(claims)
         
         # Log successful login
         LoggingService.log_system_event(
             db=db,
             level=LogLevel.INFO,
             category=LogCategory.AUTHENTICATION,
-            message=f"User logged in successfully: {user.email}",
+            message=f"User logged in successfully: {login_details['email']}",
             module="user_service",
             function_name="login_user",
-            user_id=user.id,
-            extra_data={
-                "user_id": user.id,
-                "email": user.email,
-                "role_id": user.role_id
-            },
+            user_id=login_details["user_id"],
+            extra_data=login_details,
             request=request
         )
         
@@ -142,6 +156,8 @@ def login_user(
         
     except HTTPException:
         raise
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Log login system error
         LoggingService.log_system_event(
@@ -156,6 +172,27 @@ def login_user(
         )
         raise HTTPException(status_code=500, detail="Login failed")
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout_user(
+    token: str = Depends(deps.oauth2_scheme),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db),
+    request: Request = None
+):
+    """Revoke the bearer token used for this request"""
+    revoke_token(token)
+    
+    LoggingService.log_system_event(
+        db=db,
+        level=LogLevel.INFO,
+        category=LogCategory.AUTHENTICATION,
+        message=f"User logged out: {current_user.email}",
+        module="user_service",
+        function_name="logout_user",
+        user_id=current_user.id,
+        request=request
+    )
+
 @router.get("/me", response_model=UserOut)
 def get_me(
     current_user: User = Depends(deps.get_current_user),
@@ -178,7 +215,7 @@ def get_me(
     return current_user
 
 @router.put("/me", response_model=UserOut)
-def update_me(
+async def update_me(
     user_update: UserUpdate, 
     db: Session = Depends(deps.get_db), 
     current_user: User = Depends(deps.get_current_user),
@@ -192,8 +229,9 @@ def update_me(
             "email": current_user.email
         }
         
-        # Update user
-        updated = crud_user.update_user(db, current_user.id, user_update)
+        # Update user, hashing a new password on the password pool
+        hashed_password = await hash_password_async(user_update.password) if user_update.password else None
+        updated = await run_in_threadpool(crud_user.update_user, db, current_user.id, user_update, hashed_password)
         if not updated:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -230,6 +268,8 @@ def update_me(
         
         return updated
         
+    except PasswordPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         # Log update error
         LoggingService.log_system_event(
@@ -390,6 +430,53 @@ def update_user_role(
         )
         raise
 
+@router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_user(
+    user_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_admin_user),
+    request: Request = None
+):
+    """Delete a user and revoke its cached sessions, with logging"""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot delete your own account")
+    try:
+        target_user = crud_user.delete_user(db, user_id)
+    except IntegrityError:
+        # Audit logs and leads still reference the user
+        db.rollback()
+        raise HTTPException(status_code=409, detail="User is still referenced by other records")
+    if not target_user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Log deletion (critical security event)
+    LoggingService.log_system_event(
+        db=db,
+        level=LogLevel.WARNING,
+        category=LogCategory.SECURITY,
+        message=f"User deleted: {target_user.email} by {current_user.email}",
+        module="user_service",
+        function_name="delete_user",
+        user_id=current_user.id,
+        extra_data={
+            "target_user_id": user_id,
+            "target_email": target_user.email,
+            "deleted_by": current_user.id
+        },
+        request=request
+    )
+
+    # Log audit event
+    LoggingService.log_audit_event(
+        db=db,
+        user_id=current_user.id,
+        action="DELETE",
+        resource_type="User",
+        resource_id=str(user_id),
+        old_values={"email": target_user.email, "role_id": target_user.role_id},
+        request=request
+    )
+
 @router.get("/users", response_model=List[UserOut])
 def get_all_users(
     db: Session = Depends(deps.get_db),
@@ -0,0 +1,121 @@
+import random
+import time
+import traceback
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from app.core.config import settings
+from app.core.logging import LoggingService
+from app.core.log_context import get_log_context
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, including any router prefix"""
+    # FastAPI versions that include routers without copying their routes keep
+    # the prefixed template on the effective route context; before that the
+    # copied APIRoute's own path already carried the prefix
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    template = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return template or UNMATCHED_ROUTE
+
+
+class APIAccessLogMiddleware:
+    """Record every HTTP request in the API log.
+
+    Requests are timed with a monotonic clock and logged with their route
+    template, so ``/leads/{lead_id}`` is one endpoint rather than one per id.
+    Failed and slow requests are always kept; the rest are sampled with
+    ``ACCESS_LOG_SAMPLE_RATE``. Must run inside ``RequestLogContextMiddleware``
+    so the entry is written together with the request's other logs.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = settings.ACCESS_LOG_SAMPLE_RATE,
+        slow_ms: int = settings.ACCESS_LOG_SLOW_MS
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_size = 0
+        response_size = 0
+        status_code = 500
+        error_message: Optional[str] = None
+        stack_trace: Optional[str] = None
+
+        async def counting_receive() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message):
+            nonlocal response_size, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        except Exception as e:
+            status_code = 500
+            error_message = str(e)
+            stack_trace = traceback.format_exc()
+            raise
+        finally:
+            response_time_ms = int((time.perf_counter() - start) * 1000)
+            if self._should_log(status_code, response_time_ms):
+                self._log(scope, status_code, response_time_ms, request_size,
+                          response_size, error_message, stack_trace)
+
+    def _should_log(self, status_code: int, response_time_ms: int) -> bool:
+        if status_code >= 500 or response_time_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _log(
+        self,
+        scope: Scope,
+        status_code: int,
+        response_time_ms: int,
+        request_size: int,
+        response_size: int,
+        error_message: Optional[str],
+        stack_trace: Optional[str]
+    ):
+        context = get_log_context()
+        if context is None:
+            return
+        endpoint = _route_template(scope)
+        request = Request(scope)
+
+        LoggingService.log_api_call(
+            db=None,
+            request_id=context.request_id,
+            method=scope["method"],
+            endpoint=endpoint[:200],
+            status_code=status_code,
+            response_time_ms=response_time_ms,
+            user_id=context.user_id,
+            request_size=request_size,
+            response_size=response_size,
+            query_params=dict(request.query_params) or None,
+            error_message=error_message,
+            stack_trace=stack_trace,
+            request=request
+        )
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
@@ -5,10 +7,91 @@ from pydantic import ConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # default: DATABASE_URL with asyncpg/aiosqlite
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Database connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # PostgreSQL only; 0 disables
+    DB_PGBOUNCER: bool = False  # PgBouncer transaction pooling: no local pool, no prepared statements
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # raising it rehashes passwords at their next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hash/verify calls queued or running
+
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_INVALIDATION_SYNC_SECONDS: float = 5.0  # drop principals changed by other processes
+    AUTH_STATELESS_CLAIMS: bool = False  # trust role/team claims in the token, no lookup
+    TOKEN_CACHE_SIZE: int = 10000  # verified JWTs kept until they expire; 0 disables
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0  # reload logouts made by other processes
+
+    # Background jobs (durable, in the jobs table)
+    JOBS_ENABLED: bool = True  # off: LINE webhooks are processed inline
+    JOB_WORKERS: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5  # then the job moves to dead_letter_jobs
+    JOB_RETRY_BACKOFF_SECONDS: float = 2.0  # doubled after every failed attempt
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 300.0
+    JOB_LOCK_TIMEOUT_SECONDS: float = 300.0  # running jobs not refreshed for this long are taken over
+
+    # Live LINE message feed
+    PUBSUB_REDIS_URL: Optional[str] = None  # fan out across worker processes; needs the redis package
+    PUBSUB_CHANNEL_PREFIX: str = "crm:"
+    PUBSUB_SUBSCRIBER_QUEUE_SIZE: int = 1000  # per stream; the oldest message is dropped when full
+    LINE_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # Write-behind log pipeline
+    LOG_PIPELINE_ENABLED: bool = True
+    LOG_QUEUE_MAX_SIZE: int = 10000
+    LOG_FLUSH_BATCH_SIZE: int = 500
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOG_BACKPRESSURE: str = "drop_debug"  # block, drop_debug or spill
+    LOG_BLOCK_TIMEOUT_SECONDS: float = 5.0
+    LOG_SPILL_PATH: str = "log_spill.jsonl"
+
+    # API access log
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_MS: int = 1000
+
+    # Log rollups
+    LOG_ROLLUPS_ENABLED: bool = True
+    LOG_ROLLUP_INTERVAL_SECONDS: float = 60.0
+    LOG_ROLLUP_BATCH_SIZE: int = 50000
+    LOG_ROLLUP_SETTLE_SECONDS: int = 30
+
+    # Log retention
+    LOG_RETENTION_SYSTEM_DAYS: int = 30
+    LOG_RETENTION_AUDIT_DAYS: int = 365
+    LOG_RETENTION_API_DAYS: int = 30
+    LOG_RETENTION_BATCH_SIZE: int = 5000
+    LOG_RETENTION_PAUSE_SECONDS: float = 0.1
+    LOG_RETENTION_INTERVAL_SECONDS: float = 0  # 0 disables the scheduled purge
+    LOG_RETENTION_STALE_SECONDS: float = 600.0  # an active purge not saved for this long is taken over
+
+    # Bulk log ingestion
+    LOG_BULK_MAX_ENTRIES: int = 5000
+    LOG_BULK_CHUNK_SIZE: int = 1000  # rows per INSERT for NDJSON uploads
+    LOG_BULK_MAX_LINE_BYTES: int = 1048576  # longer NDJSON lines are rejected unread
+
+    # Lead counters
+    LEAD_COUNTERS_ENABLED: bool = True
+    LEAD_COUNTER_RECONCILE_SECONDS: float = 3600.0
+
+    # Log table partitioning
+    LOG_PARTITIONING: str = "none"  # none, daily or monthly
+    LOG_PARTITION_PREMAKE: int = 3
+    LOG_PARTITION_INTERVAL_SECONDS: float = 3600.0
+
     model_config = ConfigDict(env_file=".env")
 
 settings = Settings()
@@ -1,7 +1,62 @@
+from typing import Any, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.db_pool import PoolMetrics, engine_options, pool_stats, track_connection_hold_time
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, pool_metrics))
+track_connection_hold_time(engine, pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Async drivers used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+# Rows stay readable after commit: lazy refreshes cannot run outside the
+# session's greenlet
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+_async_engine: Optional[AsyncEngine] = None
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its sync driver swapped for the matching async one"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use, so sync-only deployments need no async driver"""
+    global _async_engine
+    if _async_engine is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, async_pool_metrics, is_async=True))
+        track_connection_hold_time(_async_engine.sync_engine, async_pool_metrics)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+def database_pool_stats() -> Dict[str, Any]:
+    """Pool occupancy and checkout metrics of the sync engine and, once created, the async one"""
+    stats = {"sync": pool_stats(engine, pool_metrics)}
+    if _async_engine is not None:
+        stats["async"] = pool_stats(_async_engine.sync_engine, async_pool_metrics)
+    return stats
@@ -0,0 +1,149 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import settings
+
+# Upper bounds (ms) of the checkout latency histogram buckets; the last bucket
+# collects everything slower
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout latency, timeouts and connection hold times of one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.histogram = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self.checkins = 0
+        self.held_total_ms = 0.0
+        self.held_max_ms = 0.0
+
+    def observe_wait(self, waited_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.histogram[bisect_left(CHECKOUT_BUCKETS_MS, waited_ms)] += 1
+            self.wait_total_ms += waited_ms
+            self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+
+    def observe_held(self, held_ms: float):
+        with self._lock:
+            self.checkins += 1
+            self.held_total_ms += held_ms
+            self.held_max_ms = max(self.held_max_ms, held_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            labels = [f"le_{bound}ms" for bound in CHECKOUT_BUCKETS_MS] + ["inf"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total_ms / attempts, 3) if attempts else None,
+                "max_wait_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": dict(zip(labels, self.histogram)),
+                "avg_held_ms": round(self.held_total_ms / self.checkins, 3) if self.checkins else None,
+                "max_held_ms": round(self.held_max_ms, 3),
+            }
+
+
+def instrumented_pool(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """Subclass of ``pool_class`` that times how long checkouts wait for a connection"""
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe_wait((time.perf_counter() - started) * 1000, timed_out=True)
+                raise
+            metrics.observe_wait((time.perf_counter() - started) * 1000)
+            return connection
+
+    InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{pool_class.__name__}"
+    # Keep the pool's log records under the "sqlalchemy.pool" logger hierarchy
+    InstrumentedPool.__module__ = pool_class.__module__
+    return InstrumentedPool
+
+
+def engine_options(url: str, metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """``create_engine`` keyword arguments for the pool settings"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: Dict[str, Any] = {}
+    connect_args: Dict[str, Any] = {}
+
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pooling; keeping idle connections here would pin
+        # server connections it could hand to other clients
+        options["poolclass"] = instrumented_pool(NullPool, metrics)
+        if is_async:
+            # Transaction pooling cannot follow named prepared statements across server connections
+            connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+    elif backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        pass  # one shared in-memory connection, nothing to size
+    else:
+        base = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            poolclass=instrumented_pool(base, metrics),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+
+    # PgBouncer rejects startup options; set the timeout on the database role instead
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def track_connection_hold_time(engine: Engine, metrics: PoolMetrics):
+    """Record how long each checked-out connection is kept before its checkin"""
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            metrics.observe_held((time.perf_counter() - checked_out_at) * 1000)
+
+
+def pool_stats(engine: Engine, metrics: PoolMetrics) -> Dict[str, Any]:
+    """Current pool occupancy together with its checkout metrics"""
+    pool = engine.pool
+    occupancy: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        occupancy.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeout_seconds=pool.timeout(),
+        )
+    return {**occupancy, **metrics.stats()}
@@ -0,0 +1,197 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.job import enqueue_jobs, claim_jobs, complete_job, fail_job, touch_jobs
+
+logger = logging.getLogger(__name__)
+
+# Queue name -> function(db, payload) doing the work of one job
+JOB_HANDLERS: Dict[str, Callable[[Session, Any], None]] = {}
+
+
+def register_job_handler(queue: str, handler: Callable[[Session, Any], None]):
+    JOB_HANDLERS[queue] = handler
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff after the ``attempts``-th failed try"""
+    return min(settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_BACKOFF_MAX_SECONDS)
+
+
+class JobWorkerPool:
+    """Run jobs from the ``jobs`` table on a pool of worker threads.
+
+    A dispatcher thread claims due jobs whenever a worker is free, woken by
+    ``notify`` after an enqueue or every poll interval. Jobs of the same
+    ordering key run one after another; different keys run in parallel.
+
+    While a job runs its lock is refreshed every third of the lock timeout,
+    so only jobs of a dead worker are taken over. A claim is identified by
+    the job's attempt count: a worker that lost its claim anyway cannot
+    complete or fail the job under the new owner.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.JOB_WORKERS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        lock_timeout: float = settings.JOB_LOCK_TIMEOUT_SECONDS,
+        session_factory=SessionLocal
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lock_timeout = lock_timeout
+        self.session_factory = session_factory
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._claims: Dict[int, int] = {}  # running job id -> attempts of our claim
+        self._heartbeat = PeriodicWorker("job-heartbeat", lock_timeout / 3, self._touch_claims)
+        self._stats = {
+            "claimed": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "lost": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+        self._thread.start()
+        self._heartbeat.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Stop claiming jobs and wait for the running ones; queued jobs stay in the table"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._heartbeat.stop()
+
+    def notify(self):
+        """Look for new jobs now instead of at the next poll"""
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": self._in_flight,
+                "workers": self.workers,
+                "running": self.running,
+            }
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            claimed = 0
+            with self._lock:
+                free = self.workers - self._in_flight
+            if free > 0 and JOB_HANDLERS:
+                try:
+                    claimed = self._dispatch(free)
+                except Exception as e:
+                    logger.error(f"Claiming jobs failed: {str(e)}")
+            # With every worker busy, or fewer due jobs than free workers, sleep
+            # until a job finishes, a new one is enqueued or the poll interval ends
+            if free <= 0 or claimed < free:
+                self._wake.wait(self.poll_interval)
+
+    def _dispatch(self, limit: int) -> int:
+        db = self.session_factory()
+        try:
+            jobs = claim_jobs(db, list(JOB_HANDLERS), limit, self.lock_timeout)
+            claimed = [(job.id, job.queue, job.payload, job.attempts) for job in jobs]
+        finally:
+            db.close()
+        with self._lock:
+            self._in_flight += len(claimed)
+            self._stats["claimed"] += len(claimed)
+            self._claims.update((job_id, attempts) for job_id, _, _, attempts in claimed)
+        for job in claimed:
+            self._executor.submit(self._execute, *job)
+        return len(claimed)
+
+    def _execute(self, job_id: int, queue: str, payload: Any, attempts: int):
+        db = self.session_factory()
+        try:
+            JOB_HANDLERS[queue](db, payload)
+            outcome = "succeeded" if complete_job(db, job_id, attempts) else "lost"
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Job {job_id} on {queue} failed (attempt {attempts}): {str(e)}")
+            try:
+                outcome = fail_job(db, job_id, attempts, str(e), self.max_attempts, retry_delay(attempts))
+            except Exception as record_error:
+                # The lock timeout hands the job to a worker again
+                logger.error(f"Could not record failure of job {job_id}: {str(record_error)}")
+                outcome = "retried"
+        finally:
+            db.close()
+        if outcome == "lost":
+            logger.warning(f"Job {job_id} on {queue} was taken over by another worker (attempt {attempts})")
+        with self._lock:
+            self._in_flight -= 1
+            self._stats[outcome] += 1
+            self._claims.pop(job_id, None)
+        # A finished job may unblock the next one of its ordering key
+        self._wake.set()
+
+    def _touch_claims(self):
+        with self._lock:
+            claims = dict(self._claims)
+        if not claims:
+            return
+        db = self.session_factory()
+        try:
+            held = touch_jobs(db, claims)
+        finally:
+            db.close()
+        if held < len(claims):
+            logger.warning(f"{len(claims) - held} running job(s) were taken over by another worker")
+
+
+job_pool = JobWorkerPool() if settings.JOBS_ENABLED else None
+
+
+def enqueue(db: Session, queue: str, jobs: Iterable[Tuple[Optional[str], Any]]) -> int:
+    """Store ``(ordering_key, payload)`` jobs durably and wake the worker pool"""
+    count = enqueue_jobs(db, queue, jobs)
+    if count and job_pool is not None:
+        job_pool.notify()
+    return count
+
+
+def start_job_workers():
+    if job_pool is not None:
+        job_pool.start()
+
+
+def stop_job_workers():
+    if job_pool is not None:
+        job_pool.stop()
@@ -1,6 +1,91 @@
+import hashlib
+import threading
+import time
 from datetime import datetime, timedelta
-from jose import jwt
+from typing import Any, Dict, Optional
+
+from jose import jwt, JWTError
+from starlette.concurrency import run_in_threadpool
+from app.core.background import PeriodicWorker
+from app.core.cache import TTLCache, register_cache
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.token import (
+    get_active_revocations, get_revoked_token, purge_expired_revocations, save_revoked_token
+)
+
+# Verified payloads keyed by token digest, each expiring with its token
+token_cache = register_cache(
+    "tokens", TTLCache(settings.TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+)
+
+
+class RevocationList:
+    """Tokens logged out before their expiry.
+
+    The ``revoked_tokens`` table is the source of truth and is shared by every
+    process. Each process keeps a copy in memory, checked on every decode and
+    reloaded by ``sync``; a token seen for the first time is also looked up in
+    the table, so a logout elsewhere only goes unnoticed for tokens already
+    cached here, and only until the next sync.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._expiry: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest: str) -> bool:
+        expires_at = self._expiry.get(digest)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def is_revoked(self, digest: str) -> bool:
+        """Check the local copy, then the table"""
+        if digest in self:
+            return True
+        with self.session_factory() as db:
+            row = get_revoked_token(db, digest)
+        if row is None or row.expires_at <= datetime.utcnow():
+            return False
+        with self._lock:
+            self._expiry[digest] = row.expires_at
+        return True
+
+    def revoke(self, digest: str, user_id: Optional[int], expires_at: datetime):
+        with self.session_factory() as db:
+            save_revoked_token(db, digest, user_id, expires_at)
+        with self._lock:
+            self._expiry[digest] = expires_at
+
+    def sync(self) -> int:
+        """Reload unexpired revocations from the table and delete expired rows"""
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            active = get_active_revocations(db, now)
+            purge_expired_revocations(db, now)
+        with self._lock:
+            self._expiry = active
+        return len(active)
+
+
+revocations = RevocationList()
+
+revocation_sync_worker = PeriodicWorker(
+    "token-revocations", settings.TOKEN_REVOCATION_SYNC_SECONDS, revocations.sync
+)
+
+
+def start_token_revocations():
+    revocations.sync()
+    revocation_sync_worker.start()
+
+
+def stop_token_revocations():
+    revocation_sync_worker.stop()
+
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -8,5 +93,69 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-def decode_token(token: str):
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _remaining_lifetime(payload: Dict[str, Any]) -> float:
+    exp = payload.get("exp")
+    if exp is None:
+        return token_cache.ttl
+    return min(float(exp) - time.time(), token_cache.ttl)
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Check the signature and claims of a token, bypassing the cache"""
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Verified payload of a token, served from the cache until the token expires"""
+    digest = token_digest(token)
+    if digest in revocations:
+        raise JWTError("Token has been revoked")
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = verify_token(token)
+        if revocations.is_revoked(digest):
+            raise JWTError("Token has been revoked")
+        lifetime = _remaining_lifetime(payload)
+        if lifetime > 0:
+            token_cache.set(digest, payload, ttl=lifetime)
+    # Callers get their own copy so they cannot alter the cached entry
+    return dict(payload)
+
+
+async def decode_token_async(token: str) -> Dict[str, Any]:
+    """decode_token for async callers: a cached token is served in place, only
+    the verification and revocation lookup of a new one run in the threadpool"""
+    digest = token_digest(token)
+    if digest in revocations:
+        raise JWTError("Token has been revoked")
+    payload = token_cache.get(digest)
+    if payload is None:
+        return await run_in_threadpool(decode_token, token)
+    return dict(payload)
+
+
+def revoke_token(token: str):
+    """Reject a token in every process from now until it expires, e.g. on logout"""
+    digest = token_digest(token)
+    token_cache.delete(digest)
+    try:
+        payload = verify_token(token)
+    except JWTError:
+        return  # already expired or invalid
+    if "exp" in payload:
+        expires_at = datetime.utcfromtimestamp(float(payload["exp"]))
+    else:
+        expires_at = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    subject = payload.get("sub")
+    revocations.revoke(digest, int(subject) if subject is not None else None, expires_at)
+
+
+def evict_user_tokens(user_id: int) -> int:
+    """Drop cached payloads of a user's tokens so they are verified again"""
+    subject = str(user_id)
+    return token_cache.delete_where(lambda digest, payload: payload.get("sub") == subject)
@@ -0,0 +1,40 @@
+import logging
+
+from sqlalchemy.engine import Engine
+
+from app.core.background import PeriodicWorker
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.crud.lead import reconcile_lead_counters
+
+logger = logging.getLogger(__name__)
+
+
+def run_lead_counter_reconcile(bind: Engine = engine) -> int:
+    """Correct any drift between the lead counters and the lead table"""
+    db = SessionLocal(bind=bind)
+    try:
+        drifted = reconcile_lead_counters(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if drifted:
+        logger.warning(f"Lead counters reconciled: {drifted} key(s) had drifted")
+    return drifted
+
+
+lead_counter_worker = PeriodicWorker(
+    "lead-counters", settings.LEAD_COUNTER_RECONCILE_SECONDS, run_lead_counter_reconcile
+) if settings.LEAD_COUNTERS_ENABLED else None
+
+
+def start_lead_counters():
+    if lead_counter_worker is not None:
+        lead_counter_worker.start()
+
+
+def stop_lead_counters():
+    if lead_counter_worker is not None:
+        lead_counter_worker.stop()
@@ -0,0 +1,149 @@
+import logging
+from typing import Optional, Tuple, Any, List
+
+from sqlalchemy import inspect, text, func, case, or_, and_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query
+
+from app.core.database import engine
+from app.models.lead import Lead, normalize_text, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+SEARCH_KEYS = ("name_normalized", "email_normalized", "phone_digits")
+BACKFILL_BATCH_SIZE = 1000
+MIN_PHONE_DIGITS = 3  # shorter digit runs would match almost every phone
+
+# True once PostgreSQL trigram indexes back substring search. Set by
+# ensure_lead_search().
+trigram_available = False
+
+
+def _add_missing_columns(conn, bind: Engine):
+    existing = {column["name"] for column in inspect(conn).get_columns(Lead.__tablename__)}
+    for name in SEARCH_KEYS:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {Lead.__tablename__} ADD COLUMN {name} VARCHAR"))
+        if bind.dialect.name == "postgresql":
+            # text_pattern_ops lets LIKE 'prefix%' use the index under any collation
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_lead_{name}_pattern "
+                f"ON {Lead.__tablename__} ({name} text_pattern_ops)"
+            ))
+        else:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_lead_{name} ON {Lead.__tablename__} ({name})"))
+
+
+def _ensure_trigram_indexes(bind: Engine) -> bool:
+    try:
+        with bind.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for name in SEARCH_KEYS:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_lead_{name}_trgm "
+                    f"ON {Lead.__tablename__} USING GIN ({name} gin_trgm_ops)"
+                ))
+    except DBAPIError as e:
+        logger.warning(f"Trigram lead search unavailable: {str(e)}")
+        return False
+    return True
+
+
+def _missing_search_keys(table):
+    """Rows with a name, email or phone whose search key was never filled"""
+    return or_(
+        and_(table.c.name.is_not(None), table.c.name_normalized.is_(None)),
+        and_(table.c.email.is_not(None), table.c.email_normalized.is_(None)),
+        and_(table.c.phone.is_not(None), table.c.phone_digits.is_(None)),
+    )
+
+
+def backfill_search_keys(bind: Engine = engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Fill search keys of leads written before they existed"""
+    table = Lead.__table__
+    filled = 0
+    last_id = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.name, table.c.email, table.c.phone)
+                .where(table.c.id > last_id)
+                .where(_missing_search_keys(table))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            for row in rows:
+                conn.execute(update(table).where(table.c.id == row.id).values(
+                    name_normalized=normalize_text(row.name),
+                    email_normalized=normalize_text(row.email),
+                    phone_digits=normalize_phone(row.phone),
+                ))
+        if not rows:
+            return filled
+        filled += len(rows)
+        last_id = rows[-1].id
+
+
+def ensure_lead_search(bind: Engine = engine) -> bool:
+    """Add and index the lead search keys; idempotent, safe at every startup"""
+    global trigram_available
+    if not inspect(bind).has_table(Lead.__tablename__):
+        return False
+    with bind.begin() as conn:
+        _add_missing_columns(conn, bind)
+        # Not only right after adding the columns: a backfill interrupted by a
+        # crash, or rows written around the ORM, leave keys to fill as well
+        table = Lead.__table__
+        pending = conn.execute(select(table.c.id).where(_missing_search_keys(table)).limit(1)).first()
+    if bind.dialect.name == "postgresql":
+        trigram_available = _ensure_trigram_indexes(bind)
+    if pending is not None:
+        backfill_search_keys(bind)
+    return trigram_available
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _prefix(column, value: str, dialect: str):
+    if dialect == "postgresql":
+        return column.like(f"{_escape_like(value)}%", escape="\\")
+    # A plain range comparison is answered from the b-tree index everywhere
+    return and_(column >= value, column < value + "\U0010ffff")
+
+
+def apply_lead_search(query: Query, search: str, mode: str = "contains") -> Tuple[Query, Optional[Any]]:
+    """Filter leads by name, email or phone and return a relevance expression.
+
+    ``prefix`` matches the start of the normalized values through their b-tree
+    indexes. ``contains`` keeps the original substring semantics; on PostgreSQL
+    it is served by trigram indexes and ranked by similarity, elsewhere ranked
+    exact > prefix > substring.
+    """
+    term = normalize_text(search)
+    if not term:
+        return query, None
+    digits = normalize_phone(search)
+    dialect = query.session.bind.dialect.name
+
+    keys: List[Tuple[Any, str]] = [(Lead.name_normalized, term), (Lead.email_normalized, term)]
+    if digits and len(digits) >= MIN_PHONE_DIGITS:
+        keys.append((Lead.phone_digits, digits))
+
+    prefix_matches = or_(*(_prefix(column, value, dialect) for column, value in keys))
+    if mode == "prefix":
+        matches = prefix_matches
+    else:
+        matches = or_(*(column.like(f"%{_escape_like(value)}%", escape="\\") for column, value in keys))
+
+    if trigram_available:
+        rank = func.greatest(*(func.similarity(column, value) for column, value in keys))
+    else:
+        rank = case(
+            (or_(*(column == value for column, value in keys)), 3),
+            (prefix_matches, 2),
+            else_=1
+        )
+    return query.filter(matches), rank
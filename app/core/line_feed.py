@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Union
+
+from app.core.pubsub import broker
+from app.models.line import LineMessage
+from app.schemas.line import LineMessageOut
+
+LINE_MESSAGES_CHANNEL = "line_messages"
+
+
+def _feed_message(message: Union[LineMessage, Dict[str, Any]]) -> Dict[str, Any]:
+    """JSON-ready LineMessageOut fields of a stored message (model or row)"""
+    row = message if isinstance(message, dict) else {
+        column.key: getattr(message, column.key) for column in LineMessage.__table__.columns
+    }
+    payload = {field: row.get(field) for field in LineMessageOut.model_fields}
+    if isinstance(payload["timestamp"], datetime):
+        payload["timestamp"] = payload["timestamp"].isoformat()
+    return payload
+
+
+def publish_line_messages(messages: Iterable[Union[LineMessage, Dict[str, Any]]]) -> None:
+    """Push newly stored messages to the live feed, after they are committed"""
+    for message in messages:
+        payload = _feed_message(message)
+        broker.publish(LINE_MESSAGES_CHANNEL, {"event": "message", "user_id": payload["user_id"], "message": payload})
+
+
+async def publish_line_read(user_id: str, unread_count: int) -> None:
+    """Tell other agents a conversation was read so their unread badges update"""
+    await broker.publish_async(LINE_MESSAGES_CHANNEL, {"event": "read", "user_id": user_id, "unread_count": unread_count})
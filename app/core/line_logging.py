@@ -135,6 +135,34 @@ class LineLoggingService:
             request=request
         )
     
+    @staticmethod
+    def log_line_webhook_delivery(
+        db: Session,
+        delivery: Any,
+        summary: Dict[str, Any],
+        request: Optional[Request] = None
+    ):
+        """Log a whole webhook delivery as a single entry instead of one per event"""
+        extra_data = {
+            **summary,
+            "destination": delivery.destination,
+            "line_user_ids": sorted({
+                event.source.user_id for event in delivery.events if event.source and event.source.user_id
+            })[:100],
+            "platform": "LINE"
+        }
+        
+        return LoggingService.log_system_event(
+            db=db,
+            level=LogLevel.INFO,
+            category=LogCategory.CHAT_EVENT,
+            message=f"LINE webhook delivery: {summary['events']} event(s), {summary['messages_stored']} message(s) stored",
+            module="line_webhook",
+            function_name="process_webhook",
+            extra_data=extra_data,
+            request=request
+        )
+    
     @staticmethod
     def log_line_user_interaction(
         db: Session,
@@ -0,0 +1,114 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.jobs import enqueue, register_job_handler
+from app.core.line_feed import publish_line_messages
+from app.core.line_logging import LineLoggingService
+from app.core.log_context import log_batch
+from app.crud.line import create_line_messages_bulk
+from app.schemas.line import LineWebhookDelivery, LineWebhookEvent
+
+
+def message_row(event: LineWebhookEvent) -> Dict[str, Any]:
+    """line_message row for a webhook message event"""
+    message = event.message
+    return {
+        "user_id": event.source.user_id if event.source else None,
+        "message_text": message.text or "",
+        "message_type": message.type,
+        "sticker_id": message.sticker_id,
+        "reply_token": event.reply_token,
+        "timestamp": datetime.utcfromtimestamp(event.timestamp / 1000),
+        "is_read": False,
+        "webhook_event_id": event.webhook_event_id,
+    }
+
+
+# Events about a chat's membership, each logged on its own next to the
+# delivery summary; messages are only counted there
+INTERACTION_EVENTS = ("follow", "unfollow", "join", "leave")
+
+
+def process_delivery(db: Session, delivery: LineWebhookDelivery) -> Dict[str, Any]:
+    """Store every message of a delivery in one INSERT and log the delivery once.
+
+    Events repeated within the delivery or already stored by an earlier
+    (re)delivery are counted as duplicates and not stored again. Follow,
+    unfollow, join and leave events also get an entry each.
+    """
+    rows: List[Dict[str, Any]] = []
+    seen = set()
+    duplicates = 0
+    for event in delivery.events:
+        if event.type != "message" or event.message is None:
+            continue
+        if event.webhook_event_id:
+            if event.webhook_event_id in seen:
+                duplicates += 1
+                continue
+            seen.add(event.webhook_event_id)
+        rows.append(message_row(event))
+
+    created = create_line_messages_bulk(db, rows)
+    summary = {
+        "events": len(delivery.events),
+        "event_types": dict(Counter(event.type for event in delivery.events)),
+        "messages_stored": len(created),
+        "duplicates": duplicates + len(rows) - len(created),
+        "redeliveries": sum(
+            1 for event in delivery.events if event.delivery_context and event.delivery_context.is_redelivery
+        ),
+    }
+    for event in delivery.events:
+        if event.type in INTERACTION_EVENTS:
+            source = event.source
+            LineLoggingService.log_line_webhook_event(
+                db=db,
+                event_type=event.type,
+                # join and leave come from a group or room rather than a user
+                line_user_id=(source.user_id or source.group_id or source.room_id) if source else "unknown",
+                event_data=event.model_dump(by_alias=True, exclude_none=True)
+            )
+    LineLoggingService.log_line_webhook_delivery(db, delivery, summary)
+    publish_line_messages(created)
+    return {**summary, "messages": created}
+
+
+JOB_QUEUE = "line_webhook"
+
+
+def ordering_key(event: LineWebhookEvent) -> Optional[str]:
+    """Events of one LINE chat (user, group or room) are processed in order"""
+    source = event.source
+    if source is None:
+        return None
+    chat_id = source.user_id or source.group_id or source.room_id
+    return f"line:{chat_id}" if chat_id else None
+
+
+def enqueue_delivery(db: Session, delivery: LineWebhookDelivery) -> int:
+    """Split a delivery into one job per chat and store them; returns the job count.
+
+    Each job keeps its chat's events in delivery order, so a chat is still
+    stored with one INSERT per delivery while different chats run in parallel.
+    """
+    groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for event in delivery.events:
+        groups.setdefault(ordering_key(event), []).append(event.model_dump(by_alias=True, exclude_none=True))
+    return enqueue(db, JOB_QUEUE, [
+        (key, {"destination": delivery.destination, "events": events})
+        for key, events in groups.items()
+    ])
+
+
+def _process_job(db: Session, payload: Dict[str, Any]):
+    # Outside a request nothing buffers log calls: collect the event entries
+    # and the summary so they are written together
+    with log_batch():
+        process_delivery(db, LineWebhookDelivery.model_validate(payload))
+
+
+register_job_handler(JOB_QUEUE, _process_job)
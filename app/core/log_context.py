@@ -0,0 +1,127 @@
+import logging
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from app.core.database import engine
+from app.core.log_pipeline import log_pipeline
+from app.crud.log import insert_log_rows
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "x-request-id"
+
+_current_log_context: ContextVar[Optional["RequestLogContext"]] = ContextVar(
+    "request_log_context", default=None
+)
+
+
+class RequestLogContext:
+    """Log entries collected while a single request is being handled"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.user_id: Optional[int] = None
+        self.entries: List[Tuple[str, Dict[str, Any]]] = []
+
+    def add(self, kind: str, row: Dict[str, Any]):
+        if kind in ("system", "api") and not row.get("request_id"):
+            row["request_id"] = self.request_id
+        self.entries.append((kind, row))
+
+
+def get_log_context() -> Optional[RequestLogContext]:
+    """Return the log context of the request being handled, if any"""
+    return _current_log_context.get()
+
+
+def set_request_user(user_id: Optional[int]):
+    """Record the authenticated user of the current request"""
+    context = _current_log_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+def _write_entries(entries: List[Tuple[str, Dict[str, Any]]]):
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for kind, row in entries:
+        grouped.setdefault(kind, []).append(row)
+    with engine.begin() as conn:
+        for kind, rows in grouped.items():
+            insert_log_rows(conn, kind, rows)
+
+
+async def flush_log_context(context: RequestLogContext):
+    """Persist everything a request logged, in order, as a single write"""
+    entries, context.entries = context.entries, []
+    if not entries:
+        return
+    if log_pipeline is not None and log_pipeline.running:
+        log_pipeline.submit_many(entries)
+        return
+    try:
+        await run_in_threadpool(_write_entries, entries)
+    except Exception as e:
+        logger.error(f"Failed to write {len(entries)} request log entries: {str(e)}")
+
+
+@contextmanager
+def log_batch(request_id: Optional[str] = None) -> Iterator[RequestLogContext]:
+    """Collect the log calls of work done outside a request, e.g. a background
+    job, and persist them together as a single write when the block ends"""
+    context = RequestLogContext(request_id or uuid.uuid4().hex)
+    token = _current_log_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_log_context.reset(token)
+        entries, context.entries = context.entries, []
+        if entries and log_pipeline is not None and log_pipeline.running:
+            log_pipeline.submit_many(entries)
+        elif entries:
+            try:
+                _write_entries(entries)
+            except Exception as e:
+                logger.error(f"Failed to write {len(entries)} batched log entries: {str(e)}")
+
+
+class RequestLogContextMiddleware:
+    """Give every HTTP request a log buffer and a shared request id.
+
+    Log calls made while the request is handled are collected in the buffer
+    and written once the response has been sent. The request id is taken
+    from the ``X-Request-ID`` header when present and echoed back.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name.decode("latin-1").lower() == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:100]
+                break
+        context = RequestLogContext(request_id or uuid.uuid4().hex)
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode("latin-1"), context.request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_log_context.set(context)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _current_log_context.reset(token)
+            await flush_log_context(context)
@@ -0,0 +1,196 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+
+from sqlalchemy import Integer, BigInteger, DateTime
+
+from app.core.database import SessionLocal
+from app.crud.log import LOG_TABLES, iter_log_export_page
+
+EXPORT_PAGE_SIZE = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _plain(value: Any) -> Any:
+    """Convert a column value into something JSON/CSV/Arrow can hold"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_log_pages(
+    log_type: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    page_size: int = EXPORT_PAGE_SIZE
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of log rows, each read in its own short transaction"""
+    after_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            page = [dict(row) for row in iter_log_export_page(
+                db, log_type, after_id=after_id, limit=page_size,
+                start_date=start_date, end_date=end_date
+            )]
+        finally:
+            db.close()
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+
+def encode_ndjson(pages: Iterable[List[Dict[str, Any]]], columns: List[str]) -> Iterator[bytes]:
+    for page in pages:
+        yield "".join(
+            json.dumps({c: _plain(row[c]) for c in columns}, default=str) + "\n" for row in page
+        ).encode("utf-8")
+
+
+def encode_json(pages: Iterable[List[Dict[str, Any]]], columns: List[str]) -> Iterator[bytes]:
+    """Stream a JSON array without building it in memory"""
+    yield b"["
+    first = True
+    for page in pages:
+        parts = []
+        for row in page:
+            parts.append(("" if first else ",") + json.dumps({c: _plain(row[c]) for c in columns}, default=str))
+            first = False
+        yield "".join(parts).encode("utf-8")
+    yield b"]"
+
+
+def encode_csv(pages: Iterable[List[Dict[str, Any]]], columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for page in pages:
+        for row in page:
+            values = []
+            for column in columns:
+                value = _plain(row[column])
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value, default=str)
+                values.append(value)
+            writer.writerow(values)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents can be drained as they arrive"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def encode_parquet(pages: Iterable[List[Dict[str, Any]]], log_type: str) -> Iterator[bytes]:
+    """Write one Parquet row group per page and stream it out"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = LOG_TABLES[log_type]
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, (Integer, BigInteger)):
+            fields.append(pa.field(column.name, pa.int64()))
+        elif isinstance(column.type, DateTime):
+            fields.append(pa.field(column.name, pa.timestamp("us")))
+        else:
+            fields.append(pa.field(column.name, pa.string()))
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for page in pages:
+            data = {}
+            for field in schema:
+                values = [row[field.name] for row in page]
+                if pa.types.is_string(field.type):
+                    values = [
+                        None if v is None
+                        else json.dumps(v, default=str) if isinstance(v, (dict, list))
+                        else str(_plain(v))
+                        for v in values
+                    ]
+                data[field.name] = values
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_log_export(
+    log_type: str,
+    export_format: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    compress: bool = False
+) -> Iterator[bytes]:
+    """Encode the selected logs incrementally in the requested format"""
+    columns = [column.name for column in LOG_TABLES[log_type].columns]
+    pages = iter_log_pages(log_type, start_date, end_date)
+    if export_format == "csv":
+        body = encode_csv(pages, columns)
+    elif export_format == "ndjson":
+        body = encode_ndjson(pages, columns)
+    elif export_format == "parquet":
+        body = encode_parquet(pages, log_type)
+    else:
+        body = encode_json(pages, columns)
+    return gzip_stream(body) if compress else body
@@ -0,0 +1,101 @@
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import engine
+from app.crud.log import insert_log_rows
+from app.schemas.log import SystemLogCreate, AuditLogCreate, APILogCreate
+
+LOG_CREATE_SCHEMAS = {
+    "system": SystemLogCreate,
+    "audit": AuditLogCreate,
+    "api": APILogCreate,
+}
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _insert_chunk(log_type: str, entries: List[BaseModel]) -> int:
+    with engine.begin() as conn:
+        insert_log_rows(conn, log_type, [entry.dict() for entry in entries])
+    return len(entries)
+
+
+async def ingest_ndjson(
+    log_type: str,
+    body: AsyncIterator[bytes],
+    chunk_size: int = settings.LOG_BULK_CHUNK_SIZE,
+    max_line_bytes: int = settings.LOG_BULK_MAX_LINE_BYTES
+) -> Dict[str, Any]:
+    """Validate and insert newline-delimited JSON log entries as they arrive.
+
+    The body is never held in memory as a whole: valid entries are written in
+    multi-row INSERTs of ``chunk_size`` rows, each in its own transaction.
+    Invalid lines are skipped and reported by line number; so are lines
+    longer than ``max_line_bytes``, whose bytes are discarded as they arrive.
+    """
+    schema = LOG_CREATE_SCHEMAS[log_type]
+    pending: List[BaseModel] = []
+    errors: List[Dict[str, Any]] = []
+    inserted = 0
+    rejected = 0
+    line_number = 0
+
+    def reject(error: str):
+        nonlocal rejected
+        rejected += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "error": error})
+
+    async def handle(line: Optional[bytes]):
+        """Process one complete line; None stands for a line that was too long"""
+        nonlocal inserted, line_number, pending
+        line_number += 1
+        if line is None:
+            reject(f"Line longer than {max_line_bytes} bytes")
+            return
+        line = line.strip()
+        if not line:
+            return
+        try:
+            pending.append(schema.model_validate_json(line))
+        except ValidationError as e:
+            reject(str(e))
+            return
+        if len(pending) >= chunk_size:
+            batch, pending = pending, []
+            inserted += await run_in_threadpool(_insert_chunk, log_type, batch)
+
+    # Bytes of the current line so far; each chunk is scanned for newlines once
+    buffer = bytearray()
+    too_long = False
+    async for data in body:
+        start = 0
+        while True:
+            end = data.find(b"\n", start)
+            if end < 0:
+                break
+            if too_long or len(buffer) + end - start > max_line_bytes:
+                await handle(None)
+            else:
+                buffer += data[start:end]
+                await handle(bytes(buffer))
+            buffer.clear()
+            too_long = False
+            start = end + 1
+        if not too_long:
+            if len(buffer) + len(data) - start > max_line_bytes:
+                buffer.clear()
+                too_long = True
+            else:
+                buffer += data[start:]
+    if too_long:
+        await handle(None)
+    elif buffer:
+        await handle(bytes(buffer))
+    if pending:
+        inserted += await run_in_threadpool(_insert_chunk, log_type, pending)
+
+    return {"inserted": inserted, "rejected": rejected, "errors": errors}
@@ -0,0 +1,264 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Tuple
+
+from sqlalchemy import Column, MetaData, Table, and_, delete, inspect, insert, select, text
+from sqlalchemy.engine import Engine
+
+from app.core.background import PeriodicWorker
+from app.core.config import settings
+from app.core.database import engine
+from app.core.log_retention import default_policies
+from app.crud.log import LOG_TABLES
+
+logger = logging.getLogger(__name__)
+
+SUFFIX_FORMATS = {
+    "daily": "%Y%m%d",
+    "monthly": "%Y%m",
+}
+
+
+def period_start(value: datetime, granularity: str) -> datetime:
+    """Start of the day or month that contains ``value``"""
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "monthly":
+        value = value.replace(day=1)
+    return value
+
+
+def next_period(start: datetime, granularity: str) -> datetime:
+    if granularity == "monthly":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def upcoming_periods(now: datetime, granularity: str, premake: int) -> List[Tuple[datetime, datetime]]:
+    """``(start, end)`` of the current period and the ``premake`` ones after it"""
+    periods = []
+    start = period_start(now, granularity)
+    for _ in range(premake + 1):
+        end = next_period(start, granularity)
+        periods.append((start, end))
+        start = end
+    return periods
+
+
+def expired_partitions(
+    partitions: List[Tuple[str, datetime]], cutoff: datetime, granularity: str
+) -> List[str]:
+    """Names of partitions, sorted by start, whose whole period ends by ``cutoff``"""
+    expired = []
+    for name, start in partitions:
+        if next_period(start, granularity) > cutoff:
+            break
+        expired.append(name)
+    return expired
+
+
+class PartitionManager:
+    """Keep the log tables split into one partition per day or month.
+
+    On PostgreSQL the log tables are range-partitioned by ``timestamp``. The
+    manager creates partitions ``LOG_PARTITION_PREMAKE`` periods ahead (plus a
+    default partition for stray timestamps) and expires old data by detaching
+    and dropping whole partitions, which is a metadata operation instead of a
+    mass DELETE.
+
+    Other databases, SQLite in local testing, get one plain table per period
+    instead (``system_logs_p20240115`` next to ``system_logs``). New rows are
+    still written to the main table; maintenance moves each period that has
+    ended into its own table and expires periods by dropping their tables.
+    Queries through the models only read the main table, i.e. the current
+    period, so this fallback is meant for exercising the partition lifecycle
+    without PostgreSQL.
+    """
+
+    def __init__(
+        self,
+        granularity: str = settings.LOG_PARTITIONING,
+        premake: int = settings.LOG_PARTITION_PREMAKE,
+        bind: Engine = engine
+    ):
+        if granularity not in SUFFIX_FORMATS:
+            raise ValueError(f"Unsupported log partitioning: {granularity}")
+        self.granularity = granularity
+        self.premake = premake
+        self.bind = bind
+        self.native = bind.dialect.name == "postgresql"
+
+    def partition_name(self, table_name: str, start: datetime) -> str:
+        return f"{table_name}_p{start.strftime(SUFFIX_FORMATS[self.granularity])}"
+
+    def _parse_partition(self, table_name: str, name: str) -> Optional[datetime]:
+        prefix = f"{table_name}_p"
+        if not name.startswith(prefix):
+            return None
+        try:
+            return datetime.strptime(name[len(prefix):], SUFFIX_FORMATS[self.granularity])
+        except ValueError:
+            return None
+
+    def maintain(self, now: Optional[datetime] = None) -> Dict[str, Dict[str, List[str]]]:
+        """Create upcoming partitions and expire old ones for every log table"""
+        now = now or datetime.utcnow()
+        result = {}
+        for policy in default_policies():
+            table = LOG_TABLES[policy.log_type]
+            cutoff = period_start(now - timedelta(days=policy.days_to_keep), self.granularity)
+            if self.native:
+                result[policy.log_type] = self._maintain_table(table.name, now, cutoff)
+            else:
+                result[policy.log_type] = self._maintain_period_tables(table, now, cutoff)
+        return result
+
+    # PostgreSQL
+
+    def _is_partitioned(self, conn, table_name: str) -> bool:
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ), {"name": table_name}).first() is not None
+
+    def list_partitions(self, conn, table_name: str) -> List[Tuple[str, datetime]]:
+        rows = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :name AND pg_table_is_visible(parent.oid)"
+        ), {"name": table_name}).scalars()
+        partitions = []
+        for name in rows:
+            start = self._parse_partition(table_name, name)
+            if start is not None:
+                partitions.append((name, start))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def _maintain_table(self, table_name: str, now: datetime, cutoff: datetime) -> Dict[str, List[str]]:
+        created: List[str] = []
+        dropped: List[str] = []
+        with self.bind.connect() as conn:
+            if not self._is_partitioned(conn, table_name):
+                logger.warning(
+                    f"{table_name} is not a partitioned table; recreate it to enable "
+                    f"LOG_PARTITIONING={self.granularity}"
+                )
+                return {"created": created, "dropped": dropped}
+            existing = {name for name, _ in self.list_partitions(conn, table_name)}
+
+        with self.bind.begin() as conn:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{table_name}_default" '
+                f'PARTITION OF "{table_name}" DEFAULT'
+            ))
+
+        for start, end in upcoming_periods(now, self.granularity, self.premake):
+            name = self.partition_name(table_name, start)
+            if name not in existing:
+                try:
+                    with self.bind.begin() as conn:
+                        conn.execute(text(
+                            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+                            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                        ))
+                    created.append(name)
+                except Exception as e:
+                    # Usually rows for this period already sit in the default partition
+                    logger.error(f"Could not create log partition {name}: {str(e)}")
+
+        with self.bind.connect() as conn:
+            partitions = self.list_partitions(conn, table_name)
+        for name in expired_partitions(partitions, cutoff, self.granularity):
+            with self.bind.begin() as conn:
+                conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+        return {"created": created, "dropped": dropped}
+
+    # Other databases
+
+    def period_table(self, table: Table, start: datetime) -> Table:
+        """Plain table with the columns of ``table`` for the period starting at ``start``.
+
+        Only the columns are copied: archived rows are not written to, so the
+        foreign keys and secondary indexes would only cost space.
+        """
+        return Table(
+            self.partition_name(table.name, start), MetaData(),
+            *(Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+              for column in table.columns)
+        )
+
+    def list_period_tables(self, table_name: str) -> List[Tuple[str, datetime]]:
+        partitions = []
+        for name in inspect(self.bind).get_table_names():
+            start = self._parse_partition(table_name, name)
+            if start is not None:
+                partitions.append((name, start))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def _maintain_period_tables(self, table: Table, now: datetime, cutoff: datetime) -> Dict[str, List[str]]:
+        created: List[str] = []
+        moved: List[str] = []
+        dropped: List[str] = []
+        existing = {name for name, _ in self.list_period_tables(table.name)}
+
+        def ensure(start: datetime) -> Table:
+            period = self.period_table(table, start)
+            if period.name not in existing:
+                period.create(self.bind, checkfirst=True)
+                existing.add(period.name)
+                created.append(period.name)
+            return period
+
+        for start, _ in upcoming_periods(now, self.granularity, self.premake):
+            ensure(start)
+
+        # Move every period that has ended out of the main table, one transaction each
+        current = period_start(now, self.granularity)
+        with self.bind.connect() as conn:
+            oldest = conn.execute(
+                select(table.c.timestamp).where(table.c.timestamp < current)
+                .order_by(table.c.timestamp).limit(1)
+            ).scalar()
+        start = period_start(oldest, self.granularity) if oldest is not None else current
+        columns = [column.name for column in table.columns]
+        while start < current:
+            end = next_period(start, self.granularity)
+            in_period = and_(table.c.timestamp >= start, table.c.timestamp < end)
+            period = ensure(start)
+            with self.bind.begin() as conn:
+                conn.execute(insert(period).from_select(
+                    columns, select(*(table.c[name] for name in columns)).where(in_period)
+                ))
+                if conn.execute(delete(table).where(in_period)).rowcount:
+                    moved.append(period.name)
+            start = end
+
+        for name in expired_partitions(self.list_period_tables(table.name), cutoff, self.granularity):
+            with self.bind.begin() as conn:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+        return {"created": created, "moved": moved, "dropped": dropped}
+
+
+partition_manager = PartitionManager() if settings.LOG_PARTITIONING != "none" else None
+
+log_partition_worker = PeriodicWorker(
+    "log-partitions", settings.LOG_PARTITION_INTERVAL_SECONDS, lambda: partition_manager.maintain()
+) if partition_manager is not None else None
+
+
+def start_log_partitions():
+    if partition_manager is None:
+        return
+    try:
+        partition_manager.maintain()
+    except Exception as e:
+        logger.error(f"Log partition maintenance failed: {str(e)}")
+    log_partition_worker.start()
+
+
+def stop_log_partitions():
+    if log_partition_worker is not None:
+        log_partition_worker.stop()
@@ -0,0 +1,271 @@
+import enum
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from app.core.config import settings
+from app.core.database import engine
+from app.crud.log import insert_log_rows
+from app.models.log import LogLevel
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_MODES = ("block", "drop_debug", "spill")
+
+
+def _json_default(value: Any):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _is_debug(kind: str, row: Dict[str, Any]) -> bool:
+    return kind == "system" and row.get("level") in (LogLevel.DEBUG, LogLevel.DEBUG.value)
+
+
+class LogPipeline:
+    """Write-behind pipeline that persists log rows off the request path.
+
+    Entries are kept in a bounded in-memory queue and written by a background
+    flusher thread in multi-row INSERTs on its own connection, either when a
+    full batch is available or when the flush interval elapses.
+    """
+
+    def __init__(
+        self,
+        bind=engine,
+        max_queue_size: int = settings.LOG_QUEUE_MAX_SIZE,
+        batch_size: int = settings.LOG_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.LOG_FLUSH_INTERVAL_SECONDS,
+        backpressure: str = settings.LOG_BACKPRESSURE,
+        block_timeout: float = settings.LOG_BLOCK_TIMEOUT_SECONDS,
+        spill_path: Optional[str] = settings.LOG_SPILL_PATH
+    ):
+        if backpressure not in BACKPRESSURE_MODES:
+            raise ValueError(f"Unknown log backpressure mode: {backpressure}")
+        self.bind = bind
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "submitted": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "failed_batches": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self):
+        """Start the background flusher thread"""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Stop accepting entries and drain everything still queued"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        # Anything left behind (e.g. join timed out) is written synchronously
+        self._flush_all()
+
+    def submit(self, kind: str, row: Dict[str, Any]) -> bool:
+        """Queue a log row; returns False if it was dropped"""
+        return self.submit_many([(kind, row)]) == 1
+
+    def submit_many(self, entries: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Queue several log rows in order; returns how many were accepted"""
+        accepted = 0
+        spill: List[Tuple[str, Dict[str, Any]]] = []
+        with self._cond:
+            for kind, row in entries:
+                self._stats["submitted"] += 1
+                if len(self._queue) >= self.max_queue_size and not self._make_room(kind, row):
+                    if self.backpressure == "spill":
+                        spill.append((kind, row))
+                        accepted += 1
+                    else:
+                        self._stats["dropped"] += 1
+                    continue
+                self._queue.append((kind, row))
+                accepted += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        if spill:
+            self._spill(spill)
+        return accepted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._stats,
+                "queued": len(self._queue),
+                "running": self.running,
+                "backpressure": self.backpressure,
+            }
+
+    def _make_room(self, kind: str, row: Dict[str, Any]) -> bool:
+        """Apply the backpressure policy to a full queue (caller holds the lock)"""
+        if self.backpressure == "block":
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.max_queue_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    return False
+                self._cond.notify_all()
+                self._cond.wait(remaining)
+            return True
+
+        if self.backpressure == "drop_debug":
+            if _is_debug(kind, row):
+                return False
+            for index, (queued_kind, queued_row) in enumerate(self._queue):
+                if _is_debug(queued_kind, queued_row):
+                    del self._queue[index]
+                    self._stats["dropped"] += 1
+                    return True
+            return False
+
+        # spill: the caller writes the entry to disk
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+                batch = self._take(self.batch_size)
+                # Wake producers blocked on a full queue
+                self._cond.notify_all()
+            if batch:
+                self._write(batch)
+            elif not stopping:
+                self._replay_spill()
+            if stopping:
+                self._flush_all()
+                return
+
+    def _take(self, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+        batch = []
+        while self._queue and len(batch) < count:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _flush_all(self):
+        while True:
+            with self._cond:
+                batch = self._take(self.batch_size)
+            if not batch:
+                break
+            self._write(batch)
+        self._replay_spill()
+
+    def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> bool:
+        """Insert a batch in one transaction, one multi-row INSERT per log table"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, row in batch:
+            grouped.setdefault(kind, []).append(row)
+        try:
+            with self.bind.begin() as conn:
+                for kind, rows in grouped.items():
+                    insert_log_rows(conn, kind, rows)
+            with self._cond:
+                self._stats["flushed"] += len(batch)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} log entries: {str(e)}")
+            with self._cond:
+                self._stats["failed_batches"] += 1
+            if self.spill_path:
+                self._spill(batch)
+            else:
+                with self._cond:
+                    self._stats["dropped"] += len(batch)
+            return False
+
+    def _spill(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        if not self.spill_path:
+            with self._cond:
+                self._stats["dropped"] += len(entries)
+            return
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for kind, row in entries:
+                    f.write(json.dumps({"kind": kind, "row": row}, default=_json_default) + "\n")
+            with self._cond:
+                self._stats["spilled"] += len(entries)
+        except OSError as e:
+            logger.error(f"Failed to spill {len(entries)} log entries to disk: {str(e)}")
+            with self._cond:
+                self._stats["dropped"] += len(entries)
+
+    def _replay_spill(self):
+        """Re-insert entries spilled to disk once the database keeps up again"""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            if os.path.exists(replay_path):
+                return
+            os.replace(self.spill_path, replay_path)
+
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        ok = True
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                row = entry["row"]
+                if row.get("timestamp"):
+                    row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                batch.append((entry["kind"], row))
+                if len(batch) >= self.batch_size:
+                    ok = self._write(batch) and ok
+                    batch = []
+        if batch:
+            ok = self._write(batch) and ok
+        # Failed batches were spilled again by _write, so the replay file is done
+        os.remove(replay_path)
+        if not ok:
+            logger.warning("Some spilled log entries could not be replayed and were spilled again")
+
+
+log_pipeline = LogPipeline() if settings.LOG_PIPELINE_ENABLED else None
+
+
+def start_log_pipeline():
+    if log_pipeline is not None:
+        log_pipeline.start()
+
+
+def stop_log_pipeline():
+    if log_pipeline is not None:
+        log_pipeline.stop()
@@ -0,0 +1,290 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from app.core.background import PeriodicWorker
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.log import (
+    delete_old_logs_batch, claim_retention_job, save_retention_job, get_retention_job,
+    get_active_retention_job, mark_interrupted_retention_jobs
+)
+
+logger = logging.getLogger(__name__)
+
+LOG_TYPES = ("system", "audit", "api")
+
+
+class RetentionPolicy:
+    """How long logs of one type are kept"""
+
+    def __init__(self, log_type: str, days_to_keep: int):
+        self.log_type = log_type
+        self.days_to_keep = days_to_keep
+
+
+def default_policies(days_to_keep: Optional[int] = None) -> List[RetentionPolicy]:
+    """Per-table policies from settings, or one period for every table"""
+    configured = {
+        "system": settings.LOG_RETENTION_SYSTEM_DAYS,
+        "audit": settings.LOG_RETENTION_AUDIT_DAYS,
+        "api": settings.LOG_RETENTION_API_DAYS,
+    }
+    return [
+        RetentionPolicy(log_type, days_to_keep if days_to_keep is not None else configured[log_type])
+        for log_type in LOG_TYPES
+    ]
+
+
+class RetentionJobRunning(Exception):
+    """A purge is already running, in this or another process; only one runs at a time"""
+
+    def __init__(self, job: "RetentionJob"):
+        super().__init__(f"Log cleanup job {job.id} is already running")
+        self.job = job
+
+
+class RetentionJob:
+    """Progress of one purge run across the log tables"""
+
+    def __init__(self, policies: List[RetentionPolicy], cursors: Optional[Dict[str, int]] = None):
+        self.id = uuid.uuid4().hex
+        self.policies = policies
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.cancel_requested = False
+        self.progress: Dict[str, Dict[str, Any]] = {
+            policy.log_type: {
+                "days_to_keep": policy.days_to_keep,
+                "deleted": 0,
+                "batches": 0,
+                "cursor": (cursors or {}).get(policy.log_type, 0),
+                "done": False,
+            }
+            for policy in policies
+        }
+
+    @classmethod
+    def from_row(cls, row) -> "RetentionJob":
+        """Rebuild a job stored by an earlier run, e.g. before a restart"""
+        policies = [RetentionPolicy(log_type, p["days_to_keep"]) for log_type, p in row.progress.items()]
+        job = cls(policies)
+        job.id = row.id
+        job.status = row.status
+        job.error = row.error
+        job.created_at = row.created_at
+        job.finished_at = row.finished_at
+        job.progress = {log_type: dict(p) for log_type, p in row.progress.items()}
+        return job
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("pending", "running")
+
+    def state(self, status: Optional[str] = None) -> Dict[str, Any]:
+        """Column values of the stored job, optionally with a status not yet reported"""
+        status = status or self.status
+        return {
+            "status": status,
+            "active": True if status in ("pending", "running") else None,
+            "error": self.error,
+            "progress": {log_type: dict(p) for log_type, p in self.progress.items()},
+            "created_at": self.created_at,
+            "updated_at": datetime.utcnow(),
+            "finished_at": self.finished_at,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "total_deleted": sum(p["deleted"] for p in self.progress.values()),
+            "tables": self.progress,
+        }
+
+
+class RetentionEngine:
+    """Purge expired logs in bounded primary-key batches on a background thread.
+
+    Every batch is its own short transaction and the engine pauses between
+    batches so that concurrent log inserts are never blocked for long. Each
+    job stores its per-table cursors in ``log_retention_jobs`` after every
+    batch, so a cancelled, failed or interrupted job (also one cut short by
+    a restart) can be resumed where it stopped.
+
+    Starting a job claims the single active slot in that table, so with
+    several worker processes only one purge runs. A job whose process died
+    is released once it has not been saved for ``stale_seconds``.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.LOG_RETENTION_BATCH_SIZE,
+        pause_seconds: float = settings.LOG_RETENTION_PAUSE_SECONDS,
+        max_finished_jobs: int = 50,
+        stale_seconds: float = settings.LOG_RETENTION_STALE_SECONDS,
+        session_factory=SessionLocal
+    ):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.stale_seconds = stale_seconds
+        self.max_finished_jobs = max_finished_jobs
+        self.session_factory = session_factory
+        self._jobs: Dict[str, RetentionJob] = {}
+        self._lock = threading.Lock()
+
+    def start_job(
+        self,
+        days_to_keep: Optional[int] = None,
+        resume_job_id: Optional[str] = None
+    ) -> RetentionJob:
+        """Start a purge; raises RetentionJobRunning while another one is active"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active:
+                    raise RetentionJobRunning(job)
+
+            cursors = None
+            policies = default_policies(days_to_keep)
+            if resume_job_id:
+                previous = self.get_job(resume_job_id)
+                if previous is None:
+                    raise KeyError(resume_job_id)
+                policies = previous.policies
+                cursors = {log_type: p["cursor"] for log_type, p in previous.progress.items()}
+
+            job = RetentionJob(policies, cursors)
+            self._claim(job)
+            self._jobs[job.id] = job
+            self._prune_finished()
+
+        threading.Thread(target=self._run, args=(job,), name=f"log-retention-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[RetentionJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        db = self.session_factory()
+        try:
+            row = get_retention_job(db, job_id)
+        finally:
+            db.close()
+        return RetentionJob.from_row(row) if row is not None else None
+
+    def recover(self) -> int:
+        """Mark jobs a dead process left unfinished as interrupted, ready to resume"""
+        db = self.session_factory()
+        try:
+            return mark_interrupted_retention_jobs(db, self._stale_before())
+        finally:
+            db.close()
+
+    def cancel_job(self, job_id: str) -> Optional[RetentionJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel_requested = True
+        return job
+
+    def _prune_finished(self):
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.id]
+
+    def _stale_before(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+
+    def _claim(self, job: RetentionJob):
+        db = self.session_factory()
+        try:
+            while not claim_retention_job(db, job.id, job.state(), self._stale_before()):
+                running = get_active_retention_job(db)
+                # Otherwise the other job finished in between: claim again
+                if running is not None:
+                    raise RetentionJobRunning(RetentionJob.from_row(running))
+        finally:
+            db.close()
+
+    def _save(self, job: RetentionJob, db=None, status: Optional[str] = None):
+        session = db or self.session_factory()
+        try:
+            save_retention_job(session, job.id, job.state(status))
+        finally:
+            if db is None:
+                session.close()
+
+    def _run(self, job: RetentionJob):
+        job.status = "running"
+        status = "failed"
+        db = self.session_factory()
+        try:
+            self._save(job, db)
+            for policy in job.policies:
+                progress = job.progress[policy.log_type]
+                cutoff_date = datetime.utcnow() - timedelta(days=policy.days_to_keep)
+                while not job.cancel_requested:
+                    deleted, last_id = delete_old_logs_batch(
+                        db, policy.log_type, cutoff_date,
+                        after_id=progress["cursor"], batch_size=self.batch_size
+                    )
+                    if last_id is None:
+                        progress["done"] = True
+                        break
+                    progress["deleted"] += deleted
+                    progress["batches"] += 1
+                    progress["cursor"] = last_id
+                    # Deleting a range twice is harmless, so the cursor is saved after its batch
+                    self._save(job, db)
+                    time.sleep(self.pause_seconds)
+                if job.cancel_requested:
+                    break
+            status = "cancelled" if job.cancel_requested else "completed"
+        except Exception as e:
+            db.rollback()
+            status = "failed"
+            job.error = str(e)
+            logger.error(f"Log retention job {job.id} failed: {str(e)}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            try:
+                self._save(job, db, status)
+            except Exception as e:
+                logger.error(f"Could not store the state of log retention job {job.id}: {str(e)}")
+            db.close()
+            # Reported finished only once stored, so the active slot is free by then
+            job.status = status
+
+
+retention_engine = RetentionEngine()
+
+
+def run_scheduled_purge():
+    try:
+        retention_engine.start_job()
+    except RetentionJobRunning:
+        # A manual or earlier scheduled purge is still going; it covers this run
+        pass
+
+
+log_retention_worker = PeriodicWorker(
+    "log-retention", settings.LOG_RETENTION_INTERVAL_SECONDS, run_scheduled_purge
+) if settings.LOG_RETENTION_INTERVAL_SECONDS > 0 else None
+
+
+def start_log_retention():
+    retention_engine.recover()
+    if log_retention_worker is not None:
+        log_retention_worker.start()
+
+
+def stop_log_retention():
+    if log_retention_worker is not None:
+        log_retention_worker.stop()
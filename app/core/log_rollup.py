@@ -0,0 +1,42 @@
+import logging
+
+from app.core.background import PeriodicWorker
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.log import rollup_logs
+
+logger = logging.getLogger(__name__)
+
+
+def run_log_rollups():
+    """Roll up new log rows until the backlog is below one batch"""
+    db = SessionLocal()
+    try:
+        while True:
+            processed = rollup_logs(
+                db,
+                batch_size=settings.LOG_ROLLUP_BATCH_SIZE,
+                settle_seconds=settings.LOG_ROLLUP_SETTLE_SECONDS
+            )
+            if max(processed.values()) < settings.LOG_ROLLUP_BATCH_SIZE:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+log_rollup_worker = PeriodicWorker(
+    "log-rollup", settings.LOG_ROLLUP_INTERVAL_SECONDS, run_log_rollups
+) if settings.LOG_ROLLUPS_ENABLED else None
+
+
+def start_log_rollups():
+    if log_rollup_worker is not None:
+        log_rollup_worker.start()
+
+
+def stop_log_rollups():
+    if log_rollup_worker is not None:
+        log_rollup_worker.stop()
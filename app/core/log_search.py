@@ -0,0 +1,200 @@
+import logging
+import re
+from typing import Optional, List, Tuple, Any
+
+from sqlalchemy import inspect, literal_column, select, func, text, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query
+
+from app.core.database import engine
+from app.models.log import SystemLog
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = SystemLog.__tablename__
+SEARCH_COLUMNS = ("message", "module", "function_name")
+SEARCH_VECTOR = "search_vector"
+FTS_TABLE = f"{SEARCH_TABLE}_fts"
+
+# Which full-text index backs system log search: "postgresql", "fts5" or None
+# when only the ILIKE fallback is available. Set by ensure_log_search().
+search_backend: Optional[str] = None
+
+
+SEARCH_INDEX = f"ix_{SEARCH_TABLE}_{SEARCH_VECTOR}"
+SEARCH_TRIGGER = f"{SEARCH_TABLE}_{SEARCH_VECTOR}_update"
+BACKFILL_BATCH_SIZE = 5000
+
+
+def _document(prefix: str = "") -> str:
+    return " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in SEARCH_COLUMNS)
+
+
+def _ensure_postgresql(conn):
+    # Only catalog changes here: a nullable column without a default is added
+    # without rewriting the table, and the trigger fills it for new and edited
+    # rows. Existing rows and the index are left to build_log_search_index().
+    conn.execute(text(f"ALTER TABLE {SEARCH_TABLE} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector"))
+    conn.execute(text(
+        f"CREATE OR REPLACE FUNCTION {SEARCH_TRIGGER}() RETURNS trigger AS $$ BEGIN "
+        f"NEW.{SEARCH_VECTOR} := to_tsvector('simple', {_document('NEW.')}); RETURN NEW; "
+        f"END $$ LANGUAGE plpgsql"
+    ))
+    has_trigger = conn.execute(text(
+        "SELECT 1 FROM pg_trigger WHERE tgname = :name AND tgrelid = CAST(:table AS regclass)"
+    ), {"name": SEARCH_TRIGGER, "table": SEARCH_TABLE}).first() is not None
+    if not has_trigger:
+        conn.execute(text(
+            f"CREATE TRIGGER {SEARCH_TRIGGER} BEFORE INSERT OR UPDATE OF {', '.join(SEARCH_COLUMNS)} "
+            f"ON {SEARCH_TABLE} FOR EACH ROW EXECUTE FUNCTION {SEARCH_TRIGGER}()"
+        ))
+
+
+def _postgresql_index_valid(conn) -> Optional[bool]:
+    """Whether the GIN index is usable; None when it does not exist"""
+    return conn.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name"
+    ), {"name": SEARCH_INDEX}).scalar()
+
+
+def backfill_search_vectors(bind: Engine = engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Fill the search vector of rows written before the trigger, one id range per transaction"""
+    with bind.connect() as conn:
+        max_id = conn.execute(text(f"SELECT max(id) FROM {SEARCH_TABLE}")).scalar() or 0
+    filled = 0
+    last_id = 0
+    # Rows above max_id were written with the trigger in place
+    while last_id < max_id:
+        with bind.begin() as conn:
+            filled += conn.execute(text(
+                f"UPDATE {SEARCH_TABLE} SET {SEARCH_VECTOR} = to_tsvector('simple', {_document()}) "
+                f"WHERE id > :low AND id <= :high AND {SEARCH_VECTOR} IS NULL"
+            ), {"low": last_id, "high": last_id + batch_size}).rowcount
+        last_id += batch_size
+    return filled
+
+
+def build_log_search_index(bind: Engine = engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Backfill the PostgreSQL search vectors and build their GIN index.
+
+    Run by an operator (``python -m app.core.log_search``) rather than at
+    startup: on a large table both take a while. Neither blocks writers; the
+    index is built ``CONCURRENTLY``. Safe to run again, e.g. after an
+    interrupted build left an invalid index. Returns the rows backfilled.
+    """
+    ensure_log_search(bind)
+    filled = backfill_search_vectors(bind, batch_size)
+    # CONCURRENTLY cannot run inside a transaction block
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if _postgresql_index_valid(conn) is False:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {SEARCH_INDEX}"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {SEARCH_INDEX} "
+            f"ON {SEARCH_TABLE} USING GIN ({SEARCH_VECTOR})"
+        ))
+    ensure_log_search(bind)
+    return filled
+
+
+def _ensure_fts5(conn):
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {"name": FTS_TABLE}).first() is not None
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{SEARCH_TABLE}', content_rowid='id')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SEARCH_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SEARCH_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {SEARCH_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    if not exists:
+        # Index the rows written before search was set up
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def ensure_log_search(bind: Engine = engine) -> Optional[str]:
+    """Create the full-text index for system log search if it is missing.
+
+    SQLite gets an external-content FTS5 table kept in sync by triggers.
+    PostgreSQL gets a ``tsvector`` column kept current by a trigger; searches
+    use it once build_log_search_index() has backfilled it and built its GIN
+    index, and fall back to ILIKE until then. Both are idempotent.
+    """
+    global search_backend
+    if not inspect(bind).has_table(SEARCH_TABLE):
+        return None
+    try:
+        with bind.begin() as conn:
+            if bind.dialect.name == "postgresql":
+                _ensure_postgresql(conn)
+                if _postgresql_index_valid(conn):
+                    search_backend = "postgresql"
+                else:
+                    logger.warning(
+                        "Full-text log search index not built yet; run python -m app.core.log_search"
+                    )
+                    search_backend = None
+            elif bind.dialect.name == "sqlite":
+                _ensure_fts5(conn)
+                search_backend = "fts5"
+    except OperationalError as e:
+        # e.g. SQLite built without FTS5; searches fall back to ILIKE
+        logger.warning(f"Full-text log search unavailable: {str(e)}")
+        search_backend = None
+    return search_backend
+
+
+def search_terms(search_text: str) -> List[str]:
+    """Words of a search, split the same way both full-text indexes split text"""
+    return re.findall(r"[^\W_]+", search_text.lower())
+
+
+def apply_log_search(query: Query, search_text: str) -> Tuple[Query, Optional[Any]]:
+    """Restrict a system log query to rows matching every search word.
+
+    Each word matches as a prefix. Returns the filtered query and a relevance
+    expression (higher is better), or ``None`` when the ILIKE fallback is used.
+    """
+    terms = search_terms(search_text)
+    if search_backend == "postgresql" and terms:
+        vector = literal_column(f"{SEARCH_TABLE}.{SEARCH_VECTOR}")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return query.filter(vector.op("@@")(tsquery)), func.ts_rank_cd(vector, tsquery)
+
+    if search_backend == "fts5" and terms:
+        fts = literal_column(FTS_TABLE)
+        matches = select(
+            literal_column("rowid").label("id"),
+            (-func.bm25(fts)).label("rank")
+        ).select_from(text(FTS_TABLE)).where(
+            fts.op("MATCH")(" ".join(f'"{term}"*' for term in terms))
+        ).subquery()
+        return query.join(matches, matches.c.id == SystemLog.id), matches.c.rank
+
+    pattern = f"%{search_text}%"
+    return query.filter(or_(*(getattr(SystemLog, column).ilike(pattern) for column in SEARCH_COLUMNS))), None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if engine.dialect.name != "postgresql":
+        print(f"Nothing to build on {engine.dialect.name}; the index is created at startup")
+    else:
+        filled = build_log_search_index()
+        print(f"Backfilled {filled} row(s); full-text log search index ready")
@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 from app.crud.log import create_system_log, create_audit_log, create_api_log
 from app.schemas.log import SystemLogCreate, AuditLogCreate, APILogCreate
 from app.models.log import LogLevel, LogCategory
+from app.core.log_pipeline import log_pipeline
+from app.core.log_context import get_log_context
 
 # Configure Python logging
 logging.basicConfig(
@@ -23,6 +25,28 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+_CREATE_FUNCS = {
+    "system": create_system_log,
+    "audit": create_audit_log,
+    "api": create_api_log,
+}
+
+def _persist(db: Session, kind: str, entry):
+    """Buffer a log entry for the current request or hand it to the
+    write-behind pipeline; without either, write it directly"""
+    context = get_log_context()
+    pipeline_running = log_pipeline is not None and log_pipeline.running
+    if context is None and not pipeline_running:
+        return _CREATE_FUNCS[kind](db, entry)
+
+    row = entry.dict()
+    row["timestamp"] = datetime.utcnow()
+    if context is not None:
+        context.add(kind, row)
+    else:
+        log_pipeline.submit(kind, row)
+    return None
+
 class LoggingService:
     """Professional logging service for the CRM system"""
     
@@ -74,7 +98,7 @@ class LoggingService:
                 duration_ms=duration_ms
             )
             
-            return create_system_log(db, log_entry)
+            return _persist(db, "system", log_entry)
         except Exception as e:
             logger.error(f"Failed to create system log: {str(e)}")
             return None
@@ -110,7 +134,7 @@ class LoggingService:
                 user_agent=user_agent
             )
             
-            return create_audit_log(db, audit_entry)
+            return _persist(db, "audit", audit_entry)
         except Exception as e:
             logger.error(f"Failed to create audit log: {str(e)}")
             return None
@@ -167,7 +191,7 @@ class LoggingService:
                 stack_trace=stack_trace
             )
             
-            return create_api_log(db, api_entry)
+            return _persist(db, "api", api_entry)
         except Exception as e:
             logger.error(f"Failed to create API log: {str(e)}")
             return None
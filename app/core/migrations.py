@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, List, Tuple
+
+from sqlalchemy import Column, String, DateTime, MetaData, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.lead_counters import run_lead_counter_reconcile
+from app.core.lead_search import ensure_lead_search
+from app.core.log_search import ensure_log_search
+from app.crud.line import rebuild_line_conversations
+from app.models import user, lead, line, log, job  # noqa: F401  register every table on Base
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("name", String(200), primary_key=True),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+def create_missing_indexes(bind: Engine) -> List[str]:
+    """Create indexes declared on the models that existing tables lack.
+
+    ``create_all`` only builds indexes together with new tables, so indexes
+    added to a model later never reach a database created before them.
+    """
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # Indexes on columns a later migration adds are created by that migration
+            if index.name not in existing and all(column.name in columns for column in index.columns):
+                logger.info(f"Creating index {index.name} on {table.name}")
+                index.create(bind, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
+def add_missing_columns(bind: Engine, table_names: Iterable[str]) -> List[str]:
+    """Add nullable model columns that the given existing tables lack.
+
+    Like indexes, columns added to a model later are not created by
+    ``create_all`` on an existing table. Name the tables explicitly: columns
+    with their own setup step (e.g. the lead search keys) must be left to it.
+    """
+    inspector = inspect(bind)
+    added = []
+    for table_name in table_names:
+        table = Base.metadata.tables[table_name]
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+            column_type = column.type.compile(dialect=bind.dialect)
+            logger.info(f"Adding column {column.name} to {table.name}")
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _add_line_message_webhook_event_id(bind: Engine):
+    add_missing_columns(bind, ["line_message"])
+    create_missing_indexes(bind)
+
+
+def _line_conversations(bind: Engine):
+    create_missing_indexes(bind)
+    db = SessionLocal(bind=bind)
+    try:
+        rebuild_line_conversations(db)
+    finally:
+        db.close()
+
+
+def _lead_created_at_not_null(bind: Engine):
+    # Keyset paging on (created_at, id) cannot reach or encode leads without a creation time
+    with bind.begin() as conn:
+        conn.execute(text(
+            "UPDATE lead SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL"
+        ))
+        # SQLite cannot change a column's nullability in place; the model's
+        # default keeps new rows filled there
+        if bind.dialect.name == "postgresql":
+            conn.execute(text("ALTER TABLE lead ALTER COLUMN created_at SET NOT NULL"))
+
+
+# Applied once each, in order, and recorded in schema_migrations. Every step
+# must also be safe to run again, since a crash can interrupt the recording.
+MIGRATIONS: List[Tuple[str, Callable[[Engine], object]]] = [
+    ("0001_lead_listing_indexes", create_missing_indexes),
+    ("0002_lead_counters", run_lead_counter_reconcile),
+    ("0003_line_message_webhook_event_id", _add_line_message_webhook_event_id),
+    ("0004_line_conversations", _line_conversations),
+    ("0005_line_inbox_indexes", create_missing_indexes),
+    ("0006_lead_created_at_not_null", _lead_created_at_not_null),
+]
+
+# Idempotent steps that run at every startup
+STARTUP_STEPS: List[Callable[[Engine], object]] = [
+    ensure_log_search,
+    ensure_lead_search,
+]
+
+
+def run_migrations(bind: Engine = engine) -> List[str]:
+    """Bring an existing database up to the current models; returns applied names"""
+    _metadata.create_all(bind)
+    with bind.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+
+    newly_applied = []
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        logger.info(f"Applying migration {name}")
+        migrate(bind)
+        with bind.begin() as conn:
+            conn.execute(schema_migrations.insert().values(name=name, applied_at=datetime.utcnow()))
+        newly_applied.append(name)
+
+    for step in STARTUP_STEPS:
+        step(bind)
+    return newly_applied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    applied = run_migrations()
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none'}")
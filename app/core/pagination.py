@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple, List, Any, NamedTuple, Union
+
+from sqlalchemy import tuple_, desc
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+    total_is_estimate: bool = False
+
+
+def encode_cursor(position: datetime, row_id: Union[int, str]) -> str:
+    """Opaque token for the row a page ended on"""
+    payload = json.dumps({"t": position.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, id_type: type = int) -> Tuple[datetime, Union[int, str]]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        row_id = payload["i"]
+        if not isinstance(row_id, (int, str)) or isinstance(row_id, bool):
+            raise TypeError("cursor id must be a number or string")
+        return datetime.fromisoformat(payload["t"]), id_type(row_id)
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+class ExplainJSON(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, keeping its bound parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(ExplainJSON, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    # The statement goes through the same compiler, so user-supplied filter
+    # values stay bound parameters instead of being rendered into the SQL
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_count(query: Query) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner, or None on other databases"""
+    session = query.session
+    if session.bind.dialect.name != "postgresql":
+        return None
+    plan = session.execute(ExplainJSON(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query: Query, mode: str) -> Tuple[Optional[int], bool]:
+    """Total for a filtered query: ``(total, is_estimate)``.
+
+    ``estimate`` falls back to an exact count where the database has no
+    planner statistics to ask.
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        estimate = estimate_count(query)
+        if estimate is not None:
+            return estimate, True
+    return query.order_by(None).count(), False
+
+
+def keyset_page(
+    query: Query,
+    position_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    count: str = "exact"
+) -> Page:
+    """Newest-first page of ``query`` ordered by ``(position_column, id_column)``.
+
+    With a cursor the page starts right after the row the cursor points at,
+    which an index on both columns answers without scanning skipped rows.
+    ``skip`` keeps plain offset paging working for callers without a cursor.
+    The total is counted over the whole filtered query according to ``count``.
+    ``id_column`` may also be a string key, such as a natural primary key.
+    """
+    total, is_estimate = count_rows(query, count)
+    query = query.order_by(desc(position_column), desc(id_column))
+    if cursor:
+        position, row_id = decode_cursor(cursor, id_column.type.python_type)
+        query = query.filter(tuple_(position_column, id_column) < tuple_(position, row_id))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, position_column.key), getattr(last, id_column.key))
+    return Page(rows, total, next_cursor, is_estimate)
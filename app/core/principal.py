@@ -0,0 +1,160 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jwt import evict_user_tokens, token_digest
+from app.crud.token import (
+    get_principal_invalidations, purge_principal_invalidations, save_principal_invalidation
+)
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_FIELDS = ("id", "name", "email", "role_id", "team_id")
+
+# Each sync re-reads this much before the previous one, so an invalidation
+# committed a little after its timestamp is not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Principal snapshots keyed by (user id, token digest): an entry lives no
+# longer than its token, and a user's entries are dropped together on change
+principal_cache = register_cache(
+    "principals", TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+)
+
+
+def token_claims(user: User) -> Dict[str, Any]:
+    """JWT claims for a user; with stateless claims they carry the whole principal"""
+    claims = {"sub": str(user.id), "role": str(user.role_id), "team": user.team_id}
+    if settings.AUTH_STATELESS_CLAIMS:
+        claims.update({"name": user.name, "email": user.email})
+    return claims
+
+
+def _from_claims(payload: Dict[str, Any]) -> Optional[User]:
+    if "role" not in payload or "team" not in payload or "email" not in payload:
+        return None
+    return User(
+        id=int(payload["sub"]),
+        name=payload.get("name"),
+        email=payload["email"],
+        role_id=int(payload["role"]),
+        team_id=payload["team"],
+    )
+
+
+def _cached_principal(payload: Dict[str, Any], token: str) -> Optional[User]:
+    """Principal served without the database, from the claims or the cache"""
+    if settings.AUTH_STATELESS_CLAIMS:
+        principal = _from_claims(payload)
+        if principal is not None:
+            return principal
+    snapshot = principal_cache.get((int(payload.get("sub")), token_digest(token)))
+    return User(**snapshot) if snapshot is not None else None
+
+
+def _remember_principal(user: User, payload: Dict[str, Any], token: str) -> User:
+    snapshot = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    ttl = principal_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, float(payload["exp"]) - time.time())
+    if ttl > 0:
+        principal_cache.set((user.id, token_digest(token)), snapshot, ttl=ttl)
+    return User(**snapshot)
+
+
+def load_principal(db: Session, payload: Dict[str, Any], token: str) -> Optional[User]:
+    """User for a decoded token, from the claims, the cache or the database.
+
+    The returned ``User`` is a transient copy that is not attached to ``db``;
+    load the row through crud to modify it.
+    """
+    principal = _cached_principal(payload, token)
+    if principal is not None:
+        return principal
+    user = db.query(User).filter(User.id == int(payload.get("sub"))).first()
+    if user is None:
+        return None
+    return _remember_principal(user, payload, token)
+
+
+async def load_principal_async(db: AsyncSession, payload: Dict[str, Any], token: str) -> Optional[User]:
+    """load_principal for an ``AsyncSession``, sharing the same cache"""
+    principal = _cached_principal(payload, token)
+    if principal is not None:
+        return principal
+    user = (await db.execute(select(User).where(User.id == int(payload.get("sub"))))).scalars().first()
+    if user is None:
+        return None
+    return _remember_principal(user, payload, token)
+
+
+def _forget(user_id: int):
+    principal_cache.delete_where(lambda key, _: key[0] == user_id)
+    evict_user_tokens(user_id)
+
+
+class PrincipalInvalidations:
+    """Changed users, shared by every process.
+
+    The ``principal_invalidations`` table records when each user last changed.
+    The process making the change forgets the user's principals at once; every
+    other process does so on its next ``sync``, so a change goes unnoticed for
+    at most PRINCIPAL_INVALIDATION_SYNC_SECONDS there. Rows older than the
+    cache TTL are purged: no principal cached before them is left.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        # Nothing was cached before the process started
+        self._since = datetime.utcnow()
+
+    def record(self, user_id: int):
+        with self.session_factory() as db:
+            save_principal_invalidation(db, user_id, datetime.utcnow())
+
+    def sync(self) -> int:
+        """Forget the principals of users changed since the last sync"""
+        started = datetime.utcnow()
+        with self.session_factory() as db:
+            user_ids = get_principal_invalidations(db, self._since)
+            purge_principal_invalidations(db, started - timedelta(seconds=principal_cache.ttl) - SYNC_OVERLAP)
+        for user_id in user_ids:
+            _forget(user_id)
+        self._since = started - SYNC_OVERLAP
+        return len(user_ids)
+
+
+invalidations = PrincipalInvalidations()
+
+invalidation_sync_worker = PeriodicWorker(
+    "principal-invalidations", settings.PRINCIPAL_INVALIDATION_SYNC_SECONDS, invalidations.sync
+)
+
+
+def invalidate_principal(user_id: int):
+    """Forget a user's cached principals and verified tokens after its row changed or was deleted,
+    here at once and in other processes on their next sync"""
+    _forget(user_id)
+    try:
+        invalidations.record(user_id)
+    except Exception as e:
+        # The change itself is committed; other processes catch up within the cache TTL
+        logger.error(f"Could not record the invalidation of user {user_id}: {str(e)}")
+
+
+def start_principal_invalidations():
+    invalidation_sync_worker.start()
+
+
+def stop_principal_invalidations():
+    invalidation_sync_worker.stop()
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One listener on a channel, read from the event loop it subscribed on.
+
+    Messages are handed over with ``call_soon_threadsafe``, so publishers may
+    run in any thread. A full queue drops its oldest message and marks the
+    subscription as lagged, telling the reader to resynchronize.
+    """
+
+    def __init__(self, broker: "PubSubBroker", channel: str, user_ids: Optional[Iterable[str]], max_queue: int):
+        self.broker = broker
+        self.channel = channel
+        self.user_ids: Optional[Set[str]] = set(user_ids) if user_ids else None
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.lagged = False
+        self.dropped = 0
+
+    def matches(self, message: Dict[str, Any]) -> bool:
+        return self.user_ids is None or message.get("user_id") in self.user_ids
+
+    def _deliver(self, message: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.lagged = True
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next message, or None when nothing arrived within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class PubSubBroker:
+    """Publish/subscribe between request handlers, job workers and streaming clients.
+
+    Without a client, messages fan out to the subscribers of this process.
+    With a Redis-compatible ``client`` (``publish`` and ``pubsub``) every
+    message goes through Redis and a listener thread fans out what arrives,
+    so subscribers connected to any worker process receive it.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        channel_prefix: str = settings.PUBSUB_CHANNEL_PREFIX,
+        max_queue: int = settings.PUBSUB_SUBSCRIBER_QUEUE_SIZE
+    ):
+        self.client = client
+        self.channel_prefix = channel_prefix
+        self.max_queue = max_queue
+
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "published": 0,
+            "delivered": 0,
+            "publish_errors": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopping
+
+    def start(self):
+        """Start listening on Redis; nothing to do for the in-process broker"""
+        if self.client is None or self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._listen, name="pubsub-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._thread.join(timeout)
+        self._thread = None
+
+    def subscribe(self, channel: str, user_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """Listen on ``channel``, optionally only to messages about ``user_ids``; call from the event loop"""
+        subscription = Subscription(self, channel, user_ids, self.max_queue)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """Send a JSON-serializable message; failures are logged, never raised"""
+        with self._lock:
+            self._stats["published"] += 1
+        if self.client is None:
+            self._fan_out(channel, message)
+            return
+        try:
+            self.client.publish(self.channel_prefix + channel, json.dumps(message, default=str))
+        except Exception as e:
+            with self._lock:
+                self._stats["publish_errors"] += 1
+            logger.warning(f"Publishing to {channel} failed: {str(e)}")
+
+    async def publish_async(self, channel: str, message: Dict[str, Any]) -> None:
+        """publish for the event loop: the Redis round trip runs in the threadpool"""
+        if self.client is None:
+            # Only schedules deliveries, nothing to wait for
+            self.publish(channel, message)
+            return
+        await run_in_threadpool(self.publish, channel, message)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "subscribers": sum(len(subscribers) for subscribers in self._subscriptions.values()),
+                "backend": "redis" if self.client is not None else "memory",
+                "listening": self.running,
+            }
+
+    def _fan_out(self, channel: str, message: Dict[str, Any]):
+        with self._lock:
+            subscribers = [s for s in self._subscriptions.get(channel, ()) if s.matches(message)]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                self.unsubscribe(subscription)
+                continue
+            with self._lock:
+                self._stats["delivered"] += 1
+
+    def _listen(self):
+        while not self._stopping:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.channel_prefix + "*")
+                while not self._stopping:
+                    item = pubsub.get_message(timeout=1.0)
+                    if item is None or item.get("type") != "pmessage":
+                        continue
+                    channel = _text(item["channel"])[len(self.channel_prefix):]
+                    self._fan_out(channel, json.loads(_text(item["data"])))
+            except Exception as e:
+                logger.error(f"Pub/sub listener failed, reconnecting: {str(e)}")
+                time.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def redis_client(url: str):
+    """Redis client for ``url``; needs the optional ``redis`` package"""
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("PUBSUB_REDIS_URL is set but the redis package is not installed") from e
+    return redis.Redis.from_url(url)
+
+
+broker = PubSubBroker(client=redis_client(settings.PUBSUB_REDIS_URL) if settings.PUBSUB_REDIS_URL else None)
+
+
+def start_pubsub():
+    broker.start()
+
+
+def stop_pubsub():
+    broker.stop()
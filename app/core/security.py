@@ -1,9 +1,103 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
 
 def verify_password(plain: str, hashed: str):
     return pwd_context.verify(plain, hashed)
+
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses an outdated cost"""
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password hash/verify calls are already waiting"""
+
+
+class PasswordHasherPool:
+    """Run bcrypt off the event loop on a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so worker threads use separate
+    cores. ``max_workers`` bounds CPU use; at most ``max_pending`` calls may be
+    queued or running, beyond that callers get ``PasswordPoolBusy`` right away
+    instead of piling up. Queue wait and run times are kept for ``stats()``.
+    """
+
+    def __init__(self, max_workers: int = settings.PASSWORD_HASH_WORKERS,
+                 max_pending: int = settings.PASSWORD_HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def run(self, func: Callable, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy("Password hashing is saturated, try again shortly")
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    wait_ms = (started - submitted) * 1000
+                    self.total_wait_ms += wait_ms
+                    self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                    self.total_run_ms += (finished - started) * 1000
+                    self.completed += 1
+
+        future = self._executor.submit(timed)
+        # Also runs when a cancelled caller drops a call before it started
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(self.total_wait_ms / completed, 2) if completed else None,
+            "max_queue_wait_ms": round(self.max_wait_ms, 2),
+            "avg_run_ms": round(self.total_run_ms / completed, 2) if completed else None,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordHasherPool()
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await password_pool.run(verify_and_update_password, plain, hashed)
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, insert, or_, update
+from sqlalchemy.orm import Session, aliased
+
+from app.models.job import Job, DeadLetterJob
+
+
+def enqueue_jobs(db: Session, queue: str, jobs: Iterable[Tuple[Optional[str], Any]]) -> int:
+    """Insert ``(ordering_key, payload)`` jobs in one statement; returns how many"""
+    now = datetime.utcnow()
+    rows = [
+        {"queue": queue, "ordering_key": key, "payload": payload, "status": "pending",
+         "attempts": 0, "available_at": now, "created_at": now}
+        for key, payload in jobs
+    ]
+    if rows:
+        db.execute(insert(Job), rows)
+        db.commit()
+    return len(rows)
+
+
+def _claimable(now: datetime, stale_before: datetime):
+    due = and_(Job.status == "pending", Job.available_at <= now)
+    # A worker that died mid-job leaves it running; take it over after the lock timeout
+    abandoned = and_(Job.status == "running", Job.locked_at < stale_before)
+    return or_(due, abandoned)
+
+
+def claim_jobs(db: Session, queues: List[str], limit: int, lock_timeout: float) -> List[Job]:
+    """Lock up to ``limit`` due jobs, each the oldest remaining job of its ordering key.
+
+    A later job of a key only becomes claimable once every earlier one has
+    been completed or dead-lettered, so one key never runs in parallel or out
+    of order. Each claim is a conditional UPDATE, so concurrent workers, also
+    in other processes, never take the same job.
+    """
+    now = datetime.utcnow()
+    claimable = _claimable(now, now - timedelta(seconds=lock_timeout))
+    earlier = aliased(Job)
+    is_head = ~exists().where(
+        earlier.queue == Job.queue,
+        earlier.ordering_key == Job.ordering_key,
+        earlier.id < Job.id
+    )
+    candidate_ids = [
+        job_id for (job_id,) in db.query(Job.id)
+        .filter(Job.queue.in_(queues), claimable, is_head)
+        .order_by(Job.id)
+        .limit(limit)
+    ]
+    claimed_ids = []
+    for job_id in candidate_ids:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable)
+            .values(status="running", locked_at=now, attempts=Job.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed_ids.append(job_id)
+    db.commit()
+    if not claimed_ids:
+        return []
+    return db.query(Job).filter(Job.id.in_(claimed_ids)).order_by(Job.id).all()
+
+
+def _held(job_id: int, attempts: int):
+    # ``attempts`` grows with every claim, so it tells this claim apart from a
+    # later one made after the lock timed out
+    return and_(Job.id == job_id, Job.attempts == attempts, Job.status == "running")
+
+
+def touch_jobs(db: Session, claims: Dict[int, int]) -> int:
+    """Refresh the lock of running ``{job_id: attempts}`` claims; returns how many are still held"""
+    now = datetime.utcnow()
+    held = 0
+    for job_id, attempts in claims.items():
+        held += db.execute(update(Job).where(_held(job_id, attempts)).values(locked_at=now)).rowcount
+    db.commit()
+    return held
+
+
+def complete_job(db: Session, job_id: int, attempts: int) -> bool:
+    """Delete a finished job; False when the claim was lost to another worker"""
+    deleted = db.query(Job).filter(_held(job_id, attempts)).delete(synchronize_session=False)
+    db.commit()
+    return deleted == 1
+
+
+def fail_job(db: Session, job_id: int, attempts: int, error: str, max_attempts: int, retry_delay: float) -> str:
+    """Schedule a retry after ``retry_delay`` seconds, or dead-letter the job once
+    it has used ``max_attempts``.
+
+    Returns "retried", "dead_lettered", or "lost" when another worker has
+    claimed the job since, in which case nothing is changed.
+    """
+    job = db.query(Job).filter(_held(job_id, attempts)).with_for_update().first()
+    if job is None:
+        return "lost"
+    if job.attempts >= max_attempts:
+        db.add(DeadLetterJob(
+            job_id=job.id, queue=job.queue, ordering_key=job.ordering_key, payload=job.payload,
+            attempts=job.attempts, last_error=error, created_at=job.created_at
+        ))
+        db.delete(job)
+        db.commit()
+        return "dead_lettered"
+    job.status = "pending"
+    job.locked_at = None
+    job.last_error = error
+    job.available_at = datetime.utcnow() + timedelta(seconds=retry_delay)
+    db.commit()
+    return "retried"
+
+
+def get_job_counts(db: Session) -> Dict[str, Dict[str, int]]:
+    """Jobs per queue and status, plus dead letters per queue"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for queue, status, count in db.query(Job.queue, Job.status, func.count()).group_by(Job.queue, Job.status):
+        counts.setdefault(queue, {})[status] = count
+    for queue, count in db.query(DeadLetterJob.queue, func.count()).group_by(DeadLetterJob.queue):
+        counts.setdefault(queue, {})["dead_letter"] = count
+    return counts
+
+
+def get_dead_letter_jobs(db: Session, queue: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[DeadLetterJob]:
+    query = db.query(DeadLetterJob)
+    if queue:
+        query = query.filter(DeadLetterJob.queue == queue)
+    return query.order_by(DeadLetterJob.id.desc()).offset(skip).limit(limit).all()
+
+
+def retry_dead_letter_job(db: Session, dead_letter_id: int) -> Optional[Job]:
+    """Move a dead letter back onto its queue as a fresh job"""
+    dead_letter = db.query(DeadLetterJob).filter(DeadLetterJob.id == dead_letter_id).first()
+    if dead_letter is None:
+        return None
+    job = Job(
+        queue=dead_letter.queue, ordering_key=dead_letter.ordering_key, payload=dead_letter.payload,
+        status="pending", attempts=0, available_at=datetime.utcnow(), created_at=datetime.utcnow()
+    )
+    db.add(job)
+    db.delete(dead_letter)
+    db.commit()
+    db.refresh(job)
+    return job
@@ -1,7 +1,92 @@
+from sqlalchemy import func, tuple_, delete, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from app.models.lead import Lead, LeadStatusChange, LeadNote
+from typing import Dict, Tuple
+from app.core.config import settings
+from app.core.lead_search import apply_lead_search
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.lead import Lead, LeadStatusChange, LeadNote, LeadCounter, StatusChoices
 from app.schemas.lead import LeadCreate, LeadUpdate, LeadStatusChangeCreate, LeadStatusChangeUpdate, LeadNoteCreate, LeadNoteUpdate
 
+# Lead counters
+UNASSIGNED = 0
+
+def _status_key(status) -> str:
+    if status is None:
+        return ""
+    if isinstance(status, StatusChoices):
+        return status.value
+    try:
+        return StatusChoices(status).value
+    except ValueError:
+        return StatusChoices[status].value if status in StatusChoices.__members__ else str(status)
+
+def _counter_key(lead: Lead) -> Tuple[int, str]:
+    return (lead.assigned_user_id or UNASSIGNED, _status_key(lead.status))
+
+def _bump_lead_counters(db: Session, deltas: Dict[Tuple[int, str], int]) -> None:
+    """Apply count changes in the caller's transaction, creating missing counters"""
+    if not settings.LEAD_COUNTERS_ENABLED:
+        return
+    dialect = db.get_bind().dialect.name
+    for (user_id, status), delta in deltas.items():
+        if not delta:
+            continue
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+            stmt = dialect_insert(LeadCounter).values(assigned_user_id=user_id, status=status, lead_count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["assigned_user_id", "status"],
+                set_={"lead_count": LeadCounter.lead_count + stmt.excluded.lead_count}
+            )
+            db.execute(stmt)
+        else:
+            counter = db.query(LeadCounter).filter_by(assigned_user_id=user_id, status=status).with_for_update().first()
+            if counter:
+                counter.lead_count += delta
+            else:
+                db.add(LeadCounter(assigned_user_id=user_id, status=status, lead_count=delta))
+
+def _move_lead_counter(db: Session, old_key: Tuple[int, str], new_key: Tuple[int, str]) -> None:
+    if old_key != new_key:
+        _bump_lead_counters(db, {old_key: -1, new_key: 1})
+
+def count_leads_from_counters(db: Session, user_id: int = None, status: str = None) -> int:
+    """Unfiltered lead count read from the counters instead of the lead table"""
+    query = db.query(func.coalesce(func.sum(LeadCounter.lead_count), 0))
+    if user_id is not None:
+        query = query.filter(LeadCounter.assigned_user_id == user_id)
+    if status:
+        query = query.filter(LeadCounter.status == _status_key(status))
+    return query.scalar()
+
+def reconcile_lead_counters(db: Session) -> int:
+    """Rebuild the counters from the lead table; returns how many keys had drifted"""
+    if db.get_bind().dialect.name == "postgresql":
+        # Waits for in-flight lead writes and holds back new ones until the rebuild commits
+        db.execute(text(f"LOCK TABLE {LeadCounter.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+    actual: Dict[Tuple[int, str], int] = {}
+    for user_id, status, count in db.query(Lead.assigned_user_id, Lead.status, func.count()).group_by(
+        Lead.assigned_user_id, Lead.status
+    ):
+        key = (user_id or UNASSIGNED, _status_key(status))
+        actual[key] = actual.get(key, 0) + count
+    stored = {
+        (counter.assigned_user_id, counter.status): counter.lead_count
+        for counter in db.query(LeadCounter)
+    }
+    drifted = sum(1 for key in set(actual) | set(stored) if actual.get(key, 0) != stored.get(key, 0))
+    if drifted:
+        db.execute(delete(LeadCounter))
+        db.add_all(
+            LeadCounter(assigned_user_id=user_id, status=status, lead_count=count)
+            for (user_id, status), count in actual.items()
+        )
+    db.commit()
+    return drifted
+
+
 def create_lead(db: Session, lead_in: LeadCreate, user_id: int = None):
     # Use the assigned_user_id from the request if provided, otherwise use the current user's ID (if any)
     assigned_id = lead_in.assigned_user_id if lead_in.assigned_user_id is not None else user_id
@@ -11,51 +96,93 @@ def create_lead(db: Session, lead_in: LeadCreate, user_id: int = None):
     lead = Lead(**lead_data, assigned_user_id=assigned_id)
     
     db.add(lead)
+    db.flush()  # apply column defaults such as status before counting
+    _bump_lead_counters(db, {_counter_key(lead): 1})
     db.commit()
     db.refresh(lead)
     return lead
 
 
-def get_user_leads(db: Session, user_id: int, skip: int = 0, limit: int = 100, search: str = None, status: str = None):
-    """Get leads assigned to a specific user with filtering options"""
-    # Start with a query base
+def _filter_leads(db: Session, user_id: int = None, search: str = None, status: str = None,
+                  search_mode: str = "contains"):
+    """Filtered lead query shared by every listing and count; returns (query, rank)"""
     query = db.query(Lead)
+    rank = None
     
-    # Apply filters
-    query = query.filter(Lead.assigned_user_id == user_id)
+    if user_id is not None:
+        query = query.filter(Lead.assigned_user_id == user_id)
     
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Lead.name.ilike(search_term)) | 
-            (Lead.email.ilike(search_term)) |
-            (Lead.phone.ilike(search_term))
-        )
+        query, rank = apply_lead_search(query, search, search_mode)
     
     if status:
         query = query.filter(Lead.status == status)
     
-    # Order, paginate and execute
-    return query.order_by(Lead.created_at.desc()).offset(skip).limit(limit).all()
+    return query, rank
+
+def _order_leads(query, rank=None, sort: str = "created_at"):
+    if sort == "relevance" and rank is not None:
+        return query.order_by(rank.desc(), Lead.created_at.desc(), Lead.id.desc())
+    return query.order_by(Lead.created_at.desc(), Lead.id.desc())
+
+def get_user_leads(db: Session, user_id: int, skip: int = 0, limit: int = 100, search: str = None, status: str = None,
+                   search_mode: str = "contains", sort: str = "created_at"):
+    """Get leads assigned to a specific user with filtering options"""
+    query, rank = _filter_leads(db, user_id, search, status, search_mode)
+    return _order_leads(query, rank, sort).offset(skip).limit(limit).all()
 
-def get_user_leads_count(db: Session, user_id: int, search: str = None, status: str = None):
+def get_user_leads_count(db: Session, user_id: int, search: str = None, status: str = None, search_mode: str = "contains"):
     """Count leads assigned to a specific user with filtering options"""
-    query = db.query(Lead).filter(Lead.assigned_user_id == user_id)
-    
-    # Apply filters if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Lead.name.ilike(search_term)) | 
-            (Lead.email.ilike(search_term)) |
-            (Lead.phone.ilike(search_term))
-        )
-    
-    if status:
-        query = query.filter(Lead.status == status)
-        
+    if not search and settings.LEAD_COUNTERS_ENABLED:
+        return count_leads_from_counters(db, user_id, status)
+    query, _ = _filter_leads(db, user_id, search, status, search_mode)
     return query.count()
 
+def get_leads_page(db: Session, user_id: int = None, limit: int = 50, search: str = None, status: str = None,
+                   search_mode: str = "contains", sort: str = "created_at", cursor: str = None, skip: int = 0,
+                   include_total: bool = None):
+    """One page of leads with its total and the cursor of the next page.
+
+    The first page gets its total from ``count(*) OVER ()`` in the same
+    statement as the rows, so listing and counting cost one round trip.
+    Cursor pages seek past the previous page on ``(created_at, id)`` and skip
+    the count unless ``include_total`` asks for it. Relevance ordering pages
+    with ``skip`` only. Raises ``InvalidCursor`` for a malformed cursor.
+    """
+    query, rank = _filter_leads(db, user_id, search, status, search_mode)
+    if include_total is None:
+        include_total = cursor is None
+
+    total = None
+    if include_total and cursor:
+        total = query.count()
+
+    by_relevance = sort == "relevance" and rank is not None
+    page_query = _order_leads(query, rank, sort)
+    if cursor and not by_relevance:
+        created_at, lead_id = decode_cursor(cursor)
+        page_query = page_query.filter(tuple_(Lead.created_at, Lead.id) < tuple_(created_at, lead_id))
+    elif skip:
+        page_query = page_query.offset(skip)
+
+    if include_total and not cursor:
+        rows = page_query.add_columns(func.count().over().label("total")).limit(limit + 1).all()
+        leads = [lead for lead, _ in rows]
+        if rows:
+            total = rows[0].total
+        else:
+            # Past the last row the window has nothing to report
+            total = query.count() if skip else 0
+    else:
+        leads = page_query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(leads) > limit:
+        leads = leads[:limit]
+        if not by_relevance:
+            next_cursor = encode_cursor(leads[-1].created_at, leads[-1].id)
+    return leads, total, next_cursor
+
 def update_lead(db: Session, lead_id: int, lead_update: LeadUpdate):
     """Update a lead by ID"""
     lead = db.query(Lead).filter(Lead.id == lead_id).first()
@@ -69,8 +196,10 @@ def update_lead(db: Session, lead_id: int, lead_update: LeadUpdate):
                     new_status=new_status,
                     changed_by_id=lead.assigned_user_id
                 ))
+        old_key = _counter_key(lead)
         for field, value in lead_update.model_dump(exclude_unset=True).items():
             setattr(lead, field, value)
+        _move_lead_counter(db, old_key, _counter_key(lead))
         db.commit()
         db.refresh(lead)
     return lead
@@ -79,45 +208,21 @@ def delete_lead(db: Session, lead_id: int):
     """Delete a lead by ID"""
     lead = db.query(Lead).filter(Lead.id == lead_id).first()
     if lead:
+        _bump_lead_counters(db, {_counter_key(lead): -1})
         db.delete(lead)
         db.commit()
     return lead
 
-def get_all_leads(db: Session, skip: int = 0, limit: int = 100, search: str = None, status: str = None):
+def get_all_leads(db: Session, skip: int = 0, limit: int = 100, search: str = None, status: str = None,
+                  search_mode: str = "contains", sort: str = "created_at"):
     """Get all leads with filtering options"""
-    # Start with a query base
-    query = db.query(Lead)
-    
-    # Apply filters if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Lead.name.ilike(search_term)) | 
-            (Lead.email.ilike(search_term)) |
-            (Lead.phone.ilike(search_term))
-        )
-    
-    if status:
-        query = query.filter(Lead.status == status)
-        
-    # Apply pagination
-    return query.order_by(Lead.created_at.desc()).offset(skip).limit(limit).all()
+    query, rank = _filter_leads(db, None, search, status, search_mode)
+    return _order_leads(query, rank, sort).offset(skip).limit(limit).all()
 
-def get_leads_count(db: Session, search: str = None, status: str = None):
-    query = db.query(Lead)
-    
-    # Apply filters if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Lead.name.ilike(search_term)) | 
-            (Lead.email.ilike(search_term)) |
-            (Lead.phone.ilike(search_term))
-        )
-    
-    if status:
-        query = query.filter(Lead.status == status)
-        
+def get_leads_count(db: Session, search: str = None, status: str = None, search_mode: str = "contains"):
+    if not search and settings.LEAD_COUNTERS_ENABLED:
+        return count_leads_from_counters(db, None, status)
+    query, _ = _filter_leads(db, None, search, status, search_mode)
     return query.count()
 
 def get_lead_by_id(db: Session, lead_id: int):
@@ -194,8 +299,10 @@ def update_lead_by_platform_id(db: Session, platform_id: str, lead_update: LeadU
     """Update a lead by its platform-specific ID"""
     lead = get_lead_by_platform_id(db, platform_id)
     if lead:
+        old_key = _counter_key(lead)
         for field, value in lead_update.model_dump(exclude_unset=True).items():
             setattr(lead, field, value)
+        _move_lead_counter(db, old_key, _counter_key(lead))
         db.commit()
         db.refresh(lead)
     return lead
@@ -0,0 +1,82 @@
+"""Async variants of the lead CRUD functions for ``AsyncSession``.
+
+Simple reads and inserts are native async statements. Functions with shared
+filtering, search or counter bookkeeping run the sync implementation from
+``app.crud.lead`` through ``AsyncSession.run_sync``, which issues the same SQL
+on the async connection without blocking the event loop.
+"""
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import lead as crud_lead
+from app.models.lead import Lead, LeadNote, LeadStatusChange
+from app.schemas.lead import LeadCreate, LeadUpdate, LeadNoteCreate
+
+
+async def create_lead(db: AsyncSession, lead_in: LeadCreate, user_id: int = None) -> Lead:
+    return await db.run_sync(crud_lead.create_lead, lead_in, user_id)
+
+async def get_lead_by_id(db: AsyncSession, lead_id: int) -> Optional[Lead]:
+    return await db.scalar(select(Lead).where(Lead.id == lead_id))
+
+async def get_lead_by_platform_id(db: AsyncSession, platform_id: str) -> Optional[Lead]:
+    """Retrieve a lead by its platform-specific ID"""
+    return await db.scalar(select(Lead).where(Lead.platform_id == platform_id).limit(1))
+
+async def get_user_leads(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100, search: str = None,
+                         status: str = None, search_mode: str = "contains", sort: str = "created_at") -> List[Lead]:
+    """Get leads assigned to a specific user with filtering options"""
+    return await db.run_sync(crud_lead.get_user_leads, user_id, skip, limit, search, status, search_mode, sort)
+
+async def get_user_leads_count(db: AsyncSession, user_id: int, search: str = None, status: str = None,
+                               search_mode: str = "contains") -> int:
+    return await db.run_sync(crud_lead.get_user_leads_count, user_id, search, status, search_mode)
+
+async def get_all_leads(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, status: str = None,
+                        search_mode: str = "contains", sort: str = "created_at") -> List[Lead]:
+    return await db.run_sync(crud_lead.get_all_leads, skip, limit, search, status, search_mode, sort)
+
+async def get_leads_count(db: AsyncSession, search: str = None, status: str = None,
+                          search_mode: str = "contains") -> int:
+    return await db.run_sync(crud_lead.get_leads_count, search, status, search_mode)
+
+async def get_leads_page(db: AsyncSession, user_id: int = None, limit: int = 50, search: str = None,
+                         status: str = None, search_mode: str = "contains", sort: str = "created_at",
+                         cursor: str = None, skip: int = 0, include_total: bool = None):
+    """One page of leads with its total and next cursor, see ``crud.lead.get_leads_page``"""
+    return await db.run_sync(
+        crud_lead.get_leads_page, user_id=user_id, limit=limit, search=search, status=status,
+        search_mode=search_mode, sort=sort, cursor=cursor, skip=skip, include_total=include_total
+    )
+
+async def update_lead(db: AsyncSession, lead_id: int, lead_update: LeadUpdate) -> Optional[Lead]:
+    return await db.run_sync(crud_lead.update_lead, lead_id, lead_update)
+
+async def delete_lead(db: AsyncSession, lead_id: int) -> Optional[Lead]:
+    return await db.run_sync(crud_lead.delete_lead, lead_id)
+
+async def create_lead_note(db: AsyncSession, lead_id: int, note_in: LeadNoteCreate) -> LeadNote:
+    note = LeadNote(**note_in.dict(), lead_id=lead_id)
+    db.add(note)
+    await db.commit()
+    await db.refresh(note)
+    return note
+
+async def get_lead_notes_by_lead_id(db: AsyncSession, lead_id: int, skip: int = 0, limit: int = 100) -> List[LeadNote]:
+    """Get all notes for a specific lead with pagination"""
+    result = await db.scalars(
+        select(LeadNote).where(LeadNote.lead_id == lead_id)
+        .order_by(LeadNote.created_at.desc()).offset(skip).limit(limit)
+    )
+    return list(result)
+
+async def get_lead_status_changes_by_lead_id(db: AsyncSession, lead_id: int, skip: int = 0,
+                                             limit: int = 100) -> List[LeadStatusChange]:
+    """Get all status changes for a specific lead with pagination"""
+    result = await db.scalars(
+        select(LeadStatusChange).where(LeadStatusChange.lead_id == lead_id)
+        .order_by(LeadStatusChange.timestamp.desc()).offset(skip).limit(limit)
+    )
+    return list(result)
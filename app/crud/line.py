@@ -1,14 +1,172 @@
+from datetime import datetime
+from typing import Any, Dict, List, Iterable, Optional
+
+from sqlalchemy import select, insert, func, case, or_, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from app.models.line import LineMessage, LineUser
+from app.core.pagination import Page, keyset_page
+from app.models.line import LineMessage, LineUser, LineConversation
 from app.schemas.line import LineMessageCreate, LineUserCreate
 
+# Conversation summaries
+def _conversation_changes(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-user message and unread counts and latest message of new rows"""
+    changes: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if not row.get("user_id"):
+            continue
+        change = changes.setdefault(row["user_id"], {"message_count": 0, "unread_count": 0, "latest": row})
+        change["message_count"] += 1
+        if not row.get("is_read"):
+            change["unread_count"] += 1
+        if (row["timestamp"], row["id"]) > (change["latest"]["timestamp"], change["latest"]["id"]):
+            change["latest"] = row
+    return changes
+
+def _bump_conversations(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    """Fold newly inserted messages into their conversation summaries, in the caller's transaction"""
+    dialect = db.get_bind().dialect.name
+    now = datetime.utcnow()
+    for user_id, change in _conversation_changes(rows).items():
+        latest = change["latest"]
+        values = {
+            "user_id": user_id,
+            "last_message_id": latest["id"],
+            "last_message_text": latest.get("message_text"),
+            "last_message_type": latest.get("message_type"),
+            "last_message_at": latest["timestamp"],
+            "unread_count": change["unread_count"],
+            "message_count": change["message_count"],
+            "updated_at": now,
+        }
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+            stmt = dialect_insert(LineConversation).values(**values)
+            excluded = stmt.excluded
+            # Messages can arrive out of order; keep the newest as the last message
+            newer = or_(
+                LineConversation.last_message_at.is_(None),
+                excluded.last_message_at > LineConversation.last_message_at,
+                and_(
+                    excluded.last_message_at == LineConversation.last_message_at,
+                    excluded.last_message_id > LineConversation.last_message_id
+                )
+            )
+            last = {
+                column: case((newer, getattr(excluded, column)), else_=getattr(LineConversation, column))
+                for column in ("last_message_id", "last_message_text", "last_message_type", "last_message_at")
+            }
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    **last,
+                    "unread_count": LineConversation.unread_count + excluded.unread_count,
+                    "message_count": LineConversation.message_count + excluded.message_count,
+                    "updated_at": now,
+                }
+            ))
+        else:
+            conversation = db.query(LineConversation).filter_by(user_id=user_id).with_for_update().first()
+            if conversation is None:
+                db.add(LineConversation(**values))
+                continue
+            if conversation.last_message_at is None or (latest["timestamp"], latest["id"]) > (
+                conversation.last_message_at, conversation.last_message_id
+            ):
+                for column in ("last_message_id", "last_message_text", "last_message_type", "last_message_at"):
+                    setattr(conversation, column, values[column])
+            conversation.unread_count += change["unread_count"]
+            conversation.message_count += change["message_count"]
+
+def _adjust_unread(db: Session, user_id: Optional[str], delta: int) -> None:
+    """Add ``delta`` to one user's unread counter, never below zero, in the caller's transaction"""
+    if not user_id or not delta:
+        return
+    unread = LineConversation.unread_count + delta
+    db.query(LineConversation).filter(LineConversation.user_id == user_id).update(
+        {"unread_count": case((unread > 0, unread), else_=0), "updated_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+
+def refresh_conversation(db: Session, user_id: Optional[str]) -> None:
+    """Recompute one user's summary from line_message, in the caller's transaction"""
+    if not user_id:
+        return
+    conversation = db.query(LineConversation).filter_by(user_id=user_id).with_for_update().first()
+    latest = db.query(LineMessage).filter(LineMessage.user_id == user_id).order_by(
+        LineMessage.timestamp.desc(), LineMessage.id.desc()
+    ).first()
+    if latest is None:
+        if conversation is not None:
+            db.delete(conversation)
+        return
+    message_count, unread_count = db.query(
+        func.count(LineMessage.id),
+        func.coalesce(func.sum(case((LineMessage.is_read.is_(True), 0), else_=1)), 0)
+    ).filter(LineMessage.user_id == user_id).one()
+    if conversation is None:
+        conversation = LineConversation(user_id=user_id)
+        db.add(conversation)
+    conversation.last_message_id = latest.id
+    conversation.last_message_text = latest.message_text
+    conversation.last_message_type = latest.message_type
+    conversation.last_message_at = latest.timestamp
+    conversation.message_count = message_count
+    conversation.unread_count = unread_count
+
+def rebuild_line_conversations(db: Session) -> int:
+    """Recompute every conversation summary; returns how many users have messages"""
+    user_ids = [user_id for (user_id,) in db.query(LineMessage.user_id).filter(
+        LineMessage.user_id.is_not(None)
+    ).distinct()]
+    db.query(LineConversation).filter(LineConversation.user_id.not_in(user_ids)).delete(synchronize_session=False)
+    for user_id in user_ids:
+        refresh_conversation(db, user_id)
+    db.commit()
+    return len(user_ids)
+
+def _message_row(message: LineMessage) -> Dict[str, Any]:
+    return {column.key: getattr(message, column.key) for column in LineMessage.__table__.columns}
+
+
 def create_line_message(db: Session, message_in: LineMessageCreate):
     message = LineMessage(**message_in.dict())
     db.add(message)
+    db.flush()  # apply the timestamp and is_read defaults before summarizing
+    _bump_conversations(db, [_message_row(message)])
     db.commit()
     db.refresh(message)
     return message
 
+def create_line_messages_bulk(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert prepared message rows in one statement and return the stored rows.
+
+    Rows whose ``webhook_event_id`` is already stored are skipped, so a
+    redelivered webhook event is saved once. Only inserted rows are returned.
+    """
+    if not rows:
+        return []
+    table = LineMessage.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = dialect_insert(table).on_conflict_do_nothing(index_elements=["webhook_event_id"])
+    else:
+        event_ids = [row["webhook_event_id"] for row in rows if row.get("webhook_event_id")]
+        stored = set(db.scalars(
+            select(LineMessage.webhook_event_id).where(LineMessage.webhook_event_id.in_(event_ids))
+        )) if event_ids else set()
+        rows = [row for row in rows if row.get("webhook_event_id") not in stored]
+        if not rows:
+            return []
+        stmt = insert(table)
+    result = db.execute(stmt.returning(*table.c), rows)
+    created = [dict(row) for row in result.mappings()]
+    _bump_conversations(db, created)
+    db.commit()
+    return created
+
 def create_line_user(db: Session, user_in: LineUserCreate):
     user = LineUser(**user_in.dict())
     db.add(user)
@@ -22,19 +180,50 @@ def get_line_message(db: Session, message_id: int):
 def get_line_user(db: Session, user_id: str):
     return db.query(LineUser).filter(LineUser.user_id == user_id).first()
 
+# Message fields shown in the conversation summary besides the read flag
+_SUMMARY_FIELDS = ("user_id", "message_text", "message_type", "timestamp")
+
 def update_line_message(db: Session, message_id: int, message_in: LineMessageCreate):
     message = db.query(LineMessage).filter(LineMessage.id == message_id).first()
     if message:
+        previous_user_id = message.user_id
+        previous = {field: getattr(message, field) for field in _SUMMARY_FIELDS}
+        was_read = bool(message.is_read)
         for key, value in message_in.dict(exclude_unset=True).items():
             setattr(message, key, value)
+        db.flush()
+        if all(getattr(message, field) == value for field, value in previous.items()):
+            # Only the read flag can have changed: adjust the counter instead of recounting
+            _adjust_unread(db, message.user_id, int(was_read) - int(bool(message.is_read)))
+        else:
+            refresh_conversation(db, previous_user_id)
+            if message.user_id != previous_user_id:
+                refresh_conversation(db, message.user_id)
         db.commit()
         db.refresh(message)
     return message
 
+def mark_conversation_read(db: Session, user_id: str, up_to_message_id: Optional[int] = None) -> int:
+    """Mark a user's unread messages read in one UPDATE; returns how many were marked.
+
+    ``up_to_message_id`` limits it to messages the agent has seen, so one
+    arriving meanwhile stays unread. The unread counter changes in the same
+    transaction as the messages.
+    """
+    query = db.query(LineMessage).filter(LineMessage.user_id == user_id, LineMessage.is_read.is_not(True))
+    if up_to_message_id is not None:
+        query = query.filter(LineMessage.id <= up_to_message_id)
+    marked = query.update({"is_read": True}, synchronize_session=False)
+    _adjust_unread(db, user_id, -marked)
+    db.commit()
+    return marked
+
 def delete_line_message(db: Session, message_id: int):
     message = db.query(LineMessage).filter(LineMessage.id == message_id).first()
     if message:
         db.delete(message)
+        db.flush()
+        refresh_conversation(db, message.user_id)
         db.commit()
     return message
 
@@ -58,4 +247,22 @@ def get_all_line_messages(db: Session, skip: int = 0, limit: int = 100):
     return db.query(LineMessage).offset(skip).limit(limit).all()
 
 def get_all_line_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(LineUser).offset(skip).limit(limit).all()
\ No newline at end of file
+    return db.query(LineUser).offset(skip).limit(limit).all()
+
+def get_user_messages(db: Session, user_id: str, limit: int = 50, cursor: Optional[str] = None,
+                      count: str = "none") -> Page:
+    """Chat history of one LINE user, newest first, paged by (timestamp, id)"""
+    query = db.query(LineMessage).filter(LineMessage.user_id == user_id)
+    return keyset_page(query, LineMessage.timestamp, LineMessage.id, limit, cursor=cursor, count=count)
+
+def get_inbox(db: Session, limit: int = 50, cursor: Optional[str] = None, unread_only: bool = False,
+              count: str = "none") -> Page:
+    """Conversations by most recent message, paged by (last_message_at, user_id)"""
+    query = db.query(LineConversation).filter(LineConversation.last_message_at.is_not(None))
+    if unread_only:
+        query = query.filter(LineConversation.unread_count > 0)
+    return keyset_page(query, LineConversation.last_message_at, LineConversation.user_id, limit,
+                       cursor=cursor, count=count)
+
+def get_conversation(db: Session, user_id: str) -> Optional[LineConversation]:
+    return db.query(LineConversation).filter(LineConversation.user_id == user_id).first()
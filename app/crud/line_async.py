@@ -0,0 +1,60 @@
+"""Async variants of the LINE message and user CRUD functions for ``AsyncSession``.
+
+Message writes and history paging run the sync implementation from
+``app.crud.line`` through ``AsyncSession.run_sync`` so the conversation
+summaries are maintained in one place.
+"""
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import Page
+from app.crud import line as crud_line
+from app.models.line import LineMessage, LineUser, LineConversation
+from app.schemas.line import LineMessageCreate, LineUserCreate
+
+
+async def create_line_message(db: AsyncSession, message_in: LineMessageCreate) -> LineMessage:
+    # Goes through the sync implementation so the conversation summary is kept
+    return await db.run_sync(crud_line.create_line_message, message_in)
+
+async def create_line_user(db: AsyncSession, user_in: LineUserCreate) -> LineUser:
+    user = LineUser(**user_in.dict())
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+async def get_line_message(db: AsyncSession, message_id: int) -> Optional[LineMessage]:
+    return await db.scalar(select(LineMessage).where(LineMessage.id == message_id))
+
+async def get_line_user(db: AsyncSession, user_id: str) -> Optional[LineUser]:
+    return await db.scalar(select(LineUser).where(LineUser.user_id == user_id).limit(1))
+
+async def update_line_message(db: AsyncSession, message_id: int, message_in: LineMessageCreate) -> Optional[LineMessage]:
+    return await db.run_sync(crud_line.update_line_message, message_id, message_in)
+
+async def delete_line_message(db: AsyncSession, message_id: int) -> Optional[LineMessage]:
+    return await db.run_sync(crud_line.delete_line_message, message_id)
+
+async def get_all_line_messages(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[LineMessage]:
+    return list(await db.scalars(select(LineMessage).offset(skip).limit(limit)))
+
+async def get_all_line_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[LineUser]:
+    return list(await db.scalars(select(LineUser).offset(skip).limit(limit)))
+
+async def get_user_messages(db: AsyncSession, user_id: str, limit: int = 50, cursor: Optional[str] = None,
+                            count: str = "none") -> Page:
+    """Chat history of one LINE user, see ``crud.line.get_user_messages``"""
+    return await db.run_sync(crud_line.get_user_messages, user_id, limit, cursor, count)
+
+async def get_inbox(db: AsyncSession, limit: int = 50, cursor: Optional[str] = None, unread_only: bool = False,
+                    count: str = "none") -> Page:
+    return await db.run_sync(crud_line.get_inbox, limit, cursor, unread_only, count)
+
+async def mark_conversation_read(db: AsyncSession, user_id: str, up_to_message_id: Optional[int] = None) -> int:
+    return await db.run_sync(crud_line.mark_conversation_read, user_id, up_to_message_id)
+
+async def get_conversation(db: AsyncSession, user_id: str) -> Optional[LineConversation]:
+    return await db.scalar(select(LineConversation).where(LineConversation.user_id == user_id))
@@ -1,15 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, func, desc, asc, select, true, delete
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import math
 
-from app.models.log import SystemLog, AuditLog, APILog, LogLevel, LogCategory
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.core.log_search import apply_log_search
+from app.core.pagination import InvalidCursor, Page, keyset_page, count_rows
+from app.models.log import SystemLog, AuditLog, APILog, LogLevel, LogCategory, LogRollup, LogRollupState, LogRetentionJob
 from app.schemas.log import (
     SystemLogCreate, SystemLogUpdate, AuditLogCreate, APILogCreate,
     LogFilter, LogStatsFilter, LogStats, LogAnalytics
 )
 
+LOG_TABLES = {
+    "system": SystemLog.__table__,
+    "audit": AuditLog.__table__,
+    "api": APILog.__table__,
+}
+
+def insert_log_rows(conn: Connection, kind: str, rows: List[Dict[str, Any]]) -> None:
+    """Insert prepared log rows into the given log table as a multi-row INSERT"""
+    if rows:
+        conn.execute(LOG_TABLES[kind].insert(), rows)
+
 # System Log CRUD
 def create_system_log(db: Session, log: SystemLogCreate) -> SystemLog:
     """Create a new system log entry"""
@@ -27,9 +46,11 @@ def get_system_logs(
     db: Session, 
     skip: int = 0, 
     limit: int = 100,
-    filters: Optional[LogFilter] = None
-) -> tuple[List[SystemLog], int]:
-    """Get system logs with filtering and pagination"""
+    filters: Optional[LogFilter] = None,
+    cursor: Optional[str] = None,
+    count: str = "exact"
+) -> Page:
+    """Get system logs with filtering and offset or cursor pagination"""
     query = db.query(SystemLog)
     
     if filters:
@@ -48,17 +69,16 @@ def get_system_logs(
         if filters.endpoint:
             query = query.filter(SystemLog.endpoint.ilike(f"%{filters.endpoint}%"))
         if filters.search_text:
-            query = query.filter(
-                or_(
-                    SystemLog.message.ilike(f"%{filters.search_text}%"),
-                    SystemLog.module.ilike(f"%{filters.search_text}%"),
-                    SystemLog.function_name.ilike(f"%{filters.search_text}%")
-                )
-            )
+            query, rank = apply_log_search(query, filters.search_text)
+            if filters.sort_by_relevance and rank is not None:
+                # Ranks are not stable positions to resume from; relevance pages by offset
+                if cursor:
+                    raise InvalidCursor("Cursor pagination is not supported with sort_by_relevance; use page")
+                total, is_estimate = count_rows(query, count)
+                logs = query.order_by(desc(rank), desc(SystemLog.id)).offset(skip).limit(limit).all()
+                return Page(logs, total, None, is_estimate)
     
-    total = query.count()
-    logs = query.order_by(desc(SystemLog.timestamp)).offset(skip).limit(limit).all()
-    return logs, total
+    return keyset_page(query, SystemLog.timestamp, SystemLog.id, limit, cursor=cursor, skip=skip, count=count)
 
 def update_system_log(db: Session, log_id: int, log_update: SystemLogUpdate) -> Optional[SystemLog]:
     """Update a system log"""
@@ -100,9 +120,11 @@ def get_audit_logs(
     action: Optional[str] = None,
     resource_type: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
-) -> tuple[List[AuditLog], int]:
-    """Get audit logs with filtering and pagination"""
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    count: str = "exact"
+) -> Page:
+    """Get audit logs with filtering and offset or cursor pagination"""
     query = db.query(AuditLog)
     
     if user_id:
@@ -116,9 +138,7 @@ def get_audit_logs(
     if end_date:
         query = query.filter(AuditLog.timestamp <= end_date)
     
-    total = query.count()
-    logs = query.order_by(desc(AuditLog.timestamp)).offset(skip).limit(limit).all()
-    return logs, total
+    return keyset_page(query, AuditLog.timestamp, AuditLog.id, limit, cursor=cursor, skip=skip, count=count)
 
 # API Log CRUD
 def create_api_log(db: Session, log: APILogCreate) -> APILog:
@@ -142,9 +162,11 @@ def get_api_logs(
     status_code: Optional[int] = None,
     user_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
-) -> tuple[List[APILog], int]:
-    """Get API logs with filtering and pagination"""
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    count: str = "exact"
+) -> Page:
+    """Get API logs with filtering and offset or cursor pagination"""
     query = db.query(APILog)
     
     if endpoint:
@@ -160,50 +182,204 @@ def get_api_logs(
     if end_date:
         query = query.filter(APILog.timestamp <= end_date)
     
-    total = query.count()
-    logs = query.order_by(desc(APILog.timestamp)).offset(skip).limit(limit).all()
-    return logs, total
+    return keyset_page(query, APILog.timestamp, APILog.id, limit, cursor=cursor, skip=skip, count=count)
+
+# Bulk inserts
+def create_logs_bulk(db: Session, log_type: str, logs: List[Any]) -> List[Dict[str, Any]]:
+    """Insert a batch of log entries in one statement and return the stored rows.
+
+    Uses INSERT ... RETURNING, so there is a single commit and no refresh
+    SELECT per entry. Rows come back in the order the entries were given.
+    """
+    if not logs:
+        return []
+    table = LOG_TABLES[log_type]
+    result = db.execute(
+        table.insert().returning(*table.c, sort_by_parameter_order=True),
+        [log.dict() for log in logs]
+    )
+    created = [dict(row) for row in result.mappings()]
+    db.commit()
+    return created
 
 # Analytics and Statistics
-def get_log_statistics(db: Session, filters: Optional[LogStatsFilter] = None) -> LogStats:
-    """Get comprehensive log statistics"""
-    query = db.query(SystemLog)
-    api_query = db.query(APILog)
-    
-    if filters:
-        if filters.start_date:
-            query = query.filter(SystemLog.timestamp >= filters.start_date)
-            api_query = api_query.filter(APILog.timestamp >= filters.start_date)
-        if filters.end_date:
-            query = query.filter(SystemLog.timestamp <= filters.end_date)
-            api_query = api_query.filter(APILog.timestamp <= filters.end_date)
-    
-    # System log stats
-    total_logs = query.count()
-    error_count = query.filter(SystemLog.level == LogLevel.ERROR).count()
-    warning_count = query.filter(SystemLog.level == LogLevel.WARNING).count()
-    info_count = query.filter(SystemLog.level == LogLevel.INFO).count()
-    debug_count = query.filter(SystemLog.level == LogLevel.DEBUG).count()
-    critical_count = query.filter(SystemLog.level == LogLevel.CRITICAL).count()
-    
-    # API log stats
-    total_api_calls = api_query.count()
-    avg_response_time = db.query(func.avg(APILog.response_time_ms)).filter(
-        APILog.timestamp >= (filters.start_date if filters and filters.start_date else datetime.utcnow() - timedelta(days=30))
-    ).scalar()
-    
+ERROR_LEVELS = [LogLevel.ERROR, LogLevel.CRITICAL]
+ROLLUP_GRANULARITIES = ("minute", "hour", "day")
+ROLLUP_KEY_COLUMNS = (
+    "source", "granularity", "bucket_start", "level", "category",
+    "endpoint", "method", "status_code"
+)
+
+_SQLITE_BUCKET_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+def _time_bucket(db: Session, unit: str, column):
+    """SQL expression truncating a timestamp to a minute, hour or day bucket"""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(_SQLITE_BUCKET_FORMATS[unit], column)
+    return func.date_trunc(unit, column)
+
+def _as_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+def _truncate(value: datetime, unit: str) -> datetime:
+    """Truncate a datetime the same way PostgreSQL's date_trunc does"""
+    if unit == "minute":
+        return value.replace(second=0, microsecond=0)
+    if unit == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day
+
+def _high_water_mark(source: str):
+    """Scalar subquery with the last log id already included in the rollups"""
+    return func.coalesce(
+        select(LogRollupState.last_id).where(LogRollupState.source == source).scalar_subquery(),
+        0
+    )
+
+def _rollup_statistics(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    response_time_start: datetime
+):
+    """Aggregate of the per-minute rollups, as a single-row subquery"""
+    conditions = [LogRollup.granularity == "minute"]
+    if start_date:
+        conditions.append(LogRollup.bucket_start >= _truncate(start_date, "minute"))
+    if end_date:
+        conditions.append(LogRollup.bucket_start <= end_date)
+
+    system = LogRollup.source == "system"
+    api = LogRollup.source == "api"
+    timed = LogRollup.bucket_start >= _truncate(response_time_start, "minute")
+
+    def total(column, *where):
+        return func.coalesce(func.sum(column).filter(and_(*where)), 0)
+
+    def level_total(level: LogLevel):
+        return total(LogRollup.log_count, system, LogRollup.level == level.value)
+
+    return select(
+        total(LogRollup.log_count, system).label("rolled_total_logs"),
+        level_total(LogLevel.ERROR).label("rolled_error_count"),
+        level_total(LogLevel.WARNING).label("rolled_warning_count"),
+        level_total(LogLevel.INFO).label("rolled_info_count"),
+        level_total(LogLevel.DEBUG).label("rolled_debug_count"),
+        level_total(LogLevel.CRITICAL).label("rolled_critical_count"),
+        total(LogRollup.log_count, api).label("rolled_total_api_calls"),
+        total(LogRollup.log_count, api, timed).label("rolled_timed_calls"),
+        total(LogRollup.total_response_time_ms, api, timed).label("rolled_total_response_time")
+    ).where(*conditions).subquery()
+
+def get_log_statistics(
+    db: Session,
+    filters: Optional[LogStatsFilter] = None,
+    include_percentiles: bool = False
+) -> LogStats:
+    """Get comprehensive log statistics in a single round-trip.
+
+    System log counts per level come from one grouped aggregate using
+    ``COUNT(*) FILTER``; API call counts and response times from a second
+    aggregate cross-joined into the same statement. With rollups enabled
+    the raw aggregates only cover rows newer than the rollup high-water
+    mark and are added to the per-minute rollups. Response time
+    percentiles need ``percentile_cont`` over raw rows and are only
+    computed on PostgreSQL.
+    """
+    start_date = filters.start_date if filters else None
+    end_date = filters.end_date if filters else None
+    # Response times default to the last 30 days when no start date is given
+    response_time_start = start_date or (datetime.utcnow() - timedelta(days=30))
+    with_percentiles = include_percentiles and db.get_bind().dialect.name == "postgresql"
+    use_rollups = settings.LOG_ROLLUPS_ENABLED and not with_percentiles
+
+    system_conditions = []
+    api_conditions = []
+    if start_date:
+        system_conditions.append(SystemLog.timestamp >= start_date)
+        api_conditions.append(APILog.timestamp >= start_date)
+    if end_date:
+        system_conditions.append(SystemLog.timestamp <= end_date)
+        api_conditions.append(APILog.timestamp <= end_date)
+    if use_rollups:
+        system_conditions.append(SystemLog.id > _high_water_mark("system"))
+        api_conditions.append(APILog.id > _high_water_mark("api"))
+
+    def level_count(level: LogLevel):
+        return func.count().filter(SystemLog.level == level)
+
+    system_stats = select(
+        func.count().label("total_logs"),
+        level_count(LogLevel.ERROR).label("error_count"),
+        level_count(LogLevel.WARNING).label("warning_count"),
+        level_count(LogLevel.INFO).label("info_count"),
+        level_count(LogLevel.DEBUG).label("debug_count"),
+        level_count(LogLevel.CRITICAL).label("critical_count")
+    ).where(*system_conditions).subquery()
+
+    timed = APILog.timestamp >= response_time_start
+    api_columns = [
+        func.count().label("total_api_calls"),
+        func.count().filter(timed).label("timed_calls"),
+        func.coalesce(func.sum(APILog.response_time_ms).filter(timed), 0).label("total_response_time")
+    ]
+    if with_percentiles:
+        for percentile in (50, 95, 99):
+            api_columns.append(
+                func.percentile_cont(percentile / 100)
+                .within_group(APILog.response_time_ms)
+                .filter(timed)
+                .label(f"p{percentile}")
+            )
+    api_stats = select(*api_columns).where(*api_conditions).subquery()
+
+    # Every part returns exactly one row, so joining them is a cross join
+    parts = [system_stats, api_stats]
+    if use_rollups:
+        parts.append(_rollup_statistics(start_date, end_date, response_time_start))
+    stmt = select(*parts).select_from(system_stats)
+    for part in parts[1:]:
+        stmt = stmt.join(part, true())
+    row = db.execute(stmt).one()
+
+    def combined(name: str) -> int:
+        value = int(getattr(row, name) or 0)
+        if use_rollups:
+            value += int(getattr(row, f"rolled_{name}") or 0)
+        return value
+
+    total_logs = combined("total_logs")
+    error_count = combined("error_count")
+    critical_count = combined("critical_count")
+    timed_calls = combined("timed_calls")
+    avg_response_time = combined("total_response_time") / timed_calls if timed_calls else None
+
     # Error rate calculation
     error_rate = (error_count + critical_count) / total_logs * 100 if total_logs > 0 else 0
-    
+
+    def optional_float(value):
+        return float(value) if value is not None else None
+
     return LogStats(
         total_logs=total_logs,
         error_count=error_count,
-        warning_count=warning_count,
-        info_count=info_count,
-        debug_count=debug_count,
+        warning_count=combined("warning_count"),
+        info_count=combined("info_count"),
+        debug_count=combined("debug_count"),
         critical_count=critical_count,
-        avg_response_time_ms=float(avg_response_time) if avg_response_time else None,
-        total_api_calls=total_api_calls,
+        avg_response_time_ms=avg_response_time,
+        p50_response_time_ms=optional_float(row.p50) if with_percentiles else None,
+        p95_response_time_ms=optional_float(row.p95) if with_percentiles else None,
+        p99_response_time_ms=optional_float(row.p99) if with_percentiles else None,
+        total_api_calls=combined("total_api_calls"),
         error_rate_percentage=round(error_rate, 2)
     )
 
@@ -211,7 +387,12 @@ def get_log_analytics(
     db: Session, 
     filters: Optional[LogStatsFilter] = None
 ) -> List[LogAnalytics]:
-    """Get log analytics grouped by time periods"""
+    """Get log analytics grouped by time periods.
+
+    Hourly and daily buckets are read from the rollups; rows above the
+    rollup high-water mark are aggregated from the raw table and merged in.
+    Weekly and monthly periods are built from the daily buckets.
+    """
     if not filters:
         filters = LogStatsFilter()
     
@@ -222,64 +403,296 @@ def get_log_analytics(
     # Group by time period
     if filters.group_by == "hour":
         time_format = "%Y-%m-%d %H:00:00"
-        interval = timedelta(hours=1)
     elif filters.group_by == "day":
         time_format = "%Y-%m-%d"
-        interval = timedelta(days=1)
     elif filters.group_by == "week":
         time_format = "%Y-%U"
-        interval = timedelta(weeks=1)
     else:  # month
         time_format = "%Y-%m"
-        interval = timedelta(days=30)
-    
-    # Query grouped data
-    results = db.query(
-        func.date_trunc(filters.group_by, SystemLog.timestamp).label('time_period'),
-        func.count(SystemLog.id).label('log_count'),
-        func.count(func.nullif(SystemLog.level.in_([LogLevel.ERROR, LogLevel.CRITICAL]), False)).label('error_count')
+    unit = "hour" if filters.group_by == "hour" else "day"
+
+    periods: Dict[datetime, List[int]] = {}
+
+    def add(bucket, log_count, error_count):
+        period = _truncate(_as_datetime(bucket), filters.group_by)
+        totals = periods.setdefault(period, [0, 0])
+        totals[0] += int(log_count or 0)
+        totals[1] += int(error_count or 0)
+
+    high_water = 0
+    if settings.LOG_ROLLUPS_ENABLED:
+        high_water = get_rollup_high_water_mark(db, "system")
+        rolled = db.query(
+            LogRollup.bucket_start,
+            func.sum(LogRollup.log_count),
+            func.sum(LogRollup.error_count)
+        ).filter(
+            LogRollup.source == "system",
+            LogRollup.granularity == unit,
+            LogRollup.bucket_start >= _truncate(start_date, unit),
+            LogRollup.bucket_start <= end_date
+        ).group_by(LogRollup.bucket_start).all()
+        for bucket, log_count, error_count in rolled:
+            add(bucket, log_count, error_count)
+
+    # Raw rows that are not rolled up yet
+    bucket = _time_bucket(db, unit, SystemLog.timestamp)
+    tail = db.query(
+        bucket,
+        func.count(SystemLog.id),
+        func.count().filter(SystemLog.level.in_(ERROR_LEVELS))
     ).filter(
+        SystemLog.id > high_water,
         SystemLog.timestamp >= start_date,
         SystemLog.timestamp <= end_date
-    ).group_by(
-        func.date_trunc(filters.group_by, SystemLog.timestamp)
-    ).order_by(
-        func.date_trunc(filters.group_by, SystemLog.timestamp)
-    ).all()
-    
+    ).group_by(bucket).all()
+    for bucket_start, log_count, error_count in tail:
+        add(bucket_start, log_count, error_count)
+
     analytics = []
-    for result in results:
+    for period in sorted(periods):
+        log_count, error_count = periods[period]
         analytics.append(LogAnalytics(
-            time_period=result.time_period.strftime(time_format),
-            log_count=result.log_count,
-            error_count=result.error_count or 0,
-            timestamp=result.time_period
+            time_period=period.strftime(time_format),
+            log_count=log_count,
+            error_count=error_count,
+            timestamp=period
         ))
     
     return analytics
 
+# Rollups
+def get_rollup_high_water_mark(db: Session, source: str) -> int:
+    """Last log id of the given source included in the rollups"""
+    state = db.query(LogRollupState).filter(LogRollupState.source == source).first()
+    return state.last_id if state else 0
+
+def _upsert_rollups(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Add counts to existing rollup buckets, creating missing ones"""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        for row in rows:
+            key = {k: row[k] for k in ROLLUP_KEY_COLUMNS}
+            existing = db.query(LogRollup).filter_by(**key).with_for_update().first()
+            if existing:
+                existing.log_count += row["log_count"]
+                existing.error_count += row["error_count"]
+                existing.total_response_time_ms += row["total_response_time_ms"]
+            else:
+                db.add(LogRollup(**row))
+        db.flush()
+        return
+
+    dialect_insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    for offset in range(0, len(rows), 500):
+        stmt = dialect_insert(LogRollup).values(rows[offset:offset + 500])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY_COLUMNS),
+            set_={
+                "log_count": LogRollup.log_count + stmt.excluded.log_count,
+                "error_count": LogRollup.error_count + stmt.excluded.error_count,
+                "total_response_time_ms": LogRollup.total_response_time_ms + stmt.excluded.total_response_time_ms,
+            }
+        )
+        db.execute(stmt)
+
+def _rollup_rows(db: Session, source: str, unit: str, low_id: int, high_id: int) -> List[Dict[str, Any]]:
+    if source == "system":
+        bucket = _time_bucket(db, unit, SystemLog.timestamp)
+        results = db.query(
+            bucket, SystemLog.level, SystemLog.category,
+            func.count(),
+            func.count().filter(SystemLog.level.in_(ERROR_LEVELS))
+        ).filter(
+            SystemLog.id > low_id, SystemLog.id <= high_id
+        ).group_by(bucket, SystemLog.level, SystemLog.category).all()
+        return [
+            {
+                "source": source, "granularity": unit, "bucket_start": _as_datetime(bucket_start),
+                "level": level.value, "category": category.value, "endpoint": "", "method": "",
+                "status_code": 0, "log_count": log_count, "error_count": error_count,
+                "total_response_time_ms": 0
+            }
+            for bucket_start, level, category, log_count, error_count in results
+        ]
+
+    bucket = _time_bucket(db, unit, APILog.timestamp)
+    results = db.query(
+        bucket, APILog.endpoint, APILog.method, APILog.status_code,
+        func.count(),
+        func.count().filter(APILog.status_code >= 500),
+        func.sum(APILog.response_time_ms)
+    ).filter(
+        APILog.id > low_id, APILog.id <= high_id
+    ).group_by(bucket, APILog.endpoint, APILog.method, APILog.status_code).all()
+    return [
+        {
+            "source": source, "granularity": unit, "bucket_start": _as_datetime(bucket_start),
+            "level": "", "category": "", "endpoint": endpoint, "method": method,
+            "status_code": status_code, "log_count": log_count, "error_count": error_count,
+            "total_response_time_ms": int(total_response_time or 0)
+        }
+        for bucket_start, endpoint, method, status_code, log_count, error_count, total_response_time in results
+    ]
+
+def rollup_logs(
+    db: Session,
+    batch_size: int = 50000,
+    settle_seconds: int = 30
+) -> Dict[str, int]:
+    """Fold new system and API log rows into the rollup tables.
+
+    Each source is processed from its high-water mark in id order, at most
+    ``batch_size`` rows per call. Rows younger than ``settle_seconds`` are
+    left for the next run so that late-committing inserts are not skipped.
+    Returns the number of rows rolled up per source.
+    """
+    processed = {}
+    settled_before = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    for source, model in (("system", SystemLog), ("api", APILog)):
+        state = db.query(LogRollupState).filter(
+            LogRollupState.source == source
+        ).with_for_update().first()
+        if not state:
+            state = LogRollupState(source=source, last_id=0)
+            db.add(state)
+            db.flush()
+
+        conditions = [model.id > state.last_id]
+        first_unsettled = db.query(func.min(model.id)).filter(
+            model.id > state.last_id, model.timestamp > settled_before
+        ).scalar()
+        if first_unsettled is not None:
+            conditions.append(model.id < first_unsettled)
+        batch = select(model.id).where(*conditions).order_by(model.id).limit(batch_size).subquery()
+        high_id, row_count = db.query(func.max(batch.c.id), func.count()).one()
+
+        if high_id is not None:
+            for unit in ROLLUP_GRANULARITIES:
+                _upsert_rollups(db, _rollup_rows(db, source, unit, state.last_id, high_id))
+            state.last_id = high_id
+        db.commit()
+        processed[source] = row_count
+    return processed
+
+# Export
+def iter_log_export_page(
+    db: Session,
+    log_type: str,
+    after_id: int = 0,
+    limit: int = 5000,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    yield_per: int = 1000
+):
+    """Yield up to ``limit`` raw log rows with an id above ``after_id``.
+
+    Rows are read in id order through a server-side cursor, so callers can
+    page through a whole table with keyset pagination in constant memory.
+    """
+    table = LOG_TABLES[log_type]
+    stmt = select(table).where(table.c.id > after_id)
+    if start_date:
+        stmt = stmt.where(table.c.timestamp >= start_date)
+    if end_date:
+        stmt = stmt.where(table.c.timestamp <= end_date)
+    stmt = stmt.order_by(table.c.id).limit(limit).execution_options(yield_per=yield_per)
+    for row in db.execute(stmt).mappings():
+        yield row
+
 # Utility functions
-def delete_old_logs(db: Session, days_to_keep: int = 30) -> Dict[str, int]:
-    """Delete logs older than specified days"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
-    
-    # Delete old system logs
-    system_deleted = db.query(SystemLog).filter(SystemLog.timestamp < cutoff_date).count()
-    db.query(SystemLog).filter(SystemLog.timestamp < cutoff_date).delete()
-    
-    # Delete old audit logs
-    audit_deleted = db.query(AuditLog).filter(AuditLog.timestamp < cutoff_date).count()
-    db.query(AuditLog).filter(AuditLog.timestamp < cutoff_date).delete()
-    
-    # Delete old API logs
-    api_deleted = db.query(APILog).filter(APILog.timestamp < cutoff_date).count()
-    db.query(APILog).filter(APILog.timestamp < cutoff_date).delete()
-    
+def delete_old_logs_batch(
+    db: Session,
+    log_type: str,
+    cutoff_date: datetime,
+    after_id: int = 0,
+    batch_size: int = 5000
+) -> Tuple[int, Optional[int]]:
+    """Delete one primary-key range of logs older than the cutoff date.
+
+    The range starts at the oldest matching id above ``after_id`` and spans
+    ``batch_size`` ids, so each transaction only locks a bounded set of rows.
+    Returns the number of deleted rows and the last id of the range, or
+    ``None`` when nothing is left to delete.
+    """
+    table = LOG_TABLES[log_type]
+    first_id = db.query(func.min(table.c.id)).filter(
+        table.c.id > after_id, table.c.timestamp < cutoff_date
+    ).scalar()
+    if first_id is None:
+        return 0, None
+
+    last_id = first_id + batch_size - 1
+    result = db.execute(
+        delete(table).where(
+            table.c.id >= first_id,
+            table.c.id <= last_id,
+            table.c.timestamp < cutoff_date
+        )
+    )
     db.commit()
-    
+    return result.rowcount, last_id
+
+def delete_old_logs(db: Session, days_to_keep: int = 30, batch_size: int = 5000) -> Dict[str, int]:
+    """Delete logs older than specified days, in batches"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+    deleted = {}
+    for log_type in ("system", "audit", "api"):
+        deleted[log_type] = 0
+        cursor = 0
+        while cursor is not None:
+            count, cursor = delete_old_logs_batch(db, log_type, cutoff_date, cursor, batch_size)
+            deleted[log_type] += count
+
     return {
-        "system_logs_deleted": system_deleted,
-        "audit_logs_deleted": audit_deleted,
-        "api_logs_deleted": api_deleted,
-        "total_deleted": system_deleted + audit_deleted + api_deleted
-    } 
\ No newline at end of file
+        "system_logs_deleted": deleted["system"],
+        "audit_logs_deleted": deleted["audit"],
+        "api_logs_deleted": deleted["api"],
+        "total_deleted": sum(deleted.values())
+    }
+
+# Retention jobs
+def claim_retention_job(db: Session, job_id: str, values: Dict[str, Any], stale_before: datetime) -> bool:
+    """Store a new purge job as the active one; False while another process runs one.
+
+    Active jobs share a unique ``active`` value, so only one insert can
+    succeed across every process. An active job whose state was last saved
+    before ``stale_before`` belonged to a process that died, and is released.
+    """
+    mark_interrupted_retention_jobs(db, stale_before)
+    db.add(LogRetentionJob(id=job_id, **values))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+def save_retention_job(db: Session, job_id: str, values: Dict[str, Any]) -> None:
+    """Insert or update the stored state of a purge job and commit"""
+    row = db.get(LogRetentionJob, job_id)
+    if row is None:
+        db.add(LogRetentionJob(id=job_id, **values))
+    else:
+        for key, value in values.items():
+            setattr(row, key, value)
+    db.commit()
+
+def get_active_retention_job(db: Session) -> Optional[LogRetentionJob]:
+    return db.query(LogRetentionJob).filter(LogRetentionJob.active.is_(True)).first()
+
+def get_retention_job(db: Session, job_id: str) -> Optional[LogRetentionJob]:
+    return db.get(LogRetentionJob, job_id)
+
+def mark_interrupted_retention_jobs(db: Session, stale_before: datetime) -> int:
+    """Flag active jobs not saved since ``stale_before``, left by a process that died; returns how many"""
+    count = db.query(LogRetentionJob).filter(
+        LogRetentionJob.active.is_(True), LogRetentionJob.updated_at < stale_before
+    ).update(
+        {"status": "interrupted", "active": None, "finished_at": datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return count
@@ -0,0 +1,71 @@
+"""Async variants of the log CRUD functions for ``AsyncSession``.
+
+Single-row reads and inserts are native async statements; filtered listings
+and bulk inserts run the sync implementation from ``app.crud.log`` through
+``AsyncSession.run_sync`` so pagination and search stay in one place.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import Page
+from app.crud import log as crud_log
+from app.models.log import SystemLog, AuditLog, APILog
+from app.schemas.log import SystemLogCreate, AuditLogCreate, APILogCreate, LogFilter
+
+
+async def _create(db: AsyncSession, db_log):
+    db.add(db_log)
+    await db.commit()
+    await db.refresh(db_log)
+    return db_log
+
+# System Log CRUD
+async def create_system_log(db: AsyncSession, log: SystemLogCreate) -> SystemLog:
+    return await _create(db, SystemLog(**log.dict()))
+
+async def get_system_log(db: AsyncSession, log_id: int) -> Optional[SystemLog]:
+    return await db.scalar(select(SystemLog).where(SystemLog.id == log_id))
+
+async def get_system_logs(db: AsyncSession, skip: int = 0, limit: int = 100, filters: Optional[LogFilter] = None,
+                          cursor: Optional[str] = None, count: str = "exact") -> Page:
+    return await db.run_sync(crud_log.get_system_logs, skip, limit, filters, cursor, count)
+
+# Audit Log CRUD
+async def create_audit_log(db: AsyncSession, log: AuditLogCreate) -> AuditLog:
+    return await _create(db, AuditLog(**log.dict()))
+
+async def get_audit_log(db: AsyncSession, log_id: int) -> Optional[AuditLog]:
+    return await db.scalar(select(AuditLog).where(AuditLog.id == log_id))
+
+async def get_audit_logs(db: AsyncSession, skip: int = 0, limit: int = 100, user_id: Optional[int] = None,
+                         action: Optional[str] = None, resource_type: Optional[str] = None,
+                         start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                         cursor: Optional[str] = None, count: str = "exact") -> Page:
+    return await db.run_sync(
+        crud_log.get_audit_logs, skip=skip, limit=limit, user_id=user_id, action=action,
+        resource_type=resource_type, start_date=start_date, end_date=end_date, cursor=cursor, count=count
+    )
+
+# API Log CRUD
+async def create_api_log(db: AsyncSession, log: APILogCreate) -> APILog:
+    return await _create(db, APILog(**log.dict()))
+
+async def get_api_log(db: AsyncSession, log_id: int) -> Optional[APILog]:
+    return await db.scalar(select(APILog).where(APILog.id == log_id))
+
+async def get_api_logs(db: AsyncSession, skip: int = 0, limit: int = 100, endpoint: Optional[str] = None,
+                       method: Optional[str] = None, status_code: Optional[int] = None, user_id: Optional[int] = None,
+                       start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       cursor: Optional[str] = None, count: str = "exact") -> Page:
+    return await db.run_sync(
+        crud_log.get_api_logs, skip=skip, limit=limit, endpoint=endpoint, method=method,
+        status_code=status_code, user_id=user_id, start_date=start_date, end_date=end_date,
+        cursor=cursor, count=count
+    )
+
+# Bulk inserts
+async def create_logs_bulk(db: AsyncSession, log_type: str, logs: List[Any]) -> List[Dict[str, Any]]:
+    return await db.run_sync(crud_log.create_logs_bulk, log_type, logs)
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.user import PrincipalInvalidation, RevokedToken
+
+
+def save_revoked_token(db: Session, digest: str, user_id: Optional[int], expires_at: datetime):
+    db.add(RevokedToken(digest=digest, user_id=user_id, expires_at=expires_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Revoked twice, e.g. two logouts racing
+        db.rollback()
+
+
+def get_revoked_token(db: Session, digest: str) -> Optional[RevokedToken]:
+    return db.query(RevokedToken).filter(RevokedToken.digest == digest).first()
+
+
+def get_active_revocations(db: Session, now: datetime) -> Dict[str, datetime]:
+    """Digest -> expiry of every revoked token that has not expired yet"""
+    rows = db.query(RevokedToken.digest, RevokedToken.expires_at).filter(RevokedToken.expires_at > now)
+    return {digest: expires_at for digest, expires_at in rows}
+
+
+def purge_expired_revocations(db: Session, now: datetime) -> int:
+    deleted = db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def save_principal_invalidation(db: Session, user_id: int, invalidated_at: datetime):
+    updated = db.query(PrincipalInvalidation).filter(PrincipalInvalidation.user_id == user_id).update(
+        {PrincipalInvalidation.invalidated_at: invalidated_at}, synchronize_session=False
+    )
+    if not updated:
+        db.add(PrincipalInvalidation(user_id=user_id, invalidated_at=invalidated_at))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another process inserted the row first; its time is just as recent
+        db.rollback()
+
+
+def get_principal_invalidations(db: Session, since: datetime) -> List[int]:
+    """Ids of the users invalidated after ``since``"""
+    rows = db.query(PrincipalInvalidation.user_id).filter(PrincipalInvalidation.invalidated_at > since)
+    return [user_id for user_id, in rows]
+
+
+def purge_principal_invalidations(db: Session, before: datetime) -> int:
+    deleted = db.query(PrincipalInvalidation).filter(
+        PrincipalInvalidation.invalidated_at < before
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
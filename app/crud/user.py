@@ -1,16 +1,18 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate , UserUpdate
+from app.core.principal import invalidate_principal
 from app.core.security import hash_password
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user_in: UserCreate):
+def create_user(db: Session, user_in: UserCreate, hashed_password: str = None):
+    """Create a user; pass ``hashed_password`` when it was already hashed off-thread"""
     user = User(
         name=user_in.name,
         email=user_in.email,
-        password=hash_password(user_in.password),
+        password=hashed_password or hash_password(user_in.password),
         role_id=user_in.role_id
     )
     db.add(user)
@@ -18,17 +20,18 @@ def create_user(db: Session, user_in: UserCreate):
     db.refresh(user)
     return user
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate):
+def update_user(db: Session, user_id: int, user_update: UserUpdate, hashed_password: str = None):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         return None
     update_data = user_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         if field == "password":
-            setattr(user, field, hash_password(value))
+            setattr(user, field, hashed_password or hash_password(value))
         else:
             setattr(user, field, value)
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     return user
 
@@ -41,5 +44,20 @@ def update_user_role(db: Session, user_id: int, new_role_id: int):
         return None
     user.role_id = new_role_id
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(user)
     return user
+
+def update_password_hash(db: Session, user_id: int, hashed_password: str):
+    """Store a rehashed password without touching anything else"""
+    db.query(User).filter(User.id == user_id).update({User.password: hashed_password})
+    db.commit()
+
+def delete_user(db: Session, user_id: int):
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+    db.delete(user)
+    db.commit()
+    invalidate_principal(user_id)
+    return user
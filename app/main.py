@@ -1,12 +1,57 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.database import Base, engine
-from app.api.v1 import user, lead, line, log
+from app.core.database import Base, engine, dispose_async_engine
+from app.core.log_pipeline import start_log_pipeline, stop_log_pipeline
+from app.core.log_rollup import start_log_rollups, stop_log_rollups
+from app.core.log_retention import start_log_retention, stop_log_retention
+from app.core.log_partitions import start_log_partitions, stop_log_partitions
+from app.core.migrations import run_migrations
+from app.core.lead_counters import start_lead_counters, stop_lead_counters
+from app.core.jobs import start_job_workers, stop_job_workers
+from app.core.jwt import start_token_revocations, stop_token_revocations
+from app.core.principal import start_principal_invalidations, stop_principal_invalidations
+from app.core.pubsub import start_pubsub, stop_pubsub
+from app.core.log_context import RequestLogContextMiddleware
+from app.core.access_log import APIAccessLogMiddleware
+from app.core.config import settings
+from app.core.security import password_pool
+from app.api.v1 import user, lead, line, log, system
 from fastapi.middleware.cors import CORSMiddleware
 
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
-app = FastAPI(title="CRM API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Partitions must exist before the first log row is written
+    start_log_partitions()
+    start_log_pipeline()
+    start_log_rollups()
+    start_log_retention()
+    start_lead_counters()
+    start_token_revocations()
+    start_principal_invalidations()
+    start_pubsub()
+    start_job_workers()
+    yield
+    # Let running jobs finish while the log pipeline still runs
+    stop_job_workers()
+    stop_pubsub()
+    stop_principal_invalidations()
+    stop_token_revocations()
+    stop_lead_counters()
+    stop_log_retention()
+    stop_log_partitions()
+    stop_log_rollups()
+    # Drain queued log entries before the process exits
+    stop_log_pipeline()
+    password_pool.shutdown()
+    await dispose_async_engine()
+
+
+app = FastAPI(title="CRM API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,8 +61,16 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# Time every request into the API log (runs inside the request log context)
+if settings.ACCESS_LOG_ENABLED:
+    app.add_middleware(APIAccessLogMiddleware)
+
+# Collect log entries per request and write them once the response is sent
+app.add_middleware(RequestLogContextMiddleware)
+
 
 app.include_router(user.router, prefix="/api/v1", tags=["Users"])
 app.include_router(lead.router, prefix="/api/v1", tags=["Leads"])
 app.include_router(line.router, prefix="/api/v1", tags=["Line"])
 app.include_router(log.router, prefix="/api/v1", tags=["Logs"])
+app.include_router(system.router, prefix="/api/v1", tags=["System"])
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from app.core.database import Base
+from datetime import datetime
+
+
+class Job(Base):
+    """Durable background job, processed by app.core.jobs.
+
+    Jobs sharing an ``ordering_key`` run one at a time in id order; a job is
+    deleted once it succeeds and moved to ``dead_letter_jobs`` once it has
+    failed too often.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claiming: due jobs of a queue in id order
+        Index("ix_jobs_queue_status_available", "queue", "status", "available_at", "id"),
+        # Ordering: is there an earlier job with the same key?
+        Index("ix_jobs_queue_ordering_key", "queue", "ordering_key", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String(50), nullable=False)
+    ordering_key = Column(String(200), nullable=True)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(10), nullable=False, default="pending")  # pending or running
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class DeadLetterJob(Base):
+    """Job that exhausted its retries, kept for inspection and manual retry"""
+    __tablename__ = "dead_letter_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, nullable=False)
+    queue = Column(String(50), nullable=False, index=True)
+    ordering_key = Column(String(200), nullable=True)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    failed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
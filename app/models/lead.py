@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text, Enum, Index, event
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
+from typing import Optional
 import enum
+import re
 
 class BudgetRange(str, enum.Enum):
     RANGE_1 = "100,000 ฿ - 300,000 ฿"
@@ -17,6 +19,14 @@ class StatusChoices(str, enum.Enum):
 
 class Lead(Base):
     __tablename__ = "lead"
+    __table_args__ = (
+        # Listing paths in crud/lead.py: filter by owner and/or status, newest first
+        Index("ix_lead_assigned_status_created", "assigned_user_id", "status", "created_at"),
+        Index("ix_lead_assigned_created", "assigned_user_id", "created_at"),
+        Index("ix_lead_status_created", "status", "created_at"),
+        Index("ix_lead_created_at", "created_at"),
+        Index("ix_lead_platform_id", "platform_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)  # Lead name (e.g., "Soap")
@@ -62,21 +72,62 @@ class Lead(Base):
     # Notes
     internal_notes = Column(Text, nullable=True)
     
+    # Search keys, kept in sync with name/email/phone on every flush and
+    # indexed per database by app.core.lead_search.ensure_lead_search
+    name_normalized = Column(String, nullable=True)
+    email_normalized = Column(String, nullable=True)
+    phone_digits = Column(String, nullable=True)
+    
     # New fields for source tracking
     source = Column(String, nullable=True)  # e.g., "facebook", "line", "web"
     platform_id = Column(String, nullable=True)  # e.g., "line_user_id", "facebook_user_id"
     
     assigned_user_id = Column(Integer, ForeignKey("user.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Relationship fields
     assigned_user = relationship("User")
     status_changes = relationship("LeadStatusChange", back_populates="lead")
     notes = relationship("LeadNote", back_populates="lead")
 
+
+class LeadCounter(Base):
+    """Number of leads per owner and status, maintained by crud/lead.py"""
+    __tablename__ = "lead_counters"
+
+    # 0 stands for unassigned leads, "" for leads without a status
+    assigned_user_id = Column(Integer, primary_key=True, autoincrement=False)
+    status = Column(String(32), primary_key=True)
+    lead_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Lower-cased, whitespace-collapsed form used for name and email lookups"""
+    if not value:
+        return None
+    return " ".join(value.split()).lower() or None
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """Digits of a phone number, so "081-234 5678" and "0812345678" match"""
+    if not value:
+        return None
+    return re.sub(r"\D", "", value) or None
+
+def _normalize_search_keys(mapper, connection, target: Lead):
+    target.name_normalized = normalize_text(target.name)
+    target.email_normalized = normalize_text(target.email)
+    target.phone_digits = normalize_phone(target.phone)
+
+event.listen(Lead, "before_insert", _normalize_search_keys)
+event.listen(Lead, "before_update", _normalize_search_keys)
+
     
 class LeadStatusChange(Base):
     __tablename__ = "lead_status_change"
+    __table_args__ = (
+        Index("ix_lead_status_change_lead_timestamp", "lead_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     lead_id = Column(Integer, ForeignKey("lead.id", ondelete="CASCADE"))
@@ -90,6 +141,9 @@ class LeadStatusChange(Base):
 
 class LeadNote(Base):
     __tablename__ = "lead_note"
+    __table_args__ = (
+        Index("ix_lead_note_lead_created", "lead_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     lead_id = Column(Integer, ForeignKey("lead.id", ondelete="CASCADE"))
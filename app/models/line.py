@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
 
 class LineMessage(Base):
     __tablename__ = "line_message"
+    __table_args__ = (
+        # Chat history of one user, newest first: a single index range scan
+        Index("ix_line_message_user_timestamp_id", "user_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, index=True)
@@ -16,6 +20,8 @@ class LineMessage(Base):
     reply_token = Column(String, nullable=True)
     is_read = Column(Boolean, default=False)
     provider = Column(String, nullable=True)
+    # LINE webhookEventId; redeliveries of an event are ignored
+    webhook_event_id = Column(String, nullable=True, unique=True, index=True)
 
     def __str__(self):
         return f"{self.user_id}: {self.message_text[:30]}"
@@ -31,4 +37,30 @@ class LineUser(Base):
     last_typing = Column(DateTime, nullable=True)
 
     def __str__(self):
-        return self.display_name or self.user_id 
\ No newline at end of file
+        return self.display_name or self.user_id 
+
+
+class LineConversation(Base):
+    """Per-user summary of a LINE chat, maintained by crud/line.py on every message write"""
+    __tablename__ = "line_conversation"
+    __table_args__ = (
+        # Inbox, newest first, keyset-paged by (last_message_at, user_id)
+        Index("ix_line_conversation_last_message_at_user", "last_message_at", "user_id"),
+        # Same order limited to conversations with unread messages
+        Index(
+            "ix_line_conversation_unread_inbox", "last_message_at", "user_id",
+            postgresql_where=text("unread_count > 0"), sqlite_where=text("unread_count > 0")
+        ),
+    )
+
+    user_id = Column(String, primary_key=True)
+    last_message_id = Column(Integer, nullable=True)
+    last_message_text = Column(String, nullable=True)
+    last_message_type = Column(String, nullable=True)
+    last_message_at = Column(DateTime, nullable=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    message_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} unread"
@@ -1,9 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Text, Enum, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from app.core.database import Base
+from app.core.config import settings
+from app.core.database import Base, engine
 from datetime import datetime
 import enum
 
+# Native range partitioning by timestamp needs PostgreSQL, and the partition
+# key must be part of the primary key. Other databases keep a plain main table
+# and one table per period next to it (app.core.log_partitions).
+LOG_PARTITIONING = settings.LOG_PARTITIONING
+NATIVE_LOG_PARTITIONING = LOG_PARTITIONING != "none" and engine.dialect.name == "postgresql"
+
+def _log_table_args(*args):
+    if NATIVE_LOG_PARTITIONING:
+        return (*args, {"postgresql_partition_by": "RANGE (timestamp)"})
+    return args
+
 class LogLevel(enum.Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -26,8 +38,12 @@ class LogCategory(enum.Enum):
 
 class SystemLog(Base):
     __tablename__ = "system_logs"
+    __table_args__ = _log_table_args(
+        # Keyset pagination walks (timestamp, id) newest first
+        Index("ix_system_logs_timestamp_id", "timestamp", "id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     level = Column(Enum(LogLevel), nullable=False, index=True)
     category = Column(Enum(LogCategory), nullable=False, index=True)
     message = Column(Text, nullable=False)
@@ -49,15 +65,19 @@ class SystemLog(Base):
     duration_ms = Column(Integer, nullable=True)
     
     # Timestamps
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True, primary_key=NATIVE_LOG_PARTITIONING)
     
     # Relationships
     user = relationship("User", back_populates="system_logs")
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = _log_table_args(
+        # Keyset pagination walks (timestamp, id) newest first
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     action = Column(String(100), nullable=False, index=True)
     resource_type = Column(String(50), nullable=False, index=True)
@@ -66,15 +86,19 @@ class AuditLog(Base):
     new_values = Column(JSON, nullable=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(String(500), nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True, primary_key=NATIVE_LOG_PARTITIONING)
     
     # Relationships
     user = relationship("User", back_populates="audit_logs")
 
 class APILog(Base):
     __tablename__ = "api_logs"
+    __table_args__ = _log_table_args(
+        # Keyset pagination walks (timestamp, id) newest first
+        Index("ix_api_logs_timestamp_id", "timestamp", "id"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     request_id = Column(String(100), nullable=False, index=True)
     method = Column(String(10), nullable=False)
     endpoint = Column(String(200), nullable=False, index=True)
@@ -96,7 +120,63 @@ class APILog(Base):
     error_message = Column(Text, nullable=True)
     stack_trace = Column(Text, nullable=True)
     
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True, primary_key=NATIVE_LOG_PARTITIONING)
     
     # Relationships
-    user = relationship("User", back_populates="api_logs") 
\ No newline at end of file
+    user = relationship("User", back_populates="api_logs")
+
+class LogRollup(Base):
+    """Pre-aggregated log counts per time bucket.
+
+    System logs are rolled up by level and category, API logs by endpoint
+    (route template), method and status code. Unused dimensions hold an
+    empty string or 0 so they can take part in the unique key.
+    """
+    __tablename__ = "log_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(10), nullable=False)  # system or api
+    granularity = Column(String(10), nullable=False)  # minute, hour or day
+    bucket_start = Column(DateTime, nullable=False)
+    level = Column(String(10), nullable=False, default="")
+    category = Column(String(30), nullable=False, default="")
+    endpoint = Column(String(200), nullable=False, default="")
+    method = Column(String(10), nullable=False, default="")
+    status_code = Column(Integer, nullable=False, default=0)
+    log_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    total_response_time_ms = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "source", "granularity", "bucket_start", "level", "category",
+            "endpoint", "method", "status_code",
+            name="uq_log_rollups_bucket"
+        ),
+        Index("ix_log_rollups_lookup", "source", "granularity", "bucket_start"),
+    )
+
+class LogRollupState(Base):
+    """High-water mark of the last log id included in the rollups"""
+    __tablename__ = "log_rollup_state"
+
+    source = Column(String(10), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LogRetentionJob(Base):
+    """Status and per-table cursors of a log purge, so it can be resumed after a restart"""
+    __tablename__ = "log_retention_jobs"
+    __table_args__ = (
+        # At most one active job across all processes: NULLs do not collide
+        Index("ix_log_retention_jobs_active", "active", unique=True),
+    )
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False, index=True)
+    active = Column(Boolean, nullable=True)  # True while pending or running, otherwise NULL
+    error = Column(Text, nullable=True)
+    progress = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # refreshed after every batch
+    finished_at = Column(DateTime, nullable=True)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from datetime import datetime
 
 class User(Base):
     __tablename__ = "user"
@@ -16,3 +17,21 @@ class User(Base):
     system_logs = relationship("SystemLog", back_populates="user")
     audit_logs = relationship("AuditLog", back_populates="user")
     api_logs = relationship("APILog", back_populates="user")
+
+
+class RevokedToken(Base):
+    """Access token logged out before it expired; the row is kept until then"""
+    __tablename__ = "revoked_tokens"
+
+    digest = Column(String(64), primary_key=True)  # sha256 of the token
+    user_id = Column(Integer, nullable=True, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PrincipalInvalidation(Base):
+    """Last time a user's row changed, so other processes drop their cached principals"""
+    __tablename__ = "principal_invalidations"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    invalidated_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Optional
+
+class DeadLetterJobOut(BaseModel):
+    id: int
+    job_id: int
+    queue: str
+    ordering_key: Optional[str] = None
+    payload: Any
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    failed_at: datetime
+
+    class Config:
+        from_attributes = True
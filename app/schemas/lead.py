@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 from app.models.lead import BudgetRange, StatusChoices
 
 class LeadBase(BaseModel):
@@ -65,6 +65,11 @@ class LeadOut(LeadBase):
     class Config:
         from_attributes = True
 
+class LeadPage(BaseModel):
+    items: List[LeadOut]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
 
 # Lead Status Change
 class LeadStatusChangeBase(BaseModel):
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class LineMessageBase(BaseModel):
     user_id: str
@@ -36,4 +36,64 @@ class LineUserOut(LineUserBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class LineConversationOut(BaseModel):
+    user_id: str
+    last_message_id: Optional[int] = None
+    last_message_text: Optional[str] = None
+    last_message_type: Optional[str] = None
+    last_message_at: Optional[datetime] = None
+    unread_count: int
+    message_count: int
+
+    class Config:
+        from_attributes = True
+
+class LineConversationPage(BaseModel):
+    items: List[LineConversationOut]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class LineMarkReadOut(BaseModel):
+    user_id: str
+    marked_read: int
+    unread_count: int
+
+class LineMessagePage(BaseModel):
+    conversation: Optional[LineConversationOut] = None
+    messages: List[LineMessageOut]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# LINE webhook payload
+class LineWebhookSource(BaseModel):
+    type: str
+    user_id: Optional[str] = Field(None, alias="userId")
+    group_id: Optional[str] = Field(None, alias="groupId")
+    room_id: Optional[str] = Field(None, alias="roomId")
+
+class LineWebhookMessage(BaseModel):
+    id: str
+    type: str
+    text: Optional[str] = None
+    package_id: Optional[str] = Field(None, alias="packageId")
+    sticker_id: Optional[str] = Field(None, alias="stickerId")
+
+class LineWebhookDeliveryContext(BaseModel):
+    is_redelivery: bool = Field(False, alias="isRedelivery")
+
+class LineWebhookEvent(BaseModel):
+    type: str
+    timestamp: int  # milliseconds since the epoch
+    webhook_event_id: Optional[str] = Field(None, alias="webhookEventId")
+    source: Optional[LineWebhookSource] = None
+    reply_token: Optional[str] = Field(None, alias="replyToken")
+    message: Optional[LineWebhookMessage] = None
+    delivery_context: Optional[LineWebhookDeliveryContext] = Field(None, alias="deliveryContext")
+
+class LineWebhookDelivery(BaseModel):
+    destination: Optional[str] = None
+    events: List[LineWebhookEvent] = []
@@ -95,6 +95,7 @@ class LogFilter(BaseModel):
     module: Optional[str] = None
     endpoint: Optional[str] = None
     search_text: Optional[str] = Field(None, max_length=500)
+    sort_by_relevance: bool = False
 
 class LogStatsFilter(BaseModel):
     start_date: Optional[datetime] = None
@@ -109,6 +110,9 @@ class LogStats(BaseModel):
     debug_count: int
     critical_count: int
     avg_response_time_ms: Optional[float] = None
+    p50_response_time_ms: Optional[float] = None
+    p95_response_time_ms: Optional[float] = None
+    p99_response_time_ms: Optional[float] = None
     total_api_calls: int
     error_rate_percentage: float
 
@@ -121,21 +125,27 @@ class LogAnalytics(BaseModel):
 # Response schemas
 class LogListResponse(BaseModel):
     logs: List[SystemLogOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    page: Optional[int] = None
     size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class APILogListResponse(BaseModel):
     logs: List[APILogOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    page: Optional[int] = None
     size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class AuditLogListResponse(BaseModel):
     logs: List[AuditLogOut]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    page: Optional[int] = None
     size: int
-    total_pages: int 
\ No newline at end of file
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None 
\ No newline at end of file
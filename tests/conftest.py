@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway SQLite
+# database before anything from app/ is imported
+_tmp_dir = tempfile.mkdtemp(prefix="crm-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("LOG_SPILL_PATH", os.path.join(_tmp_dir, "log_spill.jsonl"))
+
+import pytest  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine as app_engine  # noqa: E402
+from app.core.migrations import run_migrations  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    Base.metadata.create_all(bind=app_engine)
+    run_migrations(app_engine)
+    return app_engine
+
+
+@pytest.fixture
+def db(engine):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def tmp_spill(tmp_path):
+    return str(tmp_path / "spill.jsonl")
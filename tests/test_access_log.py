@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.logging import LoggingService
+
+
+@pytest.fixture
+def logged_calls(engine, monkeypatch):
+    calls = []
+    monkeypatch.setattr(LoggingService, "log_api_call", staticmethod(lambda **kwargs: calls.append(kwargs)))
+    return calls
+
+
+@pytest.fixture
+def client(engine):
+    from app.main import app
+
+    # Without a with-block the lifespan (and its background workers) is not started
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("path", ["/api/v1/leads/42", "/api/v1/leads/7"])
+def test_route_template_is_logged_with_router_prefix(client, logged_calls, path):
+    client.get(path)
+    assert [call["endpoint"] for call in logged_calls] == ["/api/v1/leads/{lead_id}"]
+    assert logged_calls[0]["method"] == "GET"
+    assert logged_calls[0]["status_code"] == 401
+
+
+def test_unmatched_path_is_logged_as_one_endpoint(client, logged_calls):
+    client.get("/api/v1/no-such-route/123")
+    assert [call["endpoint"] for call in logged_calls] == ["<unmatched>"]
@@ -0,0 +1,127 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import jobs
+from app.core.jobs import JobWorkerPool, retry_delay
+from app.crud.job import claim_jobs, complete_job, enqueue_jobs, fail_job, touch_jobs
+from app.models.job import DeadLetterJob, Job
+
+QUEUE = "test"
+
+
+def claim(db, limit=10, lock_timeout=300):
+    return [(job.id, job.payload, job.attempts) for job in claim_jobs(db, [QUEUE], limit, lock_timeout)]
+
+
+def test_jobs_of_one_key_run_in_order(db):
+    enqueue_jobs(db, QUEUE, [("a", 1), ("a", 2), ("b", 3)])
+
+    first = claim(db)
+    assert [payload for _, payload, _ in first] == [1, 3]
+    # The second "a" job waits while the first one runs
+    assert claim(db) == []
+
+    job_id, _, attempts = first[0]
+    assert complete_job(db, job_id, attempts)
+    assert [payload for _, payload, _ in claim(db)] == [2]
+
+
+def test_failed_job_is_retried_after_backoff(db):
+    enqueue_jobs(db, QUEUE, [("a", 1)])
+    [(job_id, _, attempts)] = claim(db)
+
+    before = datetime.utcnow()
+    assert fail_job(db, job_id, attempts, "boom", max_attempts=3, retry_delay=60) == "retried"
+    job = db.query(Job).one()
+    assert (job.status, job.last_error, job.locked_at) == ("pending", "boom", None)
+    assert job.available_at >= before + timedelta(seconds=60)
+    assert claim(db) == []
+
+    job.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert [attempts for _, _, attempts in claim(db)] == [2]
+
+
+def test_retry_delay_doubles_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr(jobs.settings, "JOB_RETRY_BACKOFF_SECONDS", 2.0)
+    monkeypatch.setattr(jobs.settings, "JOB_RETRY_BACKOFF_MAX_SECONDS", 10.0)
+    assert [retry_delay(attempts) for attempts in range(1, 6)] == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+
+def test_job_is_dead_lettered_after_max_attempts(db):
+    enqueue_jobs(db, QUEUE, [("a", 1), ("a", 2)])
+    [(job_id, _, attempts)] = claim(db)
+
+    assert fail_job(db, job_id, attempts, "boom", max_attempts=1, retry_delay=0) == "dead_lettered"
+    dead = db.query(DeadLetterJob).one()
+    assert (dead.job_id, dead.payload, dead.attempts, dead.last_error) == (job_id, 1, 1, "boom")
+    # The key's next job is no longer blocked
+    assert [payload for _, payload, _ in claim(db)] == [2]
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(db):
+    enqueue_jobs(db, QUEUE, [("a", 1)])
+    [(job_id, _, stale_attempts)] = claim(db)
+    # The lock timed out and a second worker took the job over
+    [(_, _, attempts)] = claim(db, lock_timeout=-1)
+    assert attempts == stale_attempts + 1
+
+    assert not complete_job(db, job_id, stale_attempts)
+    assert fail_job(db, job_id, stale_attempts, "late", max_attempts=1, retry_delay=0) == "lost"
+    assert touch_jobs(db, {job_id: stale_attempts}) == 0
+    job = db.query(Job).one()
+    assert (job.status, job.attempts, job.last_error) == ("running", attempts, None)
+
+    assert complete_job(db, job_id, attempts)
+    assert db.query(Job).count() == 0
+
+
+def test_heartbeat_keeps_a_running_job_claimed(db):
+    enqueue_jobs(db, QUEUE, [("a", 1)])
+    [(job_id, _, attempts)] = claim(db)
+    db.query(Job).update({"locked_at": datetime.utcnow() - timedelta(hours=1)})
+    db.commit()
+
+    assert touch_jobs(db, {job_id: attempts}) == 1
+    assert claim(db, lock_timeout=60) == []
+
+
+def test_pool_runs_jobs_per_key_in_order(db, monkeypatch):
+    seen = []
+    monkeypatch.setitem(jobs.JOB_HANDLERS, QUEUE, lambda _, payload: seen.append(payload))
+    enqueue_jobs(db, QUEUE, [("a", 1), ("b", 10), ("a", 2), ("b", 11), ("a", 3)])
+
+    pool = JobWorkerPool(workers=2, poll_interval=0.01, lock_timeout=30)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.stats()["succeeded"] < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+
+    assert pool.stats()["succeeded"] == 5
+    assert [payload for payload in seen if payload < 10] == [1, 2, 3]
+    assert [payload for payload in seen if payload >= 10] == [10, 11]
+    assert db.query(Job).count() == 0
+
+
+@pytest.mark.parametrize("max_attempts, outcome", [(1, "dead_lettered"), (2, "retried")])
+def test_pool_records_handler_failures(db, monkeypatch, max_attempts, outcome):
+    def broken(_, payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, QUEUE, broken)
+    enqueue_jobs(db, QUEUE, [("a", 1)])
+
+    pool = JobWorkerPool(workers=1, poll_interval=0.01, max_attempts=max_attempts, lock_timeout=30)
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.stats()[outcome] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    assert pool.stats()[outcome] == 1
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.core.lead_search import ensure_lead_search
+from app.core.migrations import _lead_created_at_not_null
+from app.crud.lead import get_leads_page
+from app.models.lead import Lead
+
+
+def test_pages_reach_every_lead_once(db):
+    base = datetime(2024, 1, 1)
+    db.add_all([Lead(name=f"lead {i}", created_at=base + timedelta(hours=i // 3)) for i in range(10)])
+    db.commit()
+
+    seen = []
+    leads, total, cursor = get_leads_page(db, limit=4)
+    assert total == 10
+    seen.extend(lead.id for lead in leads)
+    while cursor:
+        leads, total, cursor = get_leads_page(db, limit=4, cursor=cursor)
+        assert total is None
+        seen.extend(lead.id for lead in leads)
+    assert sorted(seen) == sorted(lead.id for lead in db.query(Lead))
+    assert len(seen) == len(set(seen))
+
+
+def test_created_at_is_filled_by_default(db):
+    lead = Lead(name="no timestamp given")
+    db.add(lead)
+    db.commit()
+    assert lead.created_at is not None
+
+
+def test_migration_backfills_missing_created_at(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with bind.begin() as conn:
+        conn.execute(text("CREATE TABLE lead (id INTEGER PRIMARY KEY, created_at DATETIME, updated_at DATETIME)"))
+        conn.execute(text(
+            "INSERT INTO lead (id, created_at, updated_at) VALUES "
+            "(1, NULL, '2024-02-01 10:00:00'), (2, NULL, NULL), (3, '2024-01-01 00:00:00', NULL)"
+        ))
+
+    _lead_created_at_not_null(bind)
+
+    with bind.connect() as conn:
+        rows = dict(conn.execute(text("SELECT id, created_at FROM lead")).all())
+    assert rows[1] == "2024-02-01 10:00:00"
+    assert rows[2] is not None
+    assert rows[3] == "2024-01-01 00:00:00"
+
+
+def test_startup_fills_search_keys_left_empty(engine, db):
+    # The columns already exist, e.g. after a backfill interrupted by a crash
+    with engine.begin() as conn:
+        conn.execute(Lead.__table__.insert().values(
+            name="  Somchai  Jaidee ", email="SOM@Example.com", phone="081-234 5678", created_at=datetime(2024, 1, 1)
+        ))
+    ensure_lead_search(engine)
+    lead = db.query(Lead).one()
+    assert (lead.name_normalized, lead.email_normalized, lead.phone_digits) == (
+        "somchai jaidee", "som@example.com", "0812345678"
+    )
+
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from app.crud.line import (
+    create_line_message, create_line_messages_bulk, delete_line_message, get_conversation, get_inbox,
+    mark_conversation_read, rebuild_line_conversations, update_line_message
+)
+from app.models.line import LineConversation, LineMessage
+from app.schemas.line import LineMessageCreate
+
+BASE = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def add_messages(db, user_id, *minutes, is_read=False):
+    return create_line_messages_bulk(db, [
+        {"user_id": user_id, "message_text": f"{user_id} at {minute}", "message_type": "text",
+         "timestamp": BASE + timedelta(minutes=minute), "is_read": is_read}
+        for minute in minutes
+    ])
+
+
+def summary(db, user_id):
+    db.expire_all()
+    conversation = get_conversation(db, user_id)
+    if conversation is None:
+        return None
+    return conversation.message_count, conversation.unread_count, conversation.last_message_text
+
+
+def recomputed(db, user_id):
+    """The same summary rebuilt from line_message"""
+    rebuild_line_conversations(db)
+    return summary(db, user_id)
+
+
+def test_new_messages_bump_the_counters(db):
+    add_messages(db, "U1", 1, 2)
+    add_messages(db, "U1", 3, is_read=True)
+    add_messages(db, "U2", 1)
+    assert summary(db, "U1") == (3, 2, "U1 at 3")
+    assert summary(db, "U2") == (1, 1, "U2 at 1")
+    assert recomputed(db, "U1") == (3, 2, "U1 at 3")
+
+
+def test_late_message_does_not_replace_the_last_message(db):
+    add_messages(db, "U1", 5)
+    add_messages(db, "U1", 2)
+    assert summary(db, "U1") == (2, 2, "U1 at 5")
+
+
+def test_single_message_create_bumps_the_counters(db):
+    create_line_message(db, LineMessageCreate(user_id="U1", message_text="hello"))
+    assert summary(db, "U1") == (1, 1, "hello")
+
+
+def test_marking_a_message_read_adjusts_unread_only(db):
+    [first, _] = add_messages(db, "U1", 1, 2)
+    update_line_message(db, first["id"], LineMessageCreate(user_id="U1", message_text="U1 at 1", is_read=True))
+    assert summary(db, "U1") == (2, 1, "U1 at 2")
+    update_line_message(db, first["id"], LineMessageCreate(user_id="U1", message_text="U1 at 1", is_read=False))
+    assert summary(db, "U1") == (2, 2, "U1 at 2")
+
+
+def test_editing_the_last_message_refreshes_the_summary(db):
+    [_, last] = add_messages(db, "U1", 1, 2)
+    update_line_message(db, last["id"], LineMessageCreate(user_id="U1", message_text="edited"))
+    assert summary(db, "U1") == (2, 2, "edited")
+
+
+def test_moving_a_message_refreshes_both_users(db):
+    [moved] = add_messages(db, "U1", 1)
+    add_messages(db, "U2", 2)
+    update_line_message(db, moved["id"], LineMessageCreate(user_id="U2", message_text="moved"))
+    assert summary(db, "U1") is None
+    assert summary(db, "U2") == (2, 2, "U2 at 2")
+
+
+def test_deleting_messages_refreshes_and_finally_drops_the_summary(db):
+    [first, last] = add_messages(db, "U1", 1, 2)
+    delete_line_message(db, last["id"])
+    assert summary(db, "U1") == (1, 1, "U1 at 1")
+    delete_line_message(db, first["id"])
+    assert summary(db, "U1") is None
+    assert db.query(LineConversation).count() == 0
+
+
+def test_rebuild_repairs_drifted_counters(db):
+    add_messages(db, "U1", 1, 2)
+    db.query(LineConversation).update({"message_count": 40, "unread_count": 7})
+    db.add(LineConversation(user_id="gone", message_count=1, unread_count=1, last_message_at=BASE))
+    db.commit()
+
+    assert rebuild_line_conversations(db) == 1
+    assert summary(db, "U1") == (2, 2, "U1 at 2")
+    assert summary(db, "gone") is None
+    assert db.query(LineMessage).count() == 2
+
+
+def test_mark_read_stops_at_the_last_seen_message(db):
+    [first, second, _] = add_messages(db, "U1", 1, 2, 3)
+    assert mark_conversation_read(db, "U1", up_to_message_id=second["id"]) == 2
+    assert summary(db, "U1") == (3, 1, "U1 at 3")
+    assert mark_conversation_read(db, "U1") == 1
+    assert mark_conversation_read(db, "U1") == 0
+    assert summary(db, "U1") == (3, 0, "U1 at 3")
+    assert db.query(LineMessage).filter(LineMessage.id == first["id"]).one().is_read
+
+
+def inbox_user_ids(db, limit, **kwargs):
+    user_ids, cursor = [], None
+    while True:
+        page = get_inbox(db, limit=limit, cursor=cursor, **kwargs)
+        user_ids.extend(conversation.user_id for conversation in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return user_ids
+
+
+def test_inbox_pages_by_most_recent_message(db):
+    # U2 and U3 tie on their last message time, so user_id breaks the tie
+    add_messages(db, "U1", 1)
+    add_messages(db, "U2", 4)
+    add_messages(db, "U3", 4)
+    add_messages(db, "U4", 2, is_read=True)
+    assert inbox_user_ids(db, limit=1) == ["U3", "U2", "U4", "U1"]
+    assert inbox_user_ids(db, limit=3, unread_only=True) == ["U3", "U2", "U1"]
+
+    mark_conversation_read(db, "U2")
+    assert inbox_user_ids(db, limit=2, unread_only=True) == ["U3", "U1"]
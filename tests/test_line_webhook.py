@@ -0,0 +1,96 @@
+from app.core import log_context
+from app.core.line_webhook import _process_job, message_row, process_delivery
+from app.crud.line import create_line_messages_bulk
+from app.models.line import LineConversation, LineMessage
+from app.models.log import LogCategory, SystemLog
+from app.schemas.line import LineWebhookDelivery
+
+
+def event(event_id, text="hi", user_id="U1", redelivery=False):
+    return {
+        "type": "message",
+        "timestamp": 1700000000000,
+        "webhookEventId": event_id,
+        "source": {"type": "user", "userId": user_id},
+        "replyToken": f"reply-{event_id}",
+        "message": {"id": f"m-{event_id}", "type": "text", "text": text},
+        "deliveryContext": {"isRedelivery": redelivery},
+    }
+
+
+def deliver(db, *events):
+    return process_delivery(db, LineWebhookDelivery.model_validate({"destination": "bot", "events": list(events)}))
+
+
+def row_for(event_id):
+    return message_row(LineWebhookDelivery.model_validate({"events": [event(event_id)]}).events[0])
+
+
+def stored_event_ids(db):
+    return sorted(message.webhook_event_id for message in db.query(LineMessage))
+
+
+def test_repeated_event_in_one_delivery_is_stored_once(db):
+    summary = deliver(db, event("e1"), event("e1"), event("e2"))
+    assert summary["messages_stored"] == 2
+    assert summary["duplicates"] == 1
+    assert stored_event_ids(db) == ["e1", "e2"]
+
+
+def test_redelivered_event_is_not_stored_again(db):
+    deliver(db, event("e1"), event("e2"))
+    summary = deliver(db, event("e2", redelivery=True), event("e3"))
+    assert summary["messages_stored"] == 1
+    assert summary["duplicates"] == 1
+    assert summary["redeliveries"] == 1
+    assert [message["webhook_event_id"] for message in summary["messages"]] == ["e3"]
+    assert stored_event_ids(db) == ["e1", "e2", "e3"]
+
+
+def test_duplicates_do_not_inflate_conversation_counters(db):
+    deliver(db, event("e1"), event("e1"))
+    deliver(db, event("e1", redelivery=True))
+    conversation = db.query(LineConversation).filter_by(user_id="U1").one()
+    assert (conversation.message_count, conversation.unread_count) == (1, 1)
+
+
+def test_events_without_id_are_always_stored(db):
+    deliver(db, event(None), event(None))
+    assert db.query(LineMessage).count() == 2
+
+
+def test_bulk_insert_returns_only_new_rows(db):
+    assert len(create_line_messages_bulk(db, [row_for("e1")])) == 1
+    again = create_line_messages_bulk(db, [row_for("e1"), row_for("e2")])
+    assert [row["webhook_event_id"] for row in again] == ["e2"]
+
+
+def interaction(event_type, source):
+    return {"type": event_type, "timestamp": 1700000000000, "source": source}
+
+
+def chat_event_logs(db):
+    return [
+        (log.extra_data.get("event_type"), log.extra_data.get("line_user_id"))
+        for log in db.query(SystemLog).filter(SystemLog.category == LogCategory.CHAT_EVENT).order_by(SystemLog.id)
+    ]
+
+
+def test_interaction_events_are_logged_each_with_the_summary(db):
+    deliver(
+        db, event("e1"), interaction("follow", {"type": "user", "userId": "U1"}),
+        interaction("join", {"type": "group", "groupId": "G1"}),
+    )
+    assert chat_event_logs(db) == [("follow", "U1"), ("join", "G1"), (None, None)]
+
+
+def test_job_writes_its_log_entries_together(db, monkeypatch):
+    writes = []
+    monkeypatch.setattr(log_context, "_write_entries", writes.append)
+    _process_job(db, {"destination": "bot", "events": [
+        event("e1"), interaction("unfollow", {"type": "user", "userId": "U2"})
+    ]})
+    assert [[row["extra_data"].get("event_type") for _, row in entries] for entries in writes] == [
+        ["unfollow", None]
+    ]
+
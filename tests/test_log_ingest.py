@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from app.core.log_ingest import ingest_ndjson
+from app.models.log import SystemLog
+
+
+def entry(message):
+    return json.dumps({"level": "INFO", "category": "SYSTEM", "message": message}).encode()
+
+
+def ingest(chunks, **kwargs):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return asyncio.run(ingest_ndjson("system", body(), **kwargs))
+
+
+def stored_messages(db):
+    return [log.message for log in db.query(SystemLog).order_by(SystemLog.id)]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_lines_split_across_chunks(db):
+    data = b"\n".join(entry(f"m{i}") for i in range(5))  # no trailing newline
+    result = ingest(split(data, 7), chunk_size=2)
+    assert (result["inserted"], result["rejected"]) == (5, 0)
+    assert stored_messages(db) == [f"m{i}" for i in range(5)]
+
+
+def test_invalid_lines_are_reported_by_number(db):
+    result = ingest([entry("ok") + b"\n\nnot json\n" + entry("also ok") + b"\n"])
+    assert (result["inserted"], result["rejected"]) == (2, 1)
+    assert [error["line"] for error in result["errors"]] == [3]
+
+
+def test_overlong_line_is_rejected_without_buffering_it(db):
+    long_line = entry("x" * 500)
+    data = entry("before") + b"\n" + long_line + b"\n" + entry("after") + b"\n" + long_line
+    result = ingest(split(data, 64), max_line_bytes=200)
+    assert (result["inserted"], result["rejected"]) == (2, 2)
+    assert [error["line"] for error in result["errors"]] == [2, 4]
+    assert "longer than 200 bytes" in result["errors"][0]["error"]
+    assert stored_messages(db) == ["before", "after"]
+
+
+def test_line_of_exactly_the_limit_is_accepted(db):
+    line = entry("edge")
+    result = ingest([line[:10], line[10:] + b"\n"], max_line_bytes=len(line))
+    assert result["inserted"] == 1
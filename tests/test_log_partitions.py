@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, inspect, select
+
+from app.core.database import Base
+from app.core.log_partitions import (
+    PartitionManager, expired_partitions, next_period, period_start, upcoming_periods
+)
+from app.core.log_retention import RetentionPolicy
+from app.crud.log import LOG_TABLES
+from app.models.log import LogCategory, LogLevel
+
+
+@pytest.mark.parametrize("granularity, value, start", [
+    ("daily", datetime(2024, 3, 5, 17, 30, 12, 5), datetime(2024, 3, 5)),
+    ("monthly", datetime(2024, 3, 5, 17, 30), datetime(2024, 3, 1)),
+    ("monthly", datetime(2024, 3, 1), datetime(2024, 3, 1)),
+])
+def test_period_start(granularity, value, start):
+    assert period_start(value, granularity) == start
+
+
+@pytest.mark.parametrize("granularity, start, end", [
+    ("daily", datetime(2024, 2, 28), datetime(2024, 2, 29)),
+    ("daily", datetime(2024, 12, 31), datetime(2025, 1, 1)),
+    ("monthly", datetime(2024, 1, 1), datetime(2024, 2, 1)),
+    ("monthly", datetime(2024, 2, 1), datetime(2024, 3, 1)),
+    ("monthly", datetime(2024, 12, 1), datetime(2025, 1, 1)),
+])
+def test_next_period(granularity, start, end):
+    assert next_period(start, granularity) == end
+
+
+@pytest.mark.parametrize("granularity, start, name", [
+    ("daily", datetime(2024, 1, 15), "system_logs_p20240115"),
+    ("monthly", datetime(2024, 1, 1), "system_logs_p202401"),
+])
+def test_partition_name_round_trip(granularity, start, name):
+    manager = PartitionManager(granularity=granularity)
+    assert manager.partition_name("system_logs", start) == name
+    assert manager._parse_partition("system_logs", name) == start
+
+
+@pytest.mark.parametrize("name", ["system_logs_default", "system_logs_pnotadate", "audit_logs_p20240115"])
+def test_other_tables_are_not_partitions(name):
+    assert PartitionManager(granularity="daily")._parse_partition("system_logs", name) is None
+
+
+def test_unknown_granularity_is_rejected():
+    with pytest.raises(ValueError):
+        PartitionManager(granularity="weekly")
+
+
+def test_upcoming_periods_start_with_the_current_one():
+    periods = upcoming_periods(datetime(2024, 12, 30, 8), "daily", premake=2)
+    assert periods == [
+        (datetime(2024, 12, 30), datetime(2024, 12, 31)),
+        (datetime(2024, 12, 31), datetime(2025, 1, 1)),
+        (datetime(2025, 1, 1), datetime(2025, 1, 2)),
+    ]
+    assert upcoming_periods(datetime(2024, 1, 31), "monthly", premake=0) == [
+        (datetime(2024, 1, 1), datetime(2024, 2, 1))
+    ]
+
+
+def test_only_periods_ending_by_the_cutoff_expire():
+    partitions = [(f"p{day}", datetime(2024, 1, day)) for day in (1, 2, 3, 4)]
+    assert expired_partitions(partitions, datetime(2024, 1, 3), "daily") == ["p1", "p2"]
+    assert expired_partitions(partitions, datetime(2024, 1, 1), "daily") == []
+    assert expired_partitions(partitions, datetime(2024, 1, 3, 12), "monthly") == []
+
+
+@pytest.fixture
+def local_engine(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path / 'partitions.db'}")
+    Base.metadata.create_all(bind=bind)
+    yield bind
+    bind.dispose()
+
+
+def test_period_tables_on_sqlite(local_engine, monkeypatch):
+    monkeypatch.setattr("app.core.log_partitions.default_policies", lambda: [RetentionPolicy("system", 2)])
+    table = LOG_TABLES["system"]
+    now = datetime(2024, 1, 10, 12)
+    with local_engine.begin() as conn:
+        conn.execute(insert(table), [
+            {"level": LogLevel.INFO, "category": LogCategory.SYSTEM, "message": f"day {offset}",
+             "timestamp": now - timedelta(days=offset)}
+            for offset in (0, 1, 1, 5)
+        ])
+    manager = PartitionManager(granularity="daily", premake=1, bind=local_engine)
+
+    result = manager.maintain(now)["system"]
+
+    # Today and tomorrow are made ahead; ended days are moved out; day 5 is past the cutoff
+    assert {"system_logs_p20240110", "system_logs_p20240111"} <= set(result["created"])
+    assert result["moved"] == ["system_logs_p20240105", "system_logs_p20240109"]
+    assert result["dropped"] == [f"system_logs_p2024010{day}" for day in (5, 6, 7)]
+    tables = set(inspect(local_engine).get_table_names())
+    assert "system_logs_p20240105" not in tables
+    with local_engine.connect() as conn:
+        assert conn.execute(select(table.c.message)).scalars().all() == ["day 0"]
+        yesterday = manager.period_table(table, datetime(2024, 1, 9))
+        assert conn.execute(select(func.count()).select_from(yesterday)).scalar() == 2
+
+    # Nothing left to do on a second run
+    assert manager.maintain(now)["system"] == {"created": [], "moved": [], "dropped": []}
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.log_pipeline import LogPipeline
+from app.models.log import LogCategory, LogLevel, SystemLog
+
+
+def system_row(message, level=LogLevel.INFO):
+    return {
+        "level": level,
+        "category": LogCategory.SYSTEM,
+        "message": message,
+        "timestamp": datetime.utcnow(),
+    }
+
+
+def stored_messages(db):
+    return [log.message for log in db.query(SystemLog).order_by(SystemLog.id)]
+
+
+def test_stop_drains_queue_in_order(engine, db, tmp_spill):
+    pipeline = LogPipeline(bind=engine, batch_size=3, flush_interval=60, spill_path=tmp_spill)
+    pipeline.start()
+    for i in range(10):
+        assert pipeline.submit("system", system_row(f"entry {i}"))
+    pipeline.stop()
+
+    assert stored_messages(db) == [f"entry {i}" for i in range(10)]
+    stats = pipeline.stats()
+    assert stats["flushed"] == 10
+    assert stats["queued"] == 0
+    assert not stats["running"]
+
+
+def test_full_batch_is_flushed_without_waiting_for_interval(engine, db, tmp_spill):
+    pipeline = LogPipeline(bind=engine, batch_size=2, flush_interval=60, spill_path=tmp_spill)
+    pipeline.start()
+    try:
+        pipeline.submit_many([("system", system_row("a")), ("system", system_row("b"))])
+        for _ in range(100):
+            if pipeline.stats()["flushed"] == 2:
+                break
+            time.sleep(0.02)
+        assert pipeline.stats()["flushed"] == 2
+    finally:
+        pipeline.stop()
+
+
+def test_drop_debug_evicts_queued_debug_entries_first(engine, db, tmp_spill):
+    pipeline = LogPipeline(bind=engine, max_queue_size=2, backpressure="drop_debug", spill_path=tmp_spill)
+    assert pipeline.submit("system", system_row("debug", LogLevel.DEBUG))
+    assert pipeline.submit("system", system_row("info 1"))
+    # Full: the queued debug entry makes room for the info entry
+    assert pipeline.submit("system", system_row("info 2"))
+    # Full of non-debug entries: a new debug entry is dropped
+    assert not pipeline.submit("system", system_row("debug 2", LogLevel.DEBUG))
+    assert pipeline.stats()["dropped"] == 2
+
+    pipeline.stop()
+    pipeline._flush_all()
+    assert stored_messages(db) == ["info 1", "info 2"]
+
+
+def test_block_times_out_when_nothing_drains(engine, tmp_spill):
+    pipeline = LogPipeline(
+        bind=engine, max_queue_size=1, backpressure="block", block_timeout=0.05, spill_path=tmp_spill
+    )
+    assert pipeline.submit("system", system_row("first"))
+    assert not pipeline.submit("system", system_row("second"))
+    assert pipeline.stats()["dropped"] == 1
+
+
+def test_spill_on_full_queue_and_replay(engine, db, tmp_spill):
+    pipeline = LogPipeline(bind=engine, max_queue_size=1, backpressure="spill", spill_path=tmp_spill)
+    assert pipeline.submit("system", system_row("queued"))
+    assert pipeline.submit("system", system_row("spilled"))
+    with open(tmp_spill, encoding="utf-8") as f:
+        assert [json.loads(line)["row"]["message"] for line in f] == ["spilled"]
+
+    pipeline._flush_all()
+    assert sorted(stored_messages(db)) == ["queued", "spilled"]
+    assert not os.path.exists(tmp_spill)
+
+
+def test_failed_batch_is_spilled_and_replayed(engine, db, tmp_spill, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing-tables.db'}")
+    pipeline = LogPipeline(bind=broken, spill_path=tmp_spill)
+    pipeline.submit("system", system_row("kept"))
+    pipeline._flush_all()
+    assert pipeline.stats()["failed_batches"] >= 1
+    assert os.path.exists(tmp_spill)
+
+    pipeline.bind = engine
+    pipeline._replay_spill()
+    assert stored_messages(db) == ["kept"]
+    assert not os.path.exists(tmp_spill)
+
+
+def test_unknown_backpressure_mode_is_rejected(engine):
+    with pytest.raises(ValueError):
+        LogPipeline(bind=engine, backpressure="nope")
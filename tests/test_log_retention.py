@@ -0,0 +1,115 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.log_retention import RetentionEngine, RetentionJobRunning
+from app.models.log import LogCategory, LogLevel, LogRetentionJob, SystemLog
+
+
+def add_logs(db, count, age_days):
+    timestamp = datetime.utcnow() - timedelta(days=age_days)
+    db.add_all([
+        SystemLog(level=LogLevel.INFO, category=LogCategory.SYSTEM, message=f"m{i}", timestamp=timestamp)
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def wait_until_finished(engine, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = engine.get_job(job_id)
+        if not job.active:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("retention job did not finish")
+
+
+def test_purge_deletes_only_expired_rows(db):
+    add_logs(db, 5, age_days=40)
+    add_logs(db, 3, age_days=1)
+    engine = RetentionEngine(batch_size=2, pause_seconds=0)
+
+    job = wait_until_finished(engine, engine.start_job(days_to_keep=30).id)
+
+    assert job.status == "completed"
+    assert job.progress["system"]["deleted"] == 5
+    assert db.query(SystemLog).count() == 3
+
+
+def test_second_purge_is_rejected_while_one_runs(db):
+    add_logs(db, 4, age_days=40)
+    engine = RetentionEngine(batch_size=1, pause_seconds=0.2)
+    running = engine.start_job(days_to_keep=30)
+    try:
+        with pytest.raises(RetentionJobRunning) as excinfo:
+            engine.start_job(days_to_keep=1)
+        assert excinfo.value.job.id == running.id
+    finally:
+        engine.cancel_job(running.id)
+        wait_until_finished(engine, running.id)
+
+
+def test_interrupted_job_resumes_after_restart(db):
+    add_logs(db, 6, age_days=40)
+    first = RetentionEngine(batch_size=1, pause_seconds=0.05)
+    job = first.start_job(days_to_keep=30)
+    while first.get_job(job.id).progress["system"]["batches"] < 2:
+        time.sleep(0.01)
+    first.cancel_job(job.id)
+    wait_until_finished(first, job.id)
+
+    # A new process only knows the stored state of a job whose process died
+    db.query(LogRetentionJob).filter_by(id=job.id).update(
+        {"status": "running", "active": True, "updated_at": datetime.utcnow() - timedelta(hours=1)}
+    )
+    db.commit()
+    restarted = RetentionEngine(batch_size=1, pause_seconds=0)
+    assert restarted.recover() == 1
+    stored = restarted.get_job(job.id)
+    assert stored.status == "interrupted"
+    assert stored.progress["system"]["cursor"] > 0
+
+    resumed = wait_until_finished(restarted, restarted.start_job(resume_job_id=job.id).id)
+    assert resumed.status == "completed"
+    assert resumed.progress["system"]["cursor"] >= stored.progress["system"]["cursor"]
+    db.expire_all()
+    assert db.query(SystemLog).count() == 0
+
+
+def test_resume_unknown_job_raises_key_error(db):
+    with pytest.raises(KeyError):
+        RetentionEngine().start_job(resume_job_id="missing")
+
+
+def test_purge_running_in_another_process_is_rejected(db):
+    add_logs(db, 4, age_days=40)
+    # Another worker process has its own engine but shares the table
+    other = RetentionEngine(batch_size=1, pause_seconds=0.2)
+    running = other.start_job(days_to_keep=30)
+    try:
+        with pytest.raises(RetentionJobRunning) as excinfo:
+            RetentionEngine().start_job(days_to_keep=30)
+        assert excinfo.value.job.id == running.id
+    finally:
+        other.cancel_job(running.id)
+        wait_until_finished(other, running.id)
+
+    # Once it finished the slot is free again
+    job = wait_until_finished(other, RetentionEngine(pause_seconds=0).start_job(days_to_keep=30).id)
+    assert job.status == "completed"
+
+
+def test_stale_active_job_is_taken_over(db):
+    engine = RetentionEngine(pause_seconds=0)
+    db.add(LogRetentionJob(
+        id="dead", status="running", active=True, progress={},
+        updated_at=datetime.utcnow() - timedelta(hours=1)
+    ))
+    db.commit()
+
+    job = wait_until_finished(engine, engine.start_job(days_to_keep=30).id)
+    assert job.status == "completed"
+    db.expire_all()
+    assert db.get(LogRetentionJob, "dead").status == "interrupted"
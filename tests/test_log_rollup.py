@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime, timedelta
+
+from app.core.background import PeriodicWorker
+from app.crud.log import get_rollup_high_water_mark, rollup_logs
+from app.models.log import APILog, LogCategory, LogLevel, LogRollup, SystemLog
+
+
+def add_system_logs(db, count, timestamp, level=LogLevel.INFO):
+    db.add_all([
+        SystemLog(level=level, category=LogCategory.SYSTEM, message=f"m{i}", timestamp=timestamp)
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def rollup_count(db, source, granularity, **filters):
+    return sum(
+        rollup.log_count for rollup in db.query(LogRollup).filter_by(
+            source=source, granularity=granularity, **filters
+        )
+    )
+
+
+def test_periodic_worker_runs_until_stopped():
+    calls = threading.Semaphore(0)
+    worker = PeriodicWorker("test-worker", 0.01, calls.release)
+    worker.start()
+    assert worker.running
+    assert calls.acquire(timeout=2)
+    assert calls.acquire(timeout=2)
+    worker.stop()
+    assert not worker.running
+
+
+def test_periodic_worker_survives_failures():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    worker = PeriodicWorker("flaky-worker", 0.01, flaky)
+    worker.start()
+    try:
+        for _ in range(200):
+            if len(calls) >= 2:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        worker.stop()
+    assert len(calls) >= 2
+
+
+def test_rollup_counts_each_row_once_per_granularity(db):
+    old = datetime.utcnow() - timedelta(hours=2)
+    add_system_logs(db, 3, old)
+    add_system_logs(db, 2, old, level=LogLevel.ERROR)
+
+    assert rollup_logs(db, settle_seconds=30) == {"system": 5, "api": 0}
+    for granularity in ("minute", "hour", "day"):
+        assert rollup_count(db, "system", granularity) == 5
+        assert sum(r.error_count for r in db.query(LogRollup).filter_by(granularity=granularity)) == 2
+
+    # Nothing new: a second run must not count the rows again
+    assert rollup_logs(db, settle_seconds=30) == {"system": 0, "api": 0}
+    assert rollup_count(db, "system", "minute") == 5
+
+
+def test_rollup_adds_to_existing_buckets(db):
+    old = datetime.utcnow() - timedelta(hours=2)
+    add_system_logs(db, 2, old)
+    rollup_logs(db, settle_seconds=30)
+    add_system_logs(db, 3, old)
+    rollup_logs(db, settle_seconds=30)
+    assert rollup_count(db, "system", "hour", level="INFO", category="SYSTEM") == 5
+    assert db.query(LogRollup).filter_by(source="system", granularity="hour").count() == 1
+
+
+def test_rollup_leaves_unsettled_rows_for_later(db):
+    add_system_logs(db, 2, datetime.utcnow() - timedelta(hours=1))
+    add_system_logs(db, 1, datetime.utcnow())
+    assert rollup_logs(db, settle_seconds=300)["system"] == 2
+    high_water_mark = get_rollup_high_water_mark(db, "system")
+    assert rollup_logs(db, settle_seconds=0)["system"] == 1
+    assert get_rollup_high_water_mark(db, "system") > high_water_mark
+
+
+def test_rollup_respects_batch_size(db):
+    add_system_logs(db, 5, datetime.utcnow() - timedelta(hours=1))
+    assert rollup_logs(db, batch_size=2, settle_seconds=0)["system"] == 2
+    assert rollup_logs(db, batch_size=2, settle_seconds=0)["system"] == 2
+    assert rollup_logs(db, batch_size=2, settle_seconds=0)["system"] == 1
+    assert rollup_count(db, "system", "day") == 5
+
+
+def test_rollup_api_logs_by_endpoint_and_status(db):
+    old = datetime.utcnow() - timedelta(hours=1)
+    db.add_all([
+        APILog(request_id=f"r{i}", method="GET", endpoint="/leads", status_code=status,
+               response_time_ms=10, timestamp=old)
+        for i, status in enumerate((200, 200, 500))
+    ])
+    db.commit()
+    assert rollup_logs(db, settle_seconds=0)["api"] == 3
+    assert rollup_count(db, "api", "minute", endpoint="/leads", status_code=200) == 2
+    errors = db.query(LogRollup).filter_by(source="api", granularity="minute", status_code=500).one()
+    assert errors.error_count == 1
+    assert errors.total_response_time_ms == 10
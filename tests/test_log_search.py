@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+
+from app.core import log_search
+from app.core.pagination import InvalidCursor, encode_cursor
+from app.crud.log import get_system_logs
+from app.models.log import LogCategory, LogLevel, SystemLog
+from app.schemas.log import LogFilter
+
+
+@pytest.fixture
+def logs(db):
+    db.add_all([
+        SystemLog(level=LogLevel.INFO, category=LogCategory.SYSTEM, message=message)
+        for message in ("Payment failed", "payment payment failed twice", "User logged in")
+    ])
+    db.commit()
+
+
+def test_search_matches_word_prefixes(db, logs):
+    page = get_system_logs(db, filters=LogFilter(search_text="pay fail"), count="exact")
+    assert page.total == 2
+    assert {log.message for log in page.items} == {"Payment failed", "payment payment failed twice"}
+
+
+def test_relevance_order_pages_by_offset(db, logs):
+    if log_search.search_backend is None:
+        pytest.skip("no full-text index on this database")
+    page = get_system_logs(db, limit=1, filters=LogFilter(search_text="payment", sort_by_relevance=True))
+    assert page.next_cursor is None
+    assert len(page.items) == 1
+    second = get_system_logs(db, skip=1, limit=1, filters=LogFilter(search_text="payment", sort_by_relevance=True))
+    assert second.items[0].id != page.items[0].id
+
+
+def test_relevance_order_rejects_cursor(db, logs):
+    if log_search.search_backend is None:
+        pytest.skip("no full-text index on this database")
+    with pytest.raises(InvalidCursor):
+        get_system_logs(
+            db, filters=LogFilter(search_text="payment", sort_by_relevance=True),
+            cursor=encode_cursor(datetime.utcnow(), 1)
+        )
@@ -0,0 +1,12 @@
+from sqlalchemy import inspect
+
+from app.core.migrations import run_migrations
+
+
+def test_migrations_are_recorded_once(engine):
+    assert run_migrations(engine) == []
+
+
+def test_line_conversation_gets_only_the_inbox_indexes(engine):
+    indexes = {index["name"] for index in inspect(engine).get_indexes("line_conversation")}
+    assert indexes == {"ix_line_conversation_last_message_at_user", "ix_line_conversation_unread_inbox"}
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import ExplainJSON, InvalidCursor, decode_cursor, encode_cursor, keyset_page
+from app.models.log import LogCategory, LogLevel, SystemLog
+
+
+@pytest.fixture
+def logs(db):
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    # Pairs of rows share a timestamp so the id has to break ties
+    db.add_all([
+        SystemLog(level=LogLevel.INFO, category=LogCategory.SYSTEM, message=f"m{i}",
+                  timestamp=base + timedelta(minutes=i // 2))
+        for i in range(7)
+    ])
+    db.commit()
+    return db.query(SystemLog).order_by(SystemLog.timestamp.desc(), SystemLog.id.desc()).all()
+
+
+def page_through(db, limit, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = keyset_page(db.query(SystemLog), SystemLog.timestamp, SystemLog.id, limit, cursor=cursor, **kwargs)
+        ids.extend(log.id for log in page.items)
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_round_trip():
+    position = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert decode_cursor(encode_cursor(position, 42)) == (position, 42)
+    assert decode_cursor(encode_cursor(position, "U123"), str) == (position, "U123")
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", encode_cursor(datetime(2024, 1, 1), 1)[:-3] + "zzz"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_cursor_with_non_scalar_id_is_rejected():
+    token = base64.urlsafe_b64encode(json.dumps({"t": "2024-01-01T00:00:00", "i": [1]}).encode()).decode()
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 50])
+def test_pages_cover_every_row_once_in_order(db, logs, limit):
+    ids, pages = page_through(db, limit, count="none")
+    assert ids == [log.id for log in logs]
+    assert pages == max(1, -(-len(logs) // limit))
+
+
+def test_last_page_has_no_cursor(db, logs):
+    page = keyset_page(db.query(SystemLog), SystemLog.timestamp, SystemLog.id, len(logs), count="none")
+    assert len(page.items) == len(logs)
+    assert page.next_cursor is None
+
+
+def test_count_modes(db, logs):
+    query = db.query(SystemLog)
+    exact = keyset_page(query, SystemLog.timestamp, SystemLog.id, 2, count="exact")
+    assert (exact.total, exact.total_is_estimate) == (len(logs), False)
+    assert keyset_page(query, SystemLog.timestamp, SystemLog.id, 2, count="none").total is None
+    # SQLite has no planner estimate, so it falls back to the exact count
+    estimate = keyset_page(query, SystemLog.timestamp, SystemLog.id, 2, count="estimate")
+    assert (estimate.total, estimate.total_is_estimate) == (len(logs), False)
+
+
+def test_total_counts_the_filtered_query(db, logs):
+    query = db.query(SystemLog).filter(SystemLog.message.in_(["m0", "m1", "m2"]))
+    page = keyset_page(query, SystemLog.timestamp, SystemLog.id, 1, count="exact")
+    assert page.total == 3
+    assert len(page.items) == 1
+
+
+def test_skip_without_cursor_falls_back_to_offset(db, logs):
+    page = keyset_page(db.query(SystemLog), SystemLog.timestamp, SystemLog.id, 2, skip=3, count="none")
+    assert [log.id for log in page.items] == [log.id for log in logs[3:5]]
+
+
+def test_rows_inserted_after_the_first_page_do_not_shift_later_pages(db, logs):
+    first = keyset_page(db.query(SystemLog), SystemLog.timestamp, SystemLog.id, 3, count="none")
+    db.add(SystemLog(level=LogLevel.INFO, category=LogCategory.SYSTEM, message="newest",
+                     timestamp=datetime(2030, 1, 1)))
+    db.commit()
+    second = keyset_page(db.query(SystemLog), SystemLog.timestamp, SystemLog.id, 3,
+                         cursor=first.next_cursor, count="none")
+    assert [log.id for log in second.items] == [log.id for log in logs[3:6]]
+
+
+def test_estimate_explain_keeps_filter_values_bound(db):
+    query = db.query(SystemLog).filter(SystemLog.message.like("%'; DROP TABLE system_logs; --%"))
+    compiled = ExplainJSON(query.statement).compile(dialect=postgresql.dialect())
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "DROP TABLE" not in str(compiled)
+    assert "%'; DROP TABLE system_logs; --%" in compiled.params.values()
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import get_async_db, get_current_user_async
+from app.api.v1.user import delete_user
+from app.core.jwt import create_access_token, decode_token, token_digest
+from app.core.principal import (
+    PrincipalInvalidations, invalidate_principal, load_principal, principal_cache
+)
+from app.crud.token import save_principal_invalidation
+from app.models.user import PrincipalInvalidation, User
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture
+def users(db):
+    admin = User(name="Admin", email="admin@example.com", password="x", role_id=1)
+    agent = User(name="Agent", email="agent@example.com", password="x", role_id=2)
+    db.add_all([admin, agent])
+    db.commit()
+    return admin, agent
+
+
+def login(user, **claims):
+    token = create_access_token({"sub": str(user.id), **claims})
+    return token, decode_token(token)
+
+
+def test_principal_is_cached_per_token(db, users):
+    _, agent = users
+    first, first_payload = login(agent)
+    second, second_payload = login(agent, jti="second")
+
+    assert load_principal(db, first_payload, first).email == agent.email
+    assert load_principal(db, second_payload, second).email == agent.email
+    assert principal_cache.get((agent.id, token_digest(first))) is not None
+    assert principal_cache.get((agent.id, token_digest(second))) is not None
+
+
+def test_cached_principal_does_not_outlive_its_token(db, users):
+    _, agent = users
+    token, payload = login(agent)
+    payload["exp"] = time.time() - 1
+    load_principal(db, payload, token)
+    assert len(principal_cache) == 0
+
+
+def test_invalidate_drops_every_token_of_the_user(db, users):
+    admin, agent = users
+    tokens = [login(agent, jti=str(i)) for i in range(2)]
+    admin_token, admin_payload = login(admin)
+    for token, payload in tokens + [(admin_token, admin_payload)]:
+        load_principal(db, payload, token)
+
+    invalidate_principal(agent.id)
+    assert all(principal_cache.get((agent.id, token_digest(token))) is None for token, _ in tokens)
+    assert principal_cache.get((admin.id, token_digest(admin_token))) is not None
+
+
+def test_deleted_user_loses_access(db, users):
+    admin, agent = users
+    token, payload = login(agent)
+    assert load_principal(db, payload, token) is not None
+
+    delete_user(agent.id, db=db, current_user=admin)
+    assert load_principal(db, payload, token) is None
+
+
+def test_delete_user_rejects_missing_and_self(db, users):
+    admin, _ = users
+    with pytest.raises(HTTPException) as missing:
+        delete_user(admin.id + 100, db=db, current_user=admin)
+    assert missing.value.status_code == 404
+    with pytest.raises(HTTPException) as own:
+        delete_user(admin.id, db=db, current_user=admin)
+    assert own.value.status_code == 400
+
+
+def authenticate_async(token):
+    async def scenario():
+        sessions = get_async_db()
+        db = await sessions.__anext__()
+        try:
+            return await get_current_user_async(token, db)
+        finally:
+            await sessions.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_async_dependency_shares_the_principal_cache(db, users):
+    _, agent = users
+    token, payload = login(agent)
+
+    assert authenticate_async(token).email == "agent@example.com"
+    assert principal_cache.get((agent.id, token_digest(token))) is not None
+    # The sync path is now served from the entry the async one stored
+    db.query(User).filter(User.id == agent.id).update({"email": "changed@example.com"})
+    db.commit()
+    assert load_principal(db, payload, token).email == "agent@example.com"
+
+    invalidate_principal(agent.id)
+    assert authenticate_async(token).email == "changed@example.com"
+
+
+def test_async_dependency_rejects_unknown_users(db, users):
+    _, agent = users
+    token, _ = login(agent)
+    db.delete(agent)
+    db.commit()
+    with pytest.raises(HTTPException) as error:
+        authenticate_async(token)
+    assert error.value.status_code == 401
+
+
+def test_change_made_by_another_process_is_picked_up_on_sync(db, users):
+    admin, agent = users
+    feed = PrincipalInvalidations()
+    keys = {}
+    for user in users:
+        token, payload = login(user)
+        load_principal(db, payload, token)
+        keys[user.id] = (user.id, token_digest(token))
+
+    # Another process changed the agent and recorded it
+    save_principal_invalidation(db, agent.id, datetime.utcnow())
+    assert feed.sync() == 1
+    assert principal_cache.get(keys[agent.id]) is None
+    assert principal_cache.get(keys[admin.id]) is not None
+
+
+def test_local_invalidation_is_recorded_for_other_processes(db, users):
+    _, agent = users
+    invalidate_principal(agent.id)
+    invalidate_principal(agent.id)
+    assert [row.user_id for row in db.query(PrincipalInvalidation)] == [agent.id]
+
+
+def test_sync_purges_invalidations_older_than_the_cache(db, users):
+    admin, agent = users
+    save_principal_invalidation(db, admin.id, datetime.utcnow() - timedelta(days=1))
+    save_principal_invalidation(db, agent.id, datetime.utcnow())
+    PrincipalInvalidations().sync()
+    assert [row.user_id for row in db.query(PrincipalInvalidation)] == [agent.id]
+
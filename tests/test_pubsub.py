@@ -0,0 +1,238 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from fnmatch import fnmatchcase
+
+import pytest
+
+from app.api.v1 import line as line_api
+from app.core.line_feed import LINE_MESSAGES_CHANNEL
+from app.core.pubsub import PubSubBroker
+
+
+class FakePubSub:
+    """The part of redis-py's PubSub the broker's listener uses"""
+
+    def __init__(self, client: "FakeRedis"):
+        self.client = client
+        self.patterns = []
+        self.messages: queue.Queue = queue.Queue()
+
+    def psubscribe(self, *patterns):
+        self.patterns.extend(patterns)
+
+    def get_message(self, timeout: float = 0.0):
+        try:
+            # Short waits keep broker.stop() fast
+            return self.messages.get(timeout=min(timeout, 0.05))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.client.detach(self)
+
+    def _receive(self, channel: str, data: str):
+        for pattern in self.patterns:
+            if fnmatchcase(channel, pattern):
+                self.messages.put({
+                    "type": "pmessage", "pattern": pattern.encode(),
+                    "channel": channel.encode(), "data": data.encode(),
+                })
+                return
+
+
+class FakeRedis:
+    """In-memory stand-in for a Redis server shared by several worker processes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pubsubs = []
+
+    def pubsub(self, ignore_subscribe_messages: bool = False):
+        pubsub = FakePubSub(self)
+        with self._lock:
+            self._pubsubs.append(pubsub)
+        return pubsub
+
+    def detach(self, pubsub: FakePubSub):
+        with self._lock:
+            self._pubsubs.remove(pubsub)
+
+    def publish(self, channel: str, data: str) -> int:
+        with self._lock:
+            pubsubs = list(self._pubsubs)
+        for pubsub in pubsubs:
+            pubsub._receive(channel, data)
+        return len(pubsubs)
+
+    def listening(self, count: int) -> bool:
+        with self._lock:
+            return sum(1 for pubsub in self._pubsubs if pubsub.patterns) >= count
+
+
+class FailingRedis(FakeRedis):
+    def publish(self, channel: str, data: str) -> int:
+        raise ConnectionError("redis is down")
+
+
+class SlowRedis(FakeRedis):
+    """publish blocks until the test releases it, like a slow Redis round trip"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def publish(self, channel: str, data: str) -> int:
+        assert self.release.wait(5), "publish blocked the event loop"
+        return super().publish(channel, data)
+
+
+def message(user_id, text="hi"):
+    return {"event": "message", "user_id": user_id, "message": {"message_text": text}}
+
+
+@pytest.fixture
+def redis_brokers():
+    """Two brokers, as in two worker processes, connected through one fake Redis"""
+    redis = FakeRedis()
+    brokers = [PubSubBroker(client=redis, channel_prefix="test:") for _ in range(2)]
+    for broker in brokers:
+        broker.start()
+    deadline = time.monotonic() + 5
+    while not redis.listening(len(brokers)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield brokers
+    for broker in brokers:
+        broker.stop()
+
+
+def test_in_process_fan_out_filters_by_user():
+    async def scenario():
+        broker = PubSubBroker()
+        everyone = broker.subscribe("chan")
+        only_u2 = broker.subscribe("chan", user_ids=["U2"])
+        broker.publish("chan", message("U1"))
+        broker.publish("chan", message("U2"))
+        broker.publish("other", message("U2"))
+        received = [(await everyone.get(1))["user_id"], (await everyone.get(1))["user_id"]]
+        assert received == ["U1", "U2"]
+        assert (await only_u2.get(1))["user_id"] == "U2"
+        assert await only_u2.get(0.05) is None
+        everyone.close()
+        only_u2.close()
+        assert broker.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_messages_fan_out_across_processes(redis_brokers):
+    publisher, listener = redis_brokers
+
+    async def scenario():
+        remote = listener.subscribe("chan", user_ids=["U1"])
+        local = publisher.subscribe("chan")
+        publisher.publish("chan", message("U2", "skipped"))
+        publisher.publish("chan", message("U1", "delivered"))
+        assert (await remote.get(2))["message"]["message_text"] == "delivered"
+        assert [(await local.get(2))["user_id"] for _ in range(2)] == ["U2", "U1"]
+        remote.close()
+        local.close()
+
+    asyncio.run(scenario())
+    assert publisher.stats()["backend"] == "redis"
+    assert listener.stats()["listening"]
+
+
+def test_publish_failure_is_counted_not_raised():
+    broker = PubSubBroker(client=FailingRedis())
+    broker.publish("chan", message("U1"))
+    assert broker.stats()["publish_errors"] == 1
+
+
+def test_async_publish_leaves_the_event_loop_free():
+    redis = SlowRedis()
+    broker = PubSubBroker(client=redis)
+
+    async def scenario():
+        publishing = asyncio.ensure_future(broker.publish_async("chan", message("U1")))
+        await asyncio.sleep(0.05)
+        assert not publishing.done()
+        # Runs on the loop while publish waits in the threadpool
+        redis.release.set()
+        await asyncio.wait_for(publishing, 5)
+
+    asyncio.run(scenario())
+    assert broker.stats()["published"] == 1
+    assert broker.stats()["publish_errors"] == 0
+
+
+def test_full_queue_drops_oldest_and_marks_lagged():
+    async def scenario():
+        broker = PubSubBroker(max_queue=2)
+        subscription = broker.subscribe("chan")
+        for text in ("a", "b", "c"):
+            broker.publish("chan", message("U1", text))
+        await asyncio.sleep(0)  # let the deliveries run
+        assert subscription.lagged
+        assert subscription.dropped == 1
+        assert [(await subscription.get(1))["message"]["message_text"] for _ in range(2)] == ["b", "c"]
+        subscription.close()
+
+    asyncio.run(scenario())
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+@pytest.fixture
+def stream_broker(monkeypatch):
+    broker = PubSubBroker(max_queue=2)
+    monkeypatch.setattr(line_api, "broker", broker)
+    monkeypatch.setattr(line_api.settings, "LINE_STREAM_HEARTBEAT_SECONDS", 0.05)
+    return broker
+
+
+def test_stream_subscribes_only_while_streaming(stream_broker):
+    async def scenario():
+        response = await line_api.line_message_stream(ConnectedRequest(), user_id=None)
+        # A request cancelled before streaming leaves no subscription behind
+        assert stream_broker.stats()["subscribers"] == 0
+        events = response.body_iterator
+        assert await events.__anext__() == "retry: 3000\n\n"
+        assert stream_broker.stats()["subscribers"] == 1
+        await events.aclose()
+        assert stream_broker.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_events_heartbeats_and_resync(stream_broker):
+    async def scenario():
+        response = await line_api.line_message_stream(ConnectedRequest(), user_id=["U1"])
+        events = response.body_iterator
+        await events.__anext__()
+
+        # Idle: a heartbeat comment
+        assert await events.__anext__() == ": heartbeat\n\n"
+
+        stream_broker.publish(LINE_MESSAGES_CHANNEL, message("U2"))
+        stream_broker.publish(LINE_MESSAGES_CHANNEL, message("U1", "first"))
+        event = await events.__anext__()
+        assert event.startswith("event: message\ndata: ")
+        assert json.loads(event.split("data: ", 1)[1])["message"]["message_text"] == "first"
+
+        # More than the queue holds: the client is told to resynchronize
+        for text in ("a", "b", "c"):
+            stream_broker.publish(LINE_MESSAGES_CHANNEL, message("U1", text))
+        await asyncio.sleep(0)
+        assert await events.__anext__() == "event: resync\ndata: {}\n\n"
+        texts = [json.loads((await events.__anext__()).split("data: ", 1)[1])["message"]["message_text"]
+                 for _ in range(2)]
+        assert texts == ["b", "c"]
+        await events.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+"""The lead CRUD queries must be answered from indexes.
+
+Each listing, count and lookup function in ``app.crud.lead`` is run against
+the test database while its SQL is captured, and the ``EXPLAIN`` plan of
+every SELECT is checked for full scans of the lead tables. PostgreSQL plans
+are taken with ``enable_seqscan`` off, so a sequential scan only shows up
+when no index can serve the query, however small the table.
+"""
+import re
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud import lead as crud_lead
+from app.models.lead import Lead, LeadNote, LeadStatusChange, StatusChoices
+
+WATCHED_TABLES = {Lead.__tablename__, LeadNote.__tablename__, LeadStatusChange.__tablename__}
+
+LEAD_QUERIES: Dict[str, Callable[[Session], Any]] = {
+    "get_user_leads": lambda db: crud_lead.get_user_leads(db, 1),
+    "get_user_leads[status]": lambda db: crud_lead.get_user_leads(db, 1, status=StatusChoices.NEW),
+    "get_user_leads[prefix search]": lambda db: crud_lead.get_user_leads(db, 1, search="john", search_mode="prefix"),
+    "get_user_leads_count": lambda db: crud_lead.get_user_leads_count(db, 1),
+    "get_user_leads_count[status]": lambda db: crud_lead.get_user_leads_count(db, 1, status=StatusChoices.NEW),
+    "get_all_leads": lambda db: crud_lead.get_all_leads(db),
+    "get_all_leads[status]": lambda db: crud_lead.get_all_leads(db, status=StatusChoices.NEW),
+    "get_all_leads[prefix search]": lambda db: crud_lead.get_all_leads(db, search="john", search_mode="prefix"),
+    "get_leads_count[status]": lambda db: crud_lead.get_leads_count(db, status=StatusChoices.NEW),
+    "get_leads_page": lambda db: crud_lead.get_leads_page(db, user_id=1),
+    "get_lead_by_id": lambda db: crud_lead.get_lead_by_id(db, 1),
+    "get_lead_by_platform_id": lambda db: crud_lead.get_lead_by_platform_id(db, "U0000"),
+    "get_lead_notes_by_lead_id": lambda db: crud_lead.get_lead_notes_by_lead_id(db, 1),
+    "get_lead_status_changes_by_lead_id": lambda db: crud_lead.get_lead_status_changes_by_lead_id(db, 1),
+}
+
+
+@contextmanager
+def capture_selects(bind):
+    """Collect every SELECT issued on ``bind`` while the block runs"""
+    statements: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(db: Session, statement: str, parameters: Any) -> List[str]:
+    conn = db.connection()
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return list(conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars())
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Plan lines that read a whole watched table instead of using an index"""
+    scans = []
+    for line in plan:
+        line = line.strip()
+        match = re.search(r"Seq Scan on (\w+)", line) or re.fullmatch(r"SCAN (\w+)", line)
+        if match and match.group(1) in WATCHED_TABLES:
+            scans.append(line)
+    return scans
+
+
+@pytest.mark.parametrize("name", list(LEAD_QUERIES))
+def test_lead_query_uses_indexes(engine, db, name):
+    if engine.dialect.name not in ("postgresql", "sqlite"):
+        pytest.skip(f"No plan inspection for {engine.dialect.name}")
+    with capture_selects(engine) as statements:
+        LEAD_QUERIES[name](db)
+    assert statements, "the query issued no SELECT"
+
+    scans = [scan for statement, parameters in statements for scan in full_scans(explain(db, statement, parameters))]
+    db.rollback()
+    assert scans == []
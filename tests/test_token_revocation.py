@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from jose import JWTError
+
+from app.core.jwt import (
+    RevocationList, create_access_token, decode_token, revocations, revoke_token, token_digest
+)
+from app.crud.token import save_revoked_token
+from app.models.user import RevokedToken
+
+
+def new_token(user_id=1):
+    # A unique jti keeps tokens of different tests apart in the module-level caches
+    return create_access_token({"sub": str(user_id), "jti": uuid.uuid4().hex})
+
+
+def test_revoked_token_is_stored_until_it_expires(db):
+    token = new_token(user_id=7)
+    revoke_token(token)
+
+    row = db.query(RevokedToken).one()
+    assert row.digest == token_digest(token)
+    assert row.user_id == 7
+    assert row.expires_at > datetime.utcnow() + timedelta(minutes=5)
+    with pytest.raises(JWTError):
+        decode_token(token)
+
+
+def test_other_process_sees_revocation(db):
+    token = new_token()
+    revoke_token(token)
+
+    other = RevocationList()
+    assert token_digest(token) not in other
+    assert other.is_revoked(token_digest(token))
+    assert token_digest(token) in other
+
+    restarted = RevocationList()
+    assert restarted.sync() == 1
+    assert token_digest(token) in restarted
+
+
+def test_first_decode_checks_the_table(db):
+    token = new_token()
+    # Revoked by another process: not in this process's list yet
+    save_revoked_token(db, token_digest(token), 1, datetime.utcnow() + timedelta(minutes=5))
+    with pytest.raises(JWTError):
+        decode_token(token)
+
+
+def test_cached_token_is_rejected_after_sync(db):
+    token = new_token()
+    assert decode_token(token)["sub"] == "1"
+    save_revoked_token(db, token_digest(token), 1, datetime.utcnow() + timedelta(minutes=5))
+    revocations.sync()
+    with pytest.raises(JWTError):
+        decode_token(token)
+
+
+def test_sync_purges_expired_revocations(db):
+    save_revoked_token(db, "expired", 1, datetime.utcnow() - timedelta(seconds=1))
+    save_revoked_token(db, "active", 1, datetime.utcnow() + timedelta(minutes=5))
+
+    local = RevocationList()
+    assert local.sync() == 1
+    assert "active" in local
+    assert "expired" not in local
+    assert [row.digest for row in db.query(RevokedToken)] == ["active"]
+
+
+def test_revoking_twice_is_harmless(db):
+    token = new_token()
+    revoke_token(token)
+    revoke_token(token)
+    assert db.query(RevokedToken).count() == 1